@@ -0,0 +1,117 @@
+import atexit
+import queue
+import threading
+import time
+
+from flask import current_app
+
+from models import db, Counter, PageView
+from analytics_rollup import apply_events
+
+DROPPED_COUNTER = 'analytics_dropped'
+
+
+class PageViewBuffer:
+    """页面访问记录的写缓冲
+
+    访问事件先进入内存中的有界队列，由后台线程按数量或时间阈值
+    在一个事务内批量写入（同时累加日汇总表），避免每次访问都单独提交一次。
+    队列已满时直接丢弃事件并计数，丢弃数会在下次写入时累加到 counters 表。
+    写入失败的一批事件同样计为丢弃。
+    """
+
+    def __init__(self, app, max_queue=10000, batch_size=500, flush_interval=2.0):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._dropped_lock = threading.Lock()
+        self._pending_dropped = 0
+        self.dropped = 0
+
+    def put(self, event):
+        """加入一条访问事件，队列已满时返回 False"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+                self._pending_dropped += 1
+            return False
+
+    def _ensure_started(self):
+        # 延迟到第一次使用时启动，避免在 fork 之前创建线程
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='pageview-buffer', daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _collect(self):
+        """收集一批事件，数量达到 batch_size 或等待超过 flush_interval 即返回"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _flush(self, batch):
+        with self._dropped_lock:
+            dropped, self._pending_dropped = self._pending_dropped, 0
+
+        with self.app.app_context():
+            try:
+                db.session.execute(PageView.__table__.insert(), batch)
+                apply_events(batch)
+                if dropped:
+                    updated = Counter.query.filter_by(key=DROPPED_COUNTER).update(
+                        {Counter.value: Counter.value + dropped}
+                    )
+                    if not updated:
+                        db.session.add(Counter(key=DROPPED_COUNTER, value=dropped))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                # 本批事件已丢失，连同未写入的丢弃数留到下次写入时计数
+                with self._dropped_lock:
+                    self.dropped += len(batch)
+                    self._pending_dropped += len(batch) + dropped
+                current_app.logger.exception('写入访问记录失败（%d 条）', len(batch))
+
+    def stop(self):
+        """停止后台线程并写入队列中剩余的事件"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        remaining = self._drain()
+        if remaining:
+            self._flush(remaining)
@@ -0,0 +1,132 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, literal_column, select
+
+# Add the server directory to the path so we can import models
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app import create_app
+from models import db, PageView, PageViewDaily, PageViewDailyVisitor
+from analytics_rollup import ALL_PAGES, mark_pruned, pruned_before, rebuild
+
+
+def backfill(args):
+    since = datetime.strptime(args.since, '%Y-%m-%d').date() if args.since else None
+    print(f"Rebuilding analytics rollups{f' since {since}' if since else ''}...")
+    rebuild(since)
+    db.session.commit()
+    print("Rollups rebuilt!")
+
+
+def aggregate_before(cutoff):
+    """确保 cutoff 之前每一天的原始记录都已计入日汇总
+
+    只补算原始记录多于汇总的日期（有事件尚未计入）。原始记录少于汇总说明该日
+    已部分清理，按原始记录重建会丢失数据；清理边界之前的日期不再检查。
+    """
+    day_expr = func.date(PageView.created_at)
+    query = db.session.query(day_expr, func.count()).filter(PageView.created_at < cutoff)
+    boundary = pruned_before()
+    if boundary:
+        query = query.filter(PageView.created_at >= datetime.combine(boundary, datetime.min.time()))
+    raw_counts = query.group_by(day_expr).all()
+    rolled = {
+        row.day: row.pv for row in PageViewDaily.query.filter(
+            PageViewDaily.page_path == ALL_PAGES,
+            PageViewDaily.day < cutoff.date()
+        )
+    }
+
+    for day_str, count in raw_counts:
+        day = datetime.strptime(day_str, '%Y-%m-%d').date()
+        if count > rolled.get(day, 0):
+            rebuild(day, day + timedelta(days=1))
+            db.session.commit()
+            print(f"Aggregated {count} raw events for {day}")
+
+
+def delete_in_batches(model, condition, batch_size, pause):
+    """分批删除，每批单独提交，避免长时间占用写锁"""
+    table = model.__table__
+    rowid = literal_column('rowid')
+    total = 0
+    while True:
+        batch = select(rowid).select_from(table).where(condition).limit(batch_size)
+        deleted = db.session.execute(table.delete().where(rowid.in_(batch))).rowcount
+        db.session.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+def vacuum(mode):
+    # VACUUM 不能在事务中执行
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if mode == 'full':
+            conn.exec_driver_sql('VACUUM')
+        elif mode == 'incremental':
+            auto_vacuum = conn.exec_driver_sql('PRAGMA auto_vacuum').scalar()
+            if auto_vacuum != 2:
+                print("auto_vacuum is not INCREMENTAL; run with --vacuum full once to enable it")
+                conn.exec_driver_sql('PRAGMA auto_vacuum = INCREMENTAL')
+                return
+            conn.exec_driver_sql('PRAGMA incremental_vacuum')
+
+
+def prune(args):
+    days = args.days if args.days is not None else current_app.config['ANALYTICS_RETENTION_DAYS']
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    cutoff = today - timedelta(days=days)
+    print(f"Pruning raw page views before {cutoff.date()}...")
+
+    aggregate_before(cutoff)
+    # 先记录清理边界再删除，中断后重新运行不会按残留的原始记录重建这些日期
+    mark_pruned(cutoff.date())
+    db.session.commit()
+
+    started = time.monotonic()
+    deleted = delete_in_batches(PageView, PageView.created_at < cutoff, args.batch_size, args.pause)
+    print(f"Deleted {deleted} raw page views in {time.monotonic() - started:.1f}s")
+
+    # 更早日期已不会再有新的访问事件，访客去重记录可以一并清理
+    deleted = delete_in_batches(
+        PageViewDailyVisitor, PageViewDailyVisitor.day < cutoff.date(), args.batch_size, args.pause
+    )
+    print(f"Deleted {deleted} daily visitor rows")
+
+    if args.vacuum != 'none':
+        print(f"Running {args.vacuum} vacuum...")
+        vacuum(args.vacuum)
+    print("Prune completed!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='访问统计维护工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backfill_parser = subparsers.add_parser('backfill', help='根据原始访问记录重建日汇总表')
+    backfill_parser.add_argument('--since', help='只重建该日期（YYYY-MM-DD）之后的汇总')
+    backfill_parser.set_defaults(func=backfill)
+
+    prune_parser = subparsers.add_parser('prune', help='汇总并清理超过保留天数的原始访问记录')
+    prune_parser.add_argument('--days', type=int, help='保留天数，默认读取 ANALYTICS_RETENTION_DAYS')
+    prune_parser.add_argument('--batch-size', type=int, default=5000, help='每批删除的行数')
+    prune_parser.add_argument('--pause', type=float, default=0.05, help='每批之间的间隔秒数')
+    prune_parser.add_argument('--vacuum', choices=['none', 'incremental', 'full'], default='none',
+                              help='清理后回收磁盘空间的方式')
+    prune_parser.set_defaults(func=prune)
+
+    args = parser.parse_args()
+    app = create_app()
+    with app.app_context():
+        args.func(args)
+
+
+if __name__ == "__main__":
+    main()
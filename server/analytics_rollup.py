@@ -0,0 +1,125 @@
+from collections import Counter as TallyCounter
+from datetime import date, datetime
+
+from sqlalchemy import distinct, func, insert, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, Counter, PageView, PageViewDaily, PageViewDailyVisitor
+
+# 全站汇总行使用的 page_path
+ALL_PAGES = '*'
+# counters 表中记录的清理边界（日期序数）：此前的日期已汇总完毕，原始记录可能已部分删除
+PRUNED_BEFORE = 'analytics_pruned_before'
+# 每条 INSERT 写入的访客去重记录数（每行 3 个参数，低于 SQLite 的参数数量上限）
+VISITOR_CHUNK = 300
+
+
+def pruned_before(connection=None):
+    """返回清理边界日期，从未清理过时返回 None"""
+    connection = connection or db.session
+    value = connection.execute(select(Counter.value).where(Counter.key == PRUNED_BEFORE)).scalar()
+    return date.fromordinal(value) if value is not None else None
+
+
+def mark_pruned(day):
+    """在删除原始记录之前记录清理边界（不提交）"""
+    counter = db.session.get(Counter, PRUNED_BEFORE)
+    if counter is None:
+        db.session.add(Counter(key=PRUNED_BEFORE, value=day.toordinal()))
+    elif counter.value < day.toordinal():
+        counter.value = day.toordinal()
+
+
+def apply_events(events):
+    """将一批访问事件增量累加到日汇总表（不提交，随调用方事务提交）
+
+    UV 只累加本批中首次出现的访客：去重表 INSERT ... ON CONFLICT DO NOTHING
+    RETURNING 返回实际插入的行，不需要重新统计当天的全部访客。
+    """
+    if not events:
+        return
+
+    pv_counts = TallyCounter()
+    visitors = set()
+    for event in events:
+        day = event['created_at'].date()
+        for path in (event['page_path'], ALL_PAGES):
+            pv_counts[(day, path)] += 1
+            if event.get('visitor_id'):
+                visitors.add((day, path, event['visitor_id']))
+
+    uv_counts = TallyCounter()
+    daily_visitors = PageViewDailyVisitor.__table__
+    rows = [{'day': day, 'page_path': path, 'visitor_id': visitor_id} for day, path, visitor_id in visitors]
+    for start in range(0, len(rows), VISITOR_CHUNK):
+        stmt = (
+            sqlite_insert(daily_visitors)
+            .values(rows[start:start + VISITOR_CHUNK])
+            .on_conflict_do_nothing()
+            .returning(daily_visitors.c.day, daily_visitors.c.page_path)
+        )
+        uv_counts.update((row.day, row.page_path) for row in db.session.execute(stmt))
+
+    daily = PageViewDaily.__table__
+    stmt = sqlite_insert(daily)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[daily.c.day, daily.c.page_path],
+        set_={'pv': daily.c.pv + stmt.excluded.pv, 'uv': daily.c.uv + stmt.excluded.uv}
+    )
+    db.session.execute(stmt, [
+        {'day': day, 'page_path': path, 'pv': count, 'uv': uv_counts[(day, path)]}
+        for (day, path), count in pv_counts.items()
+    ])
+
+
+def rebuild(since=None, until=None, connection=None):
+    """根据原始 PageView 记录重建 [since, until) 日期范围内的日汇总
+
+    since 为空时从最早的原始记录所在日期开始。清理边界之前的日期（原始记录已删除
+    或在中断的清理中只删除了一部分）不会被改动，since 早于清理边界时从边界开始。
+    connection 为空时使用 db.session（不提交），迁移中传入迁移所用的连接。
+    """
+    connection = connection or db.session
+    daily = PageViewDaily.__table__
+    daily_visitors = PageViewDailyVisitor.__table__
+    raw = PageView.__table__
+
+    if since is None:
+        earliest = connection.execute(select(func.min(raw.c.created_at))).scalar()
+        if earliest is None:
+            return
+        since = earliest.date()
+    boundary = pruned_before(connection)
+    if boundary and since < boundary:
+        since = boundary
+    if until and since >= until:
+        return
+
+    day_conditions = [daily.c.day >= since]
+    visitor_conditions = [daily_visitors.c.day >= since]
+    conditions = [raw.c.created_at >= datetime.combine(since, datetime.min.time())]
+    if until:
+        day_conditions.append(daily.c.day < until)
+        visitor_conditions.append(daily_visitors.c.day < until)
+        conditions.append(raw.c.created_at < datetime.combine(until, datetime.min.time()))
+
+    connection.execute(daily.delete().where(*day_conditions))
+    connection.execute(daily_visitors.delete().where(*visitor_conditions))
+
+    day_expr = func.date(raw.c.created_at)
+    for path_expr, group_by in (
+        (raw.c.page_path, [day_expr, raw.c.page_path]),
+        (literal(ALL_PAGES), [day_expr]),
+    ):
+        connection.execute(insert(daily_visitors).from_select(
+            ['day', 'page_path', 'visitor_id'],
+            select(day_expr, path_expr, raw.c.visitor_id)
+            .where(raw.c.visitor_id.isnot(None), *conditions)
+            .distinct()
+        ))
+        connection.execute(insert(daily).from_select(
+            ['day', 'page_path', 'pv', 'uv'],
+            select(day_expr, path_expr, func.count(), func.count(distinct(raw.c.visitor_id)))
+            .where(*conditions)
+            .group_by(*group_by)
+        ))
@@ -1,12 +1,19 @@
 import os
-from flask import Flask, send_from_directory
+from flask import Flask, abort
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from werkzeug.security import generate_password_hash
-from models import db, Admin, Page
+from models import db
+from database import load_config, init_engine
+from analytics_buffer import PageViewBuffer
+from static_files import send_upload, send_resized
+from resize_cache import ResizeCache
+from translation import create_translator
+from storage import create_storage
+import stats_counters
 
 def create_app():
-    app = Flask(__name__, static_folder='uploads')
+    # 上传文件由 serve_upload 发送，不使用 Flask 默认的静态文件路由
+    app = Flask(__name__, static_folder=None)
     
     # 配置
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'pearl-elegance-secret-key-2024')
@@ -14,10 +21,55 @@ def create_app():
     app.config['JWT_TOKEN_LOCATION'] = ['headers']
     app.config['JWT_HEADER_NAME'] = 'Authorization'
     app.config['JWT_HEADER_TYPE'] = 'Bearer'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.sqlite'
+    # 数据库地址、SQLite PRAGMA 与连接池参数（见 database.py）
+    load_config(app)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['MAX_CONTENT_LENGTH'] = 20 * 1024 * 1024  # 20MB max upload
     app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'uploads')
+    # 上传文件存储：local（UPLOAD_FOLDER 下按哈希分目录）/ memory（测试用）
+    app.config['STORAGE_BACKEND'] = os.environ.get('STORAGE_BACKEND', 'local').lower()
+    app.config['STORAGE_SHARD_DEPTH'] = int(os.environ.get('STORAGE_SHARD_DEPTH', 2))
+    # 分片上传：单个文件大小上限与建议的分片大小
+    app.config['UPLOAD_MAX_SIZE'] = int(os.environ.get('UPLOAD_MAX_SIZE', 100 * 1024 * 1024))
+    app.config['UPLOAD_CHUNK_SIZE'] = int(os.environ.get('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+    # 未完成的分片上传会话保留秒数，超过后由 upload_gc.py 清理
+    app.config['UPLOAD_SESSION_MAX_AGE'] = int(os.environ.get('UPLOAD_SESSION_MAX_AGE', 2 * 24 * 3600))
+    # 未被引用的上传文件先移入隔离目录，需与上传目录在同一磁盘
+    app.config['UPLOAD_QUARANTINE_FOLDER'] = os.environ.get(
+        'UPLOAD_QUARANTINE_FOLDER', os.path.join(app.config['UPLOAD_FOLDER'], '.quarantine')
+    )
+    # 上传文件发送方式：none（Flask 发送）/ x-accel（nginx）/ x-sendfile（Apache 等）
+    app.config['UPLOADS_ACCEL'] = os.environ.get('UPLOADS_ACCEL', 'none').lower()
+    app.config['UPLOADS_ACCEL_PREFIX'] = os.environ.get('UPLOADS_ACCEL_PREFIX', '/_protected_uploads')
+    app.config['USE_X_SENDFILE'] = app.config['UPLOADS_ACCEL'] == 'x-sendfile'
+    # 按需缩放：允许的宽度、格式及磁盘缓存
+    app.config['RESIZE_WIDTHS'] = [
+        int(w) for w in os.environ.get('RESIZE_WIDTHS', '160,240,320,480,640,800,960,1200').split(',') if w.strip()
+    ]
+    app.config['RESIZE_FORMATS'] = ['webp', 'jpg']
+    app.config['RESIZE_CACHE_FOLDER'] = os.environ.get(
+        'RESIZE_CACHE_FOLDER', os.path.join(app.instance_path, 'resize_cache')
+    )
+    app.config['RESIZE_CACHE_MAX_BYTES'] = int(os.environ.get('RESIZE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    # 访问统计写缓冲：开启后访问记录批量写入数据库
+    app.config['ANALYTICS_BUFFERED'] = os.environ.get('ANALYTICS_BUFFERED', 'false').lower() == 'true'
+    app.config['ANALYTICS_QUEUE_SIZE'] = int(os.environ.get('ANALYTICS_QUEUE_SIZE', 10000))
+    app.config['ANALYTICS_BATCH_SIZE'] = int(os.environ.get('ANALYTICS_BATCH_SIZE', 500))
+    app.config['ANALYTICS_FLUSH_INTERVAL'] = float(os.environ.get('ANALYTICS_FLUSH_INTERVAL', 2.0))
+    # 图片处理任务：默认交给 image_worker.py，开启后在上传请求内直接处理
+    app.config['IMAGE_JOBS_INLINE'] = os.environ.get('IMAGE_JOBS_INLINE', 'false').lower() == 'true'
+    # 图片多宽度版本（用于 srcset）
+    app.config['IMAGE_VARIANT_WIDTHS'] = [
+        int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,960,1200,1920').split(',') if w.strip()
+    ]
+    # 原始访问记录保留天数（更早的记录只保留日汇总）
+    app.config['ANALYTICS_RETENTION_DAYS'] = int(os.environ.get('ANALYTICS_RETENTION_DAYS', 90))
+    # 翻译服务：google（默认）/ stub（本地测试，不访问网络）
+    app.config['TRANSLATOR_BACKEND'] = os.environ.get('TRANSLATOR_BACKEND', 'google').lower()
+    app.config['TRANSLATOR_WORKERS'] = int(os.environ.get('TRANSLATOR_WORKERS', 8))
+    app.config['TRANSLATE_BATCH_LIMIT'] = int(os.environ.get('TRANSLATE_BATCH_LIMIT', 200))
+    # 批量增删改接口一次最多的操作数
+    app.config['BULK_BATCH_LIMIT'] = int(os.environ.get('BULK_BATCH_LIMIT', 500))
     
     # 确保上传目录存在
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -25,8 +77,25 @@ def create_app():
     # 初始化扩展
     CORS(app)
     db.init_app(app)
+    init_engine(app, db)
+    stats_counters.register()
     jwt = JWTManager(app)
     
+    app.extensions['resize_cache'] = ResizeCache(
+        app.config['RESIZE_CACHE_FOLDER'], app.config['RESIZE_CACHE_MAX_BYTES']
+    )
+    
+    app.extensions['translator'] = create_translator(app.config['TRANSLATOR_BACKEND'])
+    app.extensions['storage'] = create_storage(app.config)
+    
+    if app.config['ANALYTICS_BUFFERED']:
+        app.extensions['pageview_buffer'] = PageViewBuffer(
+            app,
+            max_queue=app.config['ANALYTICS_QUEUE_SIZE'],
+            batch_size=app.config['ANALYTICS_BATCH_SIZE'],
+            flush_interval=app.config['ANALYTICS_FLUSH_INTERVAL']
+        )
+    
     # JWT 错误处理
     @jwt.invalid_token_loader
     def invalid_token_callback(error):
@@ -52,6 +121,8 @@ def create_app():
     from routes.analytics import analytics_bp
     from routes.gallery import gallery_bp
     from routes.utils import utils_bp
+    from routes.uploads import uploads_bp
+    from routes.bundle import bundle_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(jewelry_bp, url_prefix='/api/jewelry')
@@ -61,11 +132,21 @@ def create_app():
     app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
     app.register_blueprint(gallery_bp, url_prefix='/api/gallery')
     app.register_blueprint(utils_bp, url_prefix='/api/utils')
+    app.register_blueprint(uploads_bp, url_prefix='/api/uploads')
+    app.register_blueprint(bundle_bp, url_prefix='/api/bundle')
     
     # 静态文件服务
     @app.route('/uploads/<path:filename>')
     def serve_upload(filename):
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+        # 隐藏目录（如隔离目录 .quarantine）中的文件不对外提供
+        if filename.startswith('.'):
+            abort(404)
+        return send_upload(app.extensions['storage'], filename)
+    
+    # 按需缩放的图片
+    @app.route('/uploads/r/<int:width>/<filename>')
+    def serve_resized(width, filename):
+        return send_resized(width, filename)
     
     # 健康检查
     @app.route('/api/health')
@@ -83,33 +164,14 @@ def create_app():
         </svg>'''
         return svg, 200, {'Content-Type': 'image/svg+xml'}
     
-    # 初始化数据库
-    with app.app_context():
-        db.create_all()
-        
-        # 创建默认管理员
-        if not Admin.query.filter_by(username='admin').first():
-            admin = Admin(
-                username='admin',
-                password_hash=generate_password_hash('pearl2024')
-            )
-            db.session.add(admin)
-            db.session.commit()
-            print('默认管理员已创建: admin / pearl2024')
-        
-        # 创建默认页面
-        default_pages = ['home', 'about', 'contact']
-        for page_key in default_pages:
-            if not Page.query.filter_by(page_key=page_key).first():
-                page = Page(page_key=page_key, content='{}')
-                db.session.add(page)
-        db.session.commit()
-    
     return app
 
 
 if __name__ == '__main__':
     app = create_app()
+    # 开发环境启动时顺便执行迁移；生产环境由 db_migrate.py 在部署时执行一次
+    from db_migrate import upgrade
+    upgrade(app)
     print('=' * 50)
     print('安澜・拾光 API 服务器启动中...')
     print('地址: http://localhost:5000')
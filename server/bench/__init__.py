@@ -0,0 +1,31 @@
+"""基准测试
+
+生成测试数据（写入独立的 SQLite 文件，不影响 instance/database.sqlite）：
+
+    python -m bench.generate --jewelry 2000 --images-per-item 4 --gallery 200 --page-views 10000000
+
+运行场景并与基线对比（在进程内通过 WSGI 调用，不需要网络）：
+
+    python -m bench.run                       # 运行全部场景，有基线时对比
+    python -m bench.run --scenario track --scenario stats --requests 5000 --workers 4
+    python -m bench.run --save-baseline       # 将本次结果保存为基线
+
+均在 server 目录下执行。
+"""
+import os
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(BENCH_DIR)
+DATA_DIR = os.path.join(BENCH_DIR, 'data')
+DEFAULT_DB = os.path.join(DATA_DIR, 'bench.sqlite')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+
+def params_path(db_path):
+    """生成数据时使用的参数，与数据库文件放在一起"""
+    return f"{db_path}.json"
+
+
+def use_database(db_path):
+    """在导入 app 之前调用，指定数据库文件"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(db_path)}"
@@ -0,0 +1,248 @@
+"""生成基准测试数据
+
+    python -m bench.generate                                  # 默认规模
+    python -m bench.generate --page-views 20000000 --days 365 # 千万级访问记录
+    python -m bench.generate --reset --seed 7                 # 删除已有文件后重新生成
+
+数据写入独立的 SQLite 文件（默认 bench/data/bench.sqlite），先执行与正式环境
+相同的建表和迁移，再用 executemany 批量插入，最后重建全文索引、后台统计计数和
+访问日汇总。相同的参数和 --seed 生成相同的数据；参数保存在数据库文件旁的
+.json 文件中，bench.run 对比基线时据此判断两次测试的数据规模是否一致。
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bench import DEFAULT_DB, SERVER_DIR, params_path, use_database
+
+sys.path.append(SERVER_DIR)
+
+CATEGORIES = ['耳饰', '戒指', '项链', '手链', '胸针', '套装', '巴洛克', '设计师款']
+NAME_WORDS = ['珍珠', '海水', '淡水', '南洋', '金珠', '白珠', '巴洛克', '复古', '极光', '月光', '星辰', '晨露']
+NAME_WORDS_EN = ['Pearl', 'Akoya', 'Freshwater', 'South Sea', 'Golden', 'Baroque', 'Vintage', 'Aurora',
+                 'Moonlight', 'Starlight', 'Dew', 'Classic']
+# 前台页面路径（访问记录按 Zipf 分布集中在少数页面）
+SITE_PATHS = ['/', '/gallery', '/about', '/contact', '/brand', '/collections']
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) AppleWebKit/605.1.15 Version/17.0 Safari/605.1.15',
+]
+REFERRERS = [None, None, None, 'https://www.google.com/', 'https://www.xiaohongshu.com/', 'https://weibo.com/']
+VARIANT_WIDTHS = [320, 640, 960]
+# 与 SQLAlchemy 在 SQLite 中保存 DateTime 的格式相同
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def fake_key(rng):
+    """分目录存储键（ab/cd/<哈希>），文件本身不存在"""
+    digest = '%032x' % rng.getrandbits(128)
+    return digest, f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def image_row(rng, created_at):
+    """图片 / 展廊图片的公共字段"""
+    digest, prefix = fake_key(rng)
+    variants = [
+        {'width': width, 'height': width * 4 // 3, 'path': f"/uploads/{prefix}_{width}.webp"}
+        for width in VARIANT_WIDTHS
+    ]
+    return {
+        'filename': f"{prefix}.webp",
+        'original_name': f"IMG_{rng.randrange(10000):04d}.jpg",
+        'path': f"/uploads/{prefix}.webp",
+        'thumb_path': f"/uploads/{prefix}_thumb.webp",
+        'variants': json.dumps(variants),
+        'content_hash': None,
+        'status': 'ready',
+        'created_at': created_at,
+    }
+
+
+def generate_catalog(conn, rng, args, now):
+    """饰品、饰品图片和首页展廊图片"""
+    from models import Jewelry, Image, GalleryImage
+    from ordering import RANK_GAP
+
+    jewelry_rows = []
+    for i in range(args.jewelry):
+        words = rng.sample(range(len(NAME_WORDS)), 2)
+        categories = rng.sample(CATEGORIES, rng.choice((1, 1, 1, 2)))
+        jewelry_rows.append({
+            'id': i + 1,
+            'name': f"{NAME_WORDS[words[0]]}{NAME_WORDS[words[1]]}{CATEGORIES[i % len(CATEGORIES)]} {i + 1}",
+            'name_en': f"{NAME_WORDS_EN[words[0]]} {NAME_WORDS_EN[words[1]]} No.{i + 1}",
+            'category': ','.join(categories),
+            'description': f"{NAME_WORDS[words[1]]}系列，{rng.randint(6, 12)}mm 珍珠，手工镶嵌。",
+            'description_en': f"{NAME_WORDS_EN[words[1]]} series, {rng.randint(6, 12)}mm pearls, hand set.",
+            'order_index': (i + 1) * RANK_GAP,
+            'is_visible': rng.random() < 0.9,
+            'is_featured': rng.random() < 0.05,
+            'created_at': now,
+            'updated_at': now,
+        })
+    for start in range(0, len(jewelry_rows), args.batch_size):
+        conn.execute(Jewelry.__table__.insert(), jewelry_rows[start:start + args.batch_size])
+
+    image_rows = []
+    for jewelry_id in range(1, args.jewelry + 1):
+        for position in range(args.images_per_item):
+            image_rows.append({
+                **image_row(rng, now),
+                'jewelry_id': jewelry_id,
+                'description': None,
+                'description_en': None,
+                'order_index': (position + 1) * RANK_GAP,
+            })
+        if len(image_rows) >= args.batch_size:
+            conn.execute(Image.__table__.insert(), image_rows)
+            image_rows = []
+    if image_rows:
+        conn.execute(Image.__table__.insert(), image_rows)
+
+    gallery_rows = [
+        {
+            **image_row(rng, now),
+            'title': f"展廊 {i + 1}",
+            'title_en': f"Gallery {i + 1}",
+            'alt': f"pearl {i + 1}",
+            'order_index': (i + 1) * RANK_GAP,
+            'is_visible': rng.random() < 0.9,
+        }
+        for i in range(args.gallery)
+    ]
+    if gallery_rows:
+        conn.execute(GalleryImage.__table__.insert(), gallery_rows)
+
+
+def site_paths(args):
+    """前台页面和饰品详情页，按 Zipf 分布分配权重"""
+    paths = list(SITE_PATHS)
+    paths += [f"/jewelry/{i}" for i in range(1, min(args.jewelry, max(args.paths - len(paths), 0)) + 1)]
+    weights = [1 / (rank + 1) for rank in range(len(paths))]
+    return paths, weights
+
+
+def generate_page_views(conn, rng, args, now):
+    """按批插入访问记录，时间均匀分布在最近 --days 天内"""
+    paths, weights = site_paths(args)
+    visitors = [f"v{rng.getrandbits(64):016x}" for _ in range(args.visitors)]
+    span = args.days * 86400
+    start = now - timedelta(seconds=span)
+    sql = ("INSERT INTO page_views (page_path, visitor_id, ip_address, user_agent, referrer, created_at) "
+           "VALUES (?, ?, ?, ?, ?, ?)")
+
+    inserted = 0
+    started = time.monotonic()
+    while inserted < args.page_views:
+        count = min(args.batch_size, args.page_views - inserted)
+        batch_paths = rng.choices(paths, weights, k=count)
+        offsets = sorted(rng.random() * span for _ in range(count))
+        rows = [
+            (
+                path,
+                rng.choice(visitors),
+                f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                rng.choice(USER_AGENTS),
+                rng.choice(REFERRERS),
+                (start + timedelta(seconds=offset)).strftime(TIMESTAMP_FORMAT),
+            )
+            for path, offset in zip(batch_paths, offsets)
+        ]
+        conn.exec_driver_sql(sql, rows)
+        inserted += count
+        if inserted % (args.batch_size * 100) == 0 or inserted == args.page_views:
+            elapsed = time.monotonic() - started
+            print(f"  访问记录 {inserted}/{args.page_views}（{inserted / max(elapsed, 1e-9):.0f} 行/秒）")
+
+
+def finalize(app):
+    """重建全文索引、后台统计计数和访问日汇总"""
+    import analytics_rollup
+    import search
+    import stats_counters
+    from models import db
+    from sqlalchemy.exc import OperationalError
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            try:
+                with conn.begin_nested():
+                    search.create_index(conn)
+            except OperationalError as e:
+                print(f"无法创建全文索引，搜索将使用 LIKE 匹配: {e}")
+            stats_counters.reconcile(conn)
+        print("重建访问日汇总...")
+        analytics_rollup.rebuild()
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+        # 写回主文件，bench.run 复制数据库时不需要 -wal 文件
+        db.session.execute(db.text('PRAGMA wal_checkpoint(TRUNCATE)'))
+
+
+def generate(args):
+    if os.path.exists(args.db):
+        if not args.reset:
+            print(f"{args.db} 已存在，使用 --reset 重新生成")
+            return 1
+        for suffix in ('', '-wal', '-shm', '.json'):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+
+    use_database(args.db)
+    # 生成数据时不需要落盘同步，数据库损坏重新生成即可
+    os.environ.setdefault('SQLITE_SYNCHRONOUS', 'OFF')
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    from app import create_app
+    from db_migrate import upgrade
+    from models import db
+    app = create_app()
+    upgrade(app)
+    sys.stdout = stdout
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    started = time.monotonic()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            print(f"饰品 {args.jewelry}，每件 {args.images_per_item} 张图片，展廊 {args.gallery} 张")
+            generate_catalog(conn, rng, args, now)
+        with db.engine.begin() as conn:
+            print(f"访问记录 {args.page_views}（{args.days} 天，{args.visitors} 个访客）")
+            generate_page_views(conn, rng, args, now)
+    finalize(app)
+
+    params = {key: value for key, value in vars(args).items() if key not in ('db', 'reset', 'batch_size')}
+    params['generated_at'] = now.isoformat()
+    with open(params_path(args.db), 'w') as f:
+        json.dump(params, f, indent=2)
+    print(f"完成，用时 {time.monotonic() - started:.1f} 秒，数据库: {args.db}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成基准测试数据')
+    parser.add_argument('--db', default=DEFAULT_DB, help='SQLite 文件路径')
+    parser.add_argument('--jewelry', type=int, default=2000, help='饰品数量')
+    parser.add_argument('--images-per-item', type=int, default=4, help='每件饰品的图片数')
+    parser.add_argument('--gallery', type=int, default=200, help='首页展廊图片数量')
+    parser.add_argument('--page-views', type=int, default=1000000, help='访问记录数量')
+    parser.add_argument('--days', type=int, default=90, help='访问记录分布的天数')
+    parser.add_argument('--paths', type=int, default=500, help='被访问的不同页面数')
+    parser.add_argument('--visitors', type=int, default=50000, help='不同访客数量')
+    parser.add_argument('--batch-size', type=int, default=10000, help='每批插入的行数')
+    parser.add_argument('--seed', type=int, default=2024, help='随机数种子')
+    parser.add_argument('--reset', action='store_true', help='删除已有的数据库文件后重新生成')
+    args = parser.parse_args()
+    sys.exit(generate(args))
+
+
+if __name__ == '__main__':
+    main()
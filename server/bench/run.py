@@ -0,0 +1,233 @@
+"""运行基准测试场景
+
+    python -m bench.run                                   # 运行全部场景
+    python -m bench.run --scenario track --workers 8      # 只运行指定场景
+    python -m bench.run --save-baseline                   # 将结果保存为基线
+    python -m bench.run --no-cache                        # 每次请求前清空响应缓存
+
+每个场景启动 --workers 个进程（模拟多个 gunicorn worker），各自通过 Flask
+test_client 在进程内调用接口，不经过网络，也不需要启动服务。默认在数据库的
+临时副本上运行，track / upload 写入的数据不会留在生成的数据库中；upload 使用
+内存存储并在请求内处理图片（STORAGE_BACKEND=memory, IMAGE_JOBS_INLINE=true）。
+
+存在基线文件时逐个场景对比 p50 / p99 延迟和吞吐量，变化超过 --tolerance
+时视为退化，退出码为 1。
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from bench import DEFAULT_BASELINE, DEFAULT_DB, SERVER_DIR, params_path, use_database
+from bench.scenarios import SCENARIOS, WRITE_SCENARIOS, available, prepare
+
+sys.path.append(SERVER_DIR)
+
+# 与基线对比的指标: (名称, 越大越好)
+COMPARED_METRICS = [('p50_ms', False), ('p99_ms', False), ('throughput', True)]
+
+
+def percentile(values, p):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def worker(scenario, worker_id, count, args, results):
+    # 屏蔽启动信息和上传接口的调试输出
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        from app import create_app
+        import cache
+
+        app = create_app()
+        # 让异常直接抛出，计为错误
+        app.config['PROPAGATE_EXCEPTIONS'] = True
+        client = app.test_client()
+        ctx = prepare(client, worker_id, args.seed)
+        build = SCENARIOS[scenario][1]
+
+        for n in range(args.warmup):
+            method, path, options = build(ctx, n)
+            client.open(path, method=method, **options)
+
+        errors = 0
+        latencies = []
+        started = time.monotonic()
+        for n in range(args.warmup, args.warmup + count):
+            method, path, options = build(ctx, n)
+            if args.no_cache:
+                cache.clear()
+            request_started = time.perf_counter()
+            try:
+                res = client.open(path, method=method, **options)
+                if res.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - request_started)
+        results.put((worker_id, started, time.monotonic(), errors, latencies, None))
+    except Exception as e:
+        results.put((worker_id, 0, 0, 0, [], repr(e)))
+
+
+def run_scenario(scenario, args):
+    """在 --workers 个进程中运行一个场景，返回统计结果"""
+    counts = [args.requests // args.workers + (1 if i < args.requests % args.workers else 0)
+              for i in range(args.workers)]
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(scenario, i, count, args, results))
+        for i, count in enumerate(counts) if count
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    failures = [row[5] for row in collected if row[5]]
+    if failures:
+        raise RuntimeError(f"{scenario} 运行失败: {failures[0]}")
+
+    latencies = [latency for row in collected for latency in row[4]]
+    elapsed = max(row[2] for row in collected) - min(row[1] for row in collected)
+    return {
+        'requests': len(latencies),
+        'errors': sum(row[3] for row in collected),
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p90_ms': round(percentile(latencies, 0.9) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(max(latencies, default=0) * 1000, 2),
+    }
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance):
+    """与基线对比，返回退化的 (场景, 指标, 基线值, 当前值) 列表"""
+    regressions = []
+    print(f"\n与基线对比（容差 {tolerance:.0%}）:")
+    for scenario, result in results.items():
+        base = baseline['results'].get(scenario)
+        if not base:
+            print(f"  {scenario}: 基线中没有该场景")
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = base[metric], result[metric]
+            change = (new - old) / old if old else 0
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            if regressed:
+                regressions.append((scenario, metric, old, new))
+            changes.append(f"{metric} {old} -> {new} ({change:+.0%}){' !' if regressed else ''}")
+        print(f"  {scenario:<15} " + ', '.join(changes))
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'场景':<15}{'请求':>8}{'错误':>6}{'req/s':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)")
+    for scenario, r in results.items():
+        print(f"{scenario:<15}{r['requests']:>8}{r['errors']:>6}{r['throughput']:>10.1f}"
+              f"{r['p50_ms']:>9.2f}{r['p90_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['max_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='运行基准测试场景并与基线对比')
+    parser.add_argument('--db', default=DEFAULT_DB, help='bench.generate 生成的 SQLite 文件')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                        help='要运行的场景，可重复指定（默认全部）')
+    parser.add_argument('--requests', type=int, default=2000, help='每个场景的请求数（upload 为其 1/20）')
+    parser.add_argument('--workers', type=int, default=4, help='并发进程数')
+    parser.add_argument('--warmup', type=int, default=20, help='每个进程计时前的预热请求数')
+    parser.add_argument('--seed', type=int, default=2024, help='随机数种子')
+    parser.add_argument('--no-cache', action='store_true', help='每次请求前清空响应缓存')
+    parser.add_argument('--in-place', action='store_true', help='直接在 --db 上运行，不复制数据库')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果写入基线文件')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许的相对变化（0.2 即 20%%）')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"{args.db} 不存在，先执行 python -m bench.generate")
+        return 1
+    params = load_json(params_path(args.db)) or {}
+
+    scenarios = args.scenario or available()
+    # 只读场景在前，避免读到写入场景新增的数据
+    scenarios = sorted(dict.fromkeys(scenarios), key=lambda name: name in WRITE_SCENARIOS)
+
+    temp_dir = None
+    db_path = args.db
+    if not args.in_place:
+        temp_dir = tempfile.mkdtemp(prefix='pearl-bench-')
+        db_path = os.path.join(temp_dir, 'bench.sqlite')
+        for suffix in ('', '-wal'):
+            if os.path.exists(args.db + suffix):
+                shutil.copyfile(args.db + suffix, db_path + suffix)
+    use_database(db_path)
+    os.environ['STORAGE_BACKEND'] = 'memory'
+    os.environ['IMAGE_JOBS_INLINE'] = 'true'
+    os.environ['ANALYTICS_BUFFERED'] = 'false'
+
+    print(f"数据: {json.dumps({k: v for k, v in params.items() if k != 'generated_at'}, ensure_ascii=False)}")
+    print(f"{args.workers} 个进程，每个场景 {args.requests} 次请求，"
+          f"响应缓存{'关闭' if args.no_cache else '开启'}")
+
+    results = {}
+    try:
+        for scenario in scenarios:
+            print(f"运行 {scenario}（{SCENARIOS[scenario][0]}）...")
+            scenario_args = argparse.Namespace(**vars(args))
+            if scenario == 'upload':
+                scenario_args.requests = max(args.workers, args.requests // 20)
+                scenario_args.warmup = min(args.warmup, 2)
+            results[scenario] = run_scenario(scenario, scenario_args)
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    print_results(results)
+
+    settings = {'workers': args.workers, 'requests': args.requests, 'no_cache': args.no_cache}
+    status = 0
+    baseline = load_json(args.baseline)
+    if baseline and not args.save_baseline:
+        if {k: v for k, v in baseline.get('params', {}).items() if k != 'generated_at'} != \
+                {k: v for k, v in params.items() if k != 'generated_at'}:
+            print("\n注意: 基线使用的数据规模不同，对比结果仅供参考")
+        if baseline.get('settings') != settings:
+            print(f"注意: 基线的运行参数不同: {baseline.get('settings')}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} 项指标退化")
+            status = 1
+        else:
+            print("\n没有超过容差的退化")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'machine': f"{platform.node()} {platform.machine()} Python {platform.python_version()}",
+                'params': params,
+                'settings': settings,
+                'results': results,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n基线已保存: {args.baseline}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
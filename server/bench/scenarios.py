@@ -0,0 +1,134 @@
+"""基准测试场景
+
+每个场景由 (说明, 构造请求的函数) 组成。函数接收 worker 的上下文和请求序号，
+返回 (method, path, test_client 参数)，只有发出请求的时间计入延迟，
+构造请求（例如生成上传的图片）的时间不计入。
+
+上下文由 prepare() 在每个 worker 中创建一次：登录得到的认证头、可见饰品 id、
+搜索关键词等。
+"""
+import io
+import random
+
+from bench.generate import CATEGORIES, NAME_WORDS, NAME_WORDS_EN
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+# 上传场景生成的图片尺寸
+UPLOAD_SIZE = (1600, 1200)
+
+
+def prepare(client, worker_id, seed):
+    """创建 worker 的上下文"""
+    from models import db, Jewelry
+
+    res = client.post('/api/auth/login', json={'username': 'admin', 'password': 'pearl2024'})
+    token = (res.get_json() or {}).get('token')
+    rng = random.Random(f"{seed}-{worker_id}")
+    with client.application.app_context():
+        jewelry_ids = [row.id for row in db.session.query(Jewelry.id).filter_by(is_visible=True)]
+        db.session.remove()
+    return {
+        'worker_id': worker_id,
+        'rng': rng,
+        'headers': {'Authorization': f"Bearer {token}"},
+        'jewelry_ids': jewelry_ids or [1],
+        'search_terms': NAME_WORDS + NAME_WORDS_EN + ['mm 珍珠', 'hand set'],
+    }
+
+
+def jewelry_list(ctx, n):
+    # 与前台一致：按分类浏览第一页，以及不带分类的全部列表
+    categories = CATEGORIES + [None]
+    category = categories[n % len(categories)]
+    params = {'cursor': '', 'limit': 20, 'fields': 'id,name,name_en,category,cover'}
+    if category:
+        params['category'] = category
+    return 'GET', '/api/jewelry', {'query_string': params}
+
+
+def jewelry_detail(ctx, n):
+    return 'GET', f"/api/jewelry/{ctx['rng'].choice(ctx['jewelry_ids'])}", {}
+
+
+def gallery(ctx, n):
+    return 'GET', '/api/gallery', {'query_string': {'visible': 'true'}}
+
+
+def page(ctx, n):
+    return 'GET', f"/api/pages/{('home', 'about', 'contact')[n % 3]}", {}
+
+
+def bundle(ctx, n):
+    return 'GET', '/api/bundle/home', {}
+
+
+def search(ctx, n):
+    return 'GET', '/api/jewelry/search', {'query_string': {'q': ctx['rng'].choice(ctx['search_terms'])}}
+
+
+def track(ctx, n):
+    rng = ctx['rng']
+    return 'POST', '/api/analytics/track', {'json': {
+        'path': rng.choice(('/', '/gallery', '/about', f"/jewelry/{rng.choice(ctx['jewelry_ids'])}")),
+        'visitor_id': f"bench-{ctx['worker_id']}-{rng.randrange(5000)}",
+    }}
+
+
+def stats(ctx, n):
+    return 'GET', '/api/analytics/stats', {'headers': ctx['headers']}
+
+
+def admin_stats(ctx, n):
+    return 'GET', '/api/admin/stats', {'headers': ctx['headers']}
+
+
+def _jpeg(rng):
+    """内容各不相同的 JPEG（相同内容的上传会复用已有文件，不再处理）"""
+    color = tuple(rng.randrange(256) for _ in range(3))
+    image = PILImage.new('RGB', UPLOAD_SIZE, color)
+    # 加入噪点，使压缩后的大小接近照片
+    image.paste(PILImage.effect_noise((UPLOAD_SIZE[0] // 4, UPLOAD_SIZE[1] // 4), 64).convert('RGB'))
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=90)
+    return out.getvalue()
+
+
+def upload(ctx, n):
+    # wait=true：在请求内完成压缩、缩略图和多宽度版本
+    data = _jpeg(ctx['rng'])
+    return 'POST', '/api/upload', {
+        'headers': ctx['headers'],
+        'content_type': 'multipart/form-data',
+        'data': {
+            'images': (io.BytesIO(data), f"bench-{ctx['worker_id']}-{n}.jpg"),
+            'jewelry_id': str(ctx['rng'].choice(ctx['jewelry_ids'])),
+            'wait': 'true',
+        },
+    }
+
+
+# 名称 -> (说明, 构造请求的函数)
+SCENARIOS = {
+    'jewelry_list': ('饰品列表（按分类游标分页）', jewelry_list),
+    'jewelry_detail': ('饰品详情', jewelry_detail),
+    'gallery': ('首页展廊', gallery),
+    'page': ('页面内容', page),
+    'bundle': ('首页合并接口', bundle),
+    'search': ('饰品搜索', search),
+    'track': ('记录访问', track),
+    'stats': ('访问统计（后台）', stats),
+    'admin_stats': ('后台统计计数', admin_stats),
+    'upload': ('上传并处理图片', upload),
+}
+
+# 修改数据的场景，排在只读场景之后运行
+WRITE_SCENARIOS = {'track', 'upload'}
+
+
+def available():
+    """当前环境可以运行的场景"""
+    return [name for name in SCENARIOS if name != 'upload' or PILImage is not None]
@@ -0,0 +1,83 @@
+"""worker 启动耗时基准测试
+
+在新的 Python 进程中多次执行 create_app()，对比：
+  current  当前启动流程（只导入路由并初始化扩展）
+  legacy   旧启动流程：每个 worker 都导入 Pillow / deep_translator，
+           并执行建表、查询默认管理员和默认页面
+
+    python bench_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 在子进程中执行，输出各阶段耗时（毫秒）
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+if sys.argv[1] == 'legacy':
+    from PIL import Image, ImageOps
+    import deep_translator
+app = create_app()
+created = time.perf_counter()
+if sys.argv[1] == 'legacy':
+    from db_migrate import seed
+    from models import db
+    with app.app_context():
+        db.create_all()
+        seed()
+finished = time.perf_counter()
+sys.stderr.write(json.dumps({
+    'import': (imported - started) * 1000,
+    'create_app': (created - imported) * 1000,
+    'schema': (finished - created) * 1000,
+    'total': (finished - started) * 1000
+}) + '\n')
+'''
+
+
+def run_probe(mode, env):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, mode],
+        cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stderr.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='worker 启动耗时基准测试')
+    parser.add_argument('--runs', type=int, default=10, help='每种模式运行的次数')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp(prefix='pearl-startup-')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(temp_dir, 'bench.sqlite')}")
+    try:
+        # 先建好数据库，两种模式都在已初始化的数据库上启动
+        subprocess.run([sys.executable, 'db_migrate.py', 'upgrade'], cwd=SERVER_DIR, env=env,
+                       capture_output=True, check=True)
+
+        print(f"{'mode':<8} {'import':>9} {'create_app':>11} {'schema':>9} {'total':>9}  (median ms, {args.runs} runs)")
+        medians = {}
+        for mode in ('legacy', 'current'):
+            samples = [run_probe(mode, env) for _ in range(args.runs)]
+            medians[mode] = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+            m = medians[mode]
+            print(f"{mode:<8} {m['import']:>9.1f} {m['create_app']:>11.1f} {m['schema']:>9.1f} {m['total']:>9.1f}")
+
+        saved = medians['legacy']['total'] - medians['current']['total']
+        print(f"每个 worker 启动节省 {saved:.1f}ms ({saved / medians['legacy']['total'] * 100:.0f}%)")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
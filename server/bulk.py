@@ -0,0 +1,238 @@
+"""饰品 / 图片批量操作
+
+一个请求中的所有操作在同一事务中执行：先校验全部操作，任一无效时不修改任何数据，
+返回每个操作的结果；全部有效时一次 flush 写入，由 SQLAlchemy 合并为批量 INSERT /
+UPDATE / DELETE。写入仍经过 ORM，统计计数事件和全文索引与单条接口保持一致。
+
+操作格式: {op: 'create' | 'update' | 'delete', id, data}
+"""
+from sqlalchemy.orm import selectinload
+
+from models import db, Jewelry, Image
+from image_store import legacy_files, release
+from ordering import RANK_GAP, next_rank
+import search
+
+# 字段名 -> 类型，None 表示允许为空
+JEWELRY_FIELDS = {
+    'name': str,
+    'name_en': (str, None),
+    'category': (str, None),
+    'description': (str, None),
+    'description_en': (str, None),
+    'order_index': int,
+    'is_visible': bool,
+    'is_featured': bool,
+}
+
+# 与 POST /api/jewelry 的默认值相同（未指定 order_index 时追加到列表末尾）
+JEWELRY_DEFAULTS = {
+    'name_en': '',
+    'category': '耳饰',
+    'description': '',
+    'description_en': '',
+    'is_visible': True,
+    'is_featured': False,
+}
+
+IMAGE_FIELDS = {
+    'jewelry_id': (int, None),
+    'order_index': int,
+    'description': (str, None),
+    'description_en': (str, None),
+}
+
+
+class BatchError(ValueError):
+    """存在无效操作，results 为每个操作的校验结果"""
+
+    def __init__(self, message, results):
+        super().__init__(message)
+        self.results = results
+
+
+def _check_type(value, expected):
+    expected = expected if isinstance(expected, tuple) else (expected,)
+    if value is None:
+        return None in expected
+    for kind in expected:
+        if kind is None:
+            continue
+        # bool 是 int 的子类，需要单独区分
+        if kind is int and isinstance(value, bool):
+            continue
+        if isinstance(value, kind):
+            return True
+    return False
+
+
+def _validate_data(data, fields):
+    """返回错误信息，数据有效时返回 None"""
+    if not isinstance(data, dict):
+        return 'data 必须是对象'
+    for key, value in data.items():
+        if key in fields and not _check_type(value, fields[key]):
+            return f'字段 {key} 的类型无效'
+    return None
+
+
+def _check_operations(operations, allowed, limit):
+    if not isinstance(operations, list) or not operations:
+        raise ValueError('operations 必须是非空数组')
+    if len(operations) > limit:
+        raise ValueError(f'一次最多提交 {limit} 个操作')
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get('op') not in allowed:
+            raise ValueError(f"op 必须是 {' / '.join(allowed)}")
+
+
+def _target_ids(operations):
+    return {
+        operation.get('id') for operation in operations
+        if operation['op'] in ('update', 'delete') and isinstance(operation.get('id'), int)
+    }
+
+
+def _validate(operations, existing, fields, extra_check=None):
+    """校验全部操作，返回 (每个操作的错误信息或 None)"""
+    deleted = set()
+    errors = []
+    for operation in operations:
+        op = operation['op']
+        data = operation.get('data') or {}
+        error = None
+        if op != 'create':
+            target_id = operation.get('id')
+            if target_id not in existing:
+                error = f'记录不存在: {target_id}'
+            elif target_id in deleted:
+                error = f'记录已在本批次中删除: {target_id}'
+            elif op == 'delete':
+                deleted.add(target_id)
+        if error is None and op != 'delete':
+            error = _validate_data(data, fields)
+        if error is None and extra_check:
+            error = extra_check(op, data)
+        errors.append(error)
+    return errors
+
+
+def _raise_if_invalid(operations, errors):
+    if not any(errors):
+        return
+    results = [
+        {'index': i, 'op': operation['op'], 'id': operation.get('id'),
+         'status': 'error' if error else 'skipped', **({'message': error} if error else {})}
+        for i, (operation, error) in enumerate(zip(operations, errors))
+    ]
+    raise BatchError(f'{sum(1 for error in errors if error)} 个操作无效，未做任何修改', results)
+
+
+def _assign(target, data, fields):
+    for key in fields:
+        if key in data:
+            setattr(target, key, data[key])
+
+
+def apply_jewelry(operations, limit):
+    """在当前事务中执行饰品批量操作，返回每个操作的结果（由调用方提交）"""
+    _check_operations(operations, ('create', 'update', 'delete'), limit)
+
+    def require_name(op, data):
+        if op == 'create' and not (data.get('name') or '').strip():
+            return '缺少饰品名称'
+        return None
+
+    # 删除饰品时需要解除图片的关联，一并预加载
+    existing = {
+        jewelry.id: jewelry
+        for jewelry in Jewelry.query.options(selectinload(Jewelry.images)).filter(
+            Jewelry.id.in_(_target_ids(operations))
+        )
+    }
+    _raise_if_invalid(operations, _validate(operations, existing, JEWELRY_FIELDS, require_name))
+
+    targets = []
+    indexed = {}
+    removed = []
+    rank = next_rank(Jewelry)
+    for operation in operations:
+        op = operation['op']
+        data = operation.get('data') or {}
+        if op == 'create':
+            jewelry = Jewelry(**{
+                **JEWELRY_DEFAULTS, 'order_index': rank,
+                **{key: data[key] for key in JEWELRY_FIELDS if key in data}
+            })
+            rank = max(rank, jewelry.order_index) + RANK_GAP
+            db.session.add(jewelry)
+            indexed[id(jewelry)] = jewelry
+        elif op == 'update':
+            jewelry = existing[operation['id']]
+            _assign(jewelry, data, JEWELRY_FIELDS)
+            indexed[id(jewelry)] = jewelry
+        else:
+            jewelry = existing[operation['id']]
+            db.session.delete(jewelry)
+            indexed.pop(id(jewelry), None)
+            removed.append(jewelry.id)
+        targets.append(jewelry)
+
+    db.session.flush()
+    search.remove_many(removed)
+    search.index_many(list(indexed.values()))
+
+    return [
+        {'index': i, 'op': operation['op'], 'id': jewelry.id, 'status': 'ok',
+         **({'item': jewelry.to_dict(include_images=False)} if operation['op'] != 'delete' else {})}
+        for i, (operation, jewelry) in enumerate(zip(operations, targets))
+    ]
+
+
+def apply_images(operations, limit):
+    """在当前事务中执行图片批量更新 / 删除（图片通过上传接口创建）
+
+    返回 (每个操作的结果, 提交后需要删除的文件)。
+    """
+    _check_operations(operations, ('update', 'delete'), limit)
+
+    existing = {image.id: image for image in Image.query.filter(Image.id.in_(_target_ids(operations)))}
+    jewelry_ids = {
+        (operation.get('data') or {}).get('jewelry_id') for operation in operations
+        if isinstance(operation.get('data'), dict)
+    } - {None}
+    found_jewelry = {
+        row.id for row in db.session.query(Jewelry.id).filter(
+            Jewelry.id.in_([i for i in jewelry_ids if isinstance(i, int) and not isinstance(i, bool)])
+        )
+    }
+
+    def require_jewelry(op, data):
+        jewelry_id = data.get('jewelry_id')
+        if jewelry_id and jewelry_id not in found_jewelry:
+            return f'饰品不存在: {jewelry_id}'
+        return None
+
+    _raise_if_invalid(operations, _validate(operations, existing, IMAGE_FIELDS, require_jewelry))
+
+    files = []
+    results = []
+    for i, operation in enumerate(operations):
+        image = existing[operation['id']]
+        result = {'index': i, 'op': operation['op'], 'id': image.id, 'status': 'ok'}
+        if operation['op'] == 'update':
+            data = dict(operation.get('data') or {})
+            if 'jewelry_id' in data:
+                data['jewelry_id'] = data['jewelry_id'] or None
+            _assign(image, data, IMAGE_FIELDS)
+            result['item'] = image
+        else:
+            files.extend(release(image.content_hash) if image.content_hash else legacy_files(image))
+            db.session.delete(image)
+        results.append(result)
+
+    db.session.flush()
+    for result in results:
+        if 'item' in result:
+            result['item'] = result['item'].to_dict()
+    return results, files
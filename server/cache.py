@@ -0,0 +1,106 @@
+"""公开只读接口的响应缓存
+
+缓存按路由和查询参数保存序列化后的响应体及强 ETag。
+管理端写入时通过 invalidate() 将 counters 表中的内容版本号改为新的随机值，
+各 gunicorn worker 每次请求都会读取该版本号，因此编辑后不会返回旧数据。
+版本号不递增：从备份恢复数据库或切换到另一个数据库后，不会与进程内缓存中
+其他数据库内容的版本号重复。
+"""
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, request
+
+from models import db, Counter
+
+CONTENT_GENERATION = 'content_generation'
+MAX_ENTRIES = 256
+
+_entries = OrderedDict()  # key -> (generation, etag, body, mimetype)
+_lock = threading.Lock()
+
+
+def current_generation():
+    """读取当前内容版本号"""
+    counter = db.session.get(Counter, CONTENT_GENERATION)
+    return counter.value if counter else 0
+
+
+def new_generation():
+    return secrets.randbits(48)
+
+
+def init_generation(connection):
+    """为数据库生成初始内容版本号（用于数据库迁移，已存在时保留）"""
+    table = Counter.__table__
+    exists = connection.execute(
+        db.select(table.c.key).where(table.c.key == CONTENT_GENERATION)
+    ).first()
+    if exists is None:
+        connection.execute(table.insert().values(key=CONTENT_GENERATION, value=new_generation()))
+
+
+def invalidate():
+    """更换内容版本号（随调用方的事务一起提交）"""
+    generation = new_generation()
+    updated = Counter.query.filter_by(key=CONTENT_GENERATION).update({Counter.value: generation})
+    if not updated:
+        db.session.add(Counter(key=CONTENT_GENERATION, value=generation))
+
+
+def clear():
+    """清空本进程内的缓存"""
+    with _lock:
+        _entries.clear()
+
+
+def _cache_key():
+    args = sorted(request.args.items(multi=True))
+    return f"{request.path}?{urlencode(args)}"
+
+
+def _get(key, generation):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or entry[0] != generation:
+            return None
+        _entries.move_to_end(key)
+        return entry
+
+
+def _put(key, entry):
+    with _lock:
+        _entries[key] = entry
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def cached_response(view):
+    """为公开 GET 接口缓存响应，并支持 If-None-Match 返回 304"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        generation = current_generation()
+        key = _cache_key()
+        entry = _get(key, generation)
+        
+        if entry is None:
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            etag = f"{generation}-{hashlib.sha1(body).hexdigest()[:16]}"
+            entry = (generation, etag, body, response.mimetype)
+            _put(key, entry)
+        
+        _, etag, body, mimetype = entry
+        response = current_app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    
+    return wrapper
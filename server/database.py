@@ -0,0 +1,84 @@
+"""数据库连接配置
+
+连接地址由 DATABASE_URL 指定，默认使用 instance 目录下的 SQLite 文件。
+只支持 SQLite：访问统计汇总的 upsert、FTS5 全文搜索、翻译缓存和按 rowid
+分批清理都使用 SQLite 专有的语法，其他数据库的地址在启动时拒绝。
+SQLite 连接建立时设置 WAL 等 PRAGMA：WAL 模式下读不阻塞写、写不阻塞读，
+多个 gunicorn worker 同时写入时由 busy_timeout 排队等待，而不是立即返回
+"database is locked"。
+"""
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+DEFAULT_DATABASE_URL = 'sqlite:///database.sqlite'
+
+
+def load_config(app):
+    """从环境变量读取数据库相关配置"""
+    uri = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+    if not is_sqlite(uri):
+        raise ValueError(f"不支持的数据库: {make_url(uri).get_backend_name()}（DATABASE_URL 只能使用 sqlite）")
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    # SQLite PRAGMA
+    app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL').upper()
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # 毫秒
+    app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE', -20000))  # 负数单位为 KB
+    app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    # 连接池（SQLite 文件数据库）
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def engine_options(config):
+    """返回连接池参数"""
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if make_url(uri).database in (None, '', ':memory:'):
+        # 内存数据库由 Flask-SQLAlchemy 使用 StaticPool 共享同一连接
+        return {}
+    # SQLite 文件连接建立成本低，但保留连接可复用页缓存和 mmap；
+    # 线程数可能多于连接数，等待连接的时间与 busy_timeout 保持一致
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': max(1, config['SQLITE_BUSY_TIMEOUT'] // 1000),
+        'connect_args': {
+            'timeout': config['SQLITE_BUSY_TIMEOUT'] / 1000,
+            'check_same_thread': False
+        }
+    }
+
+
+def sqlite_pragmas(config):
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={config['SQLITE_BUSY_TIMEOUT']}",
+        f"PRAGMA cache_size={config['SQLITE_CACHE_SIZE']}",
+        f"PRAGMA mmap_size={config['SQLITE_MMAP_SIZE']}",
+        "PRAGMA temp_store=MEMORY"
+    ]
+
+
+def init_engine(app, db):
+    """为 SQLite 连接注册 PRAGMA 设置（需在 db.init_app 之后调用）"""
+    pragmas = sqlite_pragmas(app.config)
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
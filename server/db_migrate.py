@@ -0,0 +1,180 @@
+"""数据库迁移
+
+部署时执行一次（不在每个 gunicorn worker 启动时执行）：
+
+    python db_migrate.py upgrade    # 建表、执行未执行的迁移、写入默认数据
+    python db_migrate.py status     # 查看迁移状态
+
+新表由 db.create_all() 创建；已有表的结构变化（加列、加索引等）
+在 MIGRATIONS 末尾追加新版本，已执行的版本记录在 schema_migrations 表中。
+迁移需要兼容全新数据库（create_all 已按最新模型建好的表）。
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from models import db, Admin, Page, SchemaMigration
+from ordering import spread_ranks
+import analytics_rollup
+import cache
+import search
+import stats_counters
+
+DEFAULT_PAGES = ['home', 'about', 'contact']
+
+
+def add_column(conn, table, column, ddl):
+    """添加列（表不存在或列已存在时跳过）"""
+    inspector = inspect(conn)
+    if not inspector.has_table(table):
+        return
+    if column in {col['name'] for col in inspector.get_columns(table)}:
+        return
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def create_index(conn, name, table, columns):
+    conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def _add_thumb_path(conn):
+    for table in ('images', 'gallery_images'):
+        add_column(conn, table, 'thumb_path', 'TEXT')
+
+
+def _add_image_processing_columns(conn):
+    for table in ('images', 'gallery_images'):
+        add_column(conn, table, 'status', "VARCHAR(20) DEFAULT 'ready'")
+        add_column(conn, table, 'variants', 'TEXT')
+        add_column(conn, table, 'content_hash', 'VARCHAR(64)')
+        create_index(conn, f'ix_{table}_content_hash', table, 'content_hash')
+
+
+def _add_page_view_indexes(conn):
+    create_index(conn, 'ix_page_views_created_at', 'page_views', 'created_at')
+    create_index(conn, 'ix_page_views_page_path_created_at', 'page_views', 'page_path, created_at')
+    create_index(conn, 'ix_page_views_visitor_id_created_at', 'page_views', 'visitor_id, created_at')
+
+
+def _spread_order_index(conn):
+    spread_ranks(conn, 'gallery_images')
+    spread_ranks(conn, 'jewelry')
+    spread_ranks(conn, 'images', 'jewelry_id')
+
+
+def _add_pagination_indexes(conn):
+    create_index(conn, 'ix_jewelry_order_index_id', 'jewelry', 'order_index, id')
+    create_index(conn, 'ix_images_created_at_id', 'images', 'created_at, id')
+
+
+def _create_search_index(conn):
+    try:
+        with conn.begin_nested():
+            search.create_index(conn)
+    except OperationalError as e:
+        # SQLite 未编译 FTS5 时搜索退回 LIKE 匹配
+        print(f"无法创建全文索引，搜索将使用 LIKE 匹配: {e}")
+
+
+def _init_stats_counters(conn):
+    stats_counters.reconcile(conn)
+
+
+def _add_asset_original(conn):
+    add_column(conn, 'image_assets', 'original', 'VARCHAR(255)')
+
+
+def _rebuild_analytics_rollups(conn):
+    # 统计接口只读取日汇总表，升级前的访问记录需要先汇总
+    analytics_rollup.rebuild(connection=conn)
+
+
+def _init_content_generation(conn):
+    cache.init_generation(conn)
+
+
+# (版本, 说明, 迁移函数)，只能在末尾追加
+MIGRATIONS = [
+    (1, '图片表添加 thumb_path 列', _add_thumb_path),
+    (2, '图片表添加 status / variants / content_hash 列', _add_image_processing_columns),
+    (3, '访问记录表添加索引', _add_page_view_indexes),
+    (4, '排序字段改为稀疏排序键', _spread_order_index),
+    (5, '添加游标分页索引', _add_pagination_indexes),
+    (6, '创建饰品全文索引', _create_search_index),
+    (7, '初始化后台统计计数', _init_stats_counters),
+    (8, '图片文件表添加 original 列', _add_asset_original),
+    (9, '根据访问记录生成日汇总', _rebuild_analytics_rollups),
+    (10, '生成随机的内容版本号', _init_content_generation),
+]
+
+
+def applied_versions():
+    return {row.version for row in SchemaMigration.query.all()}
+
+
+def seed():
+    """创建默认管理员和默认页面"""
+    if not Admin.query.filter_by(username='admin').first():
+        admin = Admin(
+            username='admin',
+            password_hash=generate_password_hash('pearl2024')
+        )
+        db.session.add(admin)
+        print('默认管理员已创建: admin / pearl2024')
+
+    for page_key in DEFAULT_PAGES:
+        if not Page.query.filter_by(page_key=page_key).first():
+            db.session.add(Page(page_key=page_key, content='{}'))
+    db.session.commit()
+
+
+def upgrade(app):
+    """建表、按顺序执行未执行的迁移并写入默认数据"""
+    with app.app_context():
+        db.create_all()
+        done = applied_versions()
+        for version, description, migrate in MIGRATIONS:
+            if version in done:
+                continue
+            # 每个迁移与其版本记录在同一事务中提交
+            with db.engine.begin() as conn:
+                migrate(conn)
+                conn.execute(SchemaMigration.__table__.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()
+                ))
+            print(f"已执行迁移 {version}: {description}")
+        seed()
+
+
+def status(app):
+    with app.app_context():
+        if not inspect(db.engine).has_table(SchemaMigration.__tablename__):
+            done = set()
+        else:
+            done = applied_versions()
+        for version, description, _ in MIGRATIONS:
+            print(f"{'[x]' if version in done else '[ ]'} {version}: {description}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据库迁移')
+    parser.add_argument('command', nargs='?', default='upgrade', choices=['upgrade', 'status'])
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.command == 'status':
+        status(app)
+    else:
+        upgrade(app)
+        print("数据库升级完成！")
+
+
+if __name__ == '__main__':
+    main()
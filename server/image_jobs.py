@@ -0,0 +1,181 @@
+import json
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, Image, GalleryImage, ImageAsset, ImageJob
+from cache import invalidate
+from image_pipeline import process_image
+from storage import current_storage, url_for_key
+
+# 引用同一图片文件的记录，处理完成后一并更新
+ASSET_USERS = (Image, GalleryImage)
+
+# 处理中的任务超过该时间未完成，视为 worker 已退出，可被重新领取
+LOCK_TIMEOUT = timedelta(minutes=10)
+# 失败重试的基础间隔（秒），按尝试次数指数递增
+RETRY_DELAY = 30
+
+
+def enqueue(asset, filename):
+    """为新上传的图片文件创建处理任务（随调用方事务提交，asset 需已 flush）"""
+    job = ImageJob(kind='asset', target_id=asset.id, filename=filename)
+    db.session.add(job)
+    return job
+
+
+def _stale(now):
+    return db.and_(ImageJob.status == 'running', ImageJob.locked_at < now - LOCK_TIMEOUT)
+
+
+def _claimable(now):
+    return db.or_(
+        db.and_(ImageJob.status == 'queued', ImageJob.run_after <= now),
+        db.and_(_stale(now), ImageJob.attempts < ImageJob.max_attempts)
+    )
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _fail_asset(asset_id):
+    """任务不再重试：图片标记为处理失败（不提交）"""
+    asset = db.session.get(ImageAsset, asset_id)
+    if asset is not None:
+        asset.status = 'failed'
+        update_asset_users(asset)
+    invalidate()
+
+
+def fail_exhausted(now=None):
+    """处理超时且已用完重试次数的任务标记为失败，不再领取
+
+    例如超大图片导致 worker 进程被 OOM 终止，重新领取只会再次终止 worker。
+    """
+    now = now or datetime.utcnow()
+    exhausted = db.and_(_stale(now), ImageJob.attempts >= ImageJob.max_attempts)
+    for job_id, asset_id in db.session.query(ImageJob.id, ImageJob.target_id).filter(exhausted).all():
+        # 条件更新，避免多个 worker 重复处理
+        updated = ImageJob.query.filter(ImageJob.id == job_id, exhausted).update({
+            ImageJob.status: 'failed',
+            ImageJob.last_error: '处理超时，worker 可能已退出'
+        }, synchronize_session=False)
+        if updated:
+            _fail_asset(asset_id)
+            print(f'图片处理任务 {job_id} 多次超时，已标记为失败')
+    db.session.commit()
+
+
+def claim_next():
+    """领取下一个待处理任务，没有任务时返回 None"""
+    fail_exhausted()
+    while True:
+        now = datetime.utcnow()
+        candidate = db.session.query(ImageJob.id).filter(_claimable(now)).order_by(ImageJob.id).first()
+        if candidate is None:
+            db.session.commit()
+            return None
+
+        # 条件更新保证同一任务只会被一个 worker 领取
+        claimed = ImageJob.query.filter(ImageJob.id == candidate.id, _claimable(now)).update({
+            ImageJob.status: 'running',
+            ImageJob.locked_at: now,
+            ImageJob.attempts: ImageJob.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return db.session.get(ImageJob, candidate.id)
+
+
+def run_job(job):
+    """执行图片处理任务，成功后原子地切换所有引用记录的 path / thumb_path"""
+    storage = current_storage()
+    asset = db.session.get(ImageAsset, job.target_id)
+
+    if asset is None:
+        # 图片已不再被引用，清理原始文件即可
+        storage.delete(job.filename)
+        job.status = 'done'
+        db.session.commit()
+        return True
+
+    try:
+        # 处理结果写在原图所在目录
+        with storage.workspace(job.filename) as filepath:
+            result = process_image(
+                filepath, widths=current_app.config['IMAGE_VARIANT_WIDTHS'], remove_original=False
+            )
+    except Exception as e:
+        job.last_error = str(e)
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            _fail_asset(job.target_id)
+        else:
+            job.status = 'queued'
+            job.run_after = datetime.utcnow() + _retry_delay(job.attempts)
+        db.session.commit()
+        print(f'图片处理任务 {job.id} 失败（第 {job.attempts} 次）: {e}')
+        return False
+
+    # Pillow 不可用时 result 为 None，继续使用原始文件
+    if result:
+        def url(name):
+            return url_for_key(storage.sibling(job.filename, name))
+        asset.filename = storage.sibling(job.filename, result['filename'])
+        asset.path = url(result['filename'])
+        asset.thumb_path = url(result['thumb'])
+        asset.variants = json.dumps([
+            {'width': v['width'], 'height': v['height'], 'path': url(v['file'])}
+            for v in result['variants']
+        ])
+        # 保留上传的原图，重新生成版本时从原图开始（WebP 原图会被同名主图覆盖）
+        asset.original = job.filename if asset.filename != job.filename else None
+    asset.status = 'ready'
+    update_asset_users(asset)
+    job.status = 'done'
+    job.last_error = None
+    invalidate()
+    db.session.commit()
+    return True
+
+
+def release(job_id, error):
+    """worker 执行任务时出现意外错误（如提交时数据库被锁），将任务放回队列
+
+    在新事务中执行；本身失败时任务保持 running，超过 LOCK_TIMEOUT 后重新领取。
+    """
+    db.session.rollback()
+    job = db.session.get(ImageJob, job_id)
+    if job is None or job.status != 'running':
+        return
+    job.last_error = str(error)
+    if job.attempts >= job.max_attempts:
+        job.status = 'failed'
+        _fail_asset(job.target_id)
+    else:
+        job.status = 'queued'
+        job.run_after = datetime.utcnow() + _retry_delay(job.attempts)
+    db.session.commit()
+
+
+def update_asset_users(asset):
+    """将图片文件信息同步到所有引用它的记录"""
+    for model in ASSET_USERS:
+        model.query.filter_by(content_hash=asset.content_hash).update({
+            model.filename: asset.filename,
+            model.path: asset.path,
+            model.thumb_path: asset.thumb_path,
+            model.variants: asset.variants,
+            model.status: asset.status
+        }, synchronize_session=False)
+
+
+def run_inline(jobs):
+    """在当前请求中直接执行任务（不经过 worker）"""
+    for job in jobs:
+        job.status = 'running'
+        job.locked_at = datetime.utcnow()
+        job.attempts = (job.attempts or 0) + 1
+        db.session.commit()
+        run_job(job)
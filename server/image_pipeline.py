@@ -0,0 +1,114 @@
+import os
+from importlib.util import find_spec
+
+# Pillow is optional - if not available, images won't be compressed
+# 只检查是否安装，真正的导入推迟到第一次处理图片时，加快 worker 启动
+PILLOW_AVAILABLE = find_spec('PIL') is not None
+if not PILLOW_AVAILABLE:
+    print("警告: Pillow未安装，图片将不会被压缩")
+
+DEFAULT_WIDTHS = (320, 640, 960, 1200, 1920)
+MAIN_SIZE = (1200, 1200)
+THUMB_SIZE = (400, 400)
+QUALITY = 85
+
+
+def _pillow():
+    """导入 Pillow（首次调用时加载）"""
+    from PIL import Image, ImageOps
+    return Image, ImageOps
+
+
+def _fit(size, box):
+    """按比例缩放到 box 内（不放大）"""
+    width, height = size
+    scale = min(box[0] / width, box[1] / height, 1)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _fit_width(size, target_width):
+    width, height = size
+    if target_width >= width:
+        return width, height
+    return target_width, max(1, round(height * target_width / width))
+
+
+def variant_name(name, width):
+    return f"{name}_w{width}.webp"
+
+
+def process_image(filepath, widths=DEFAULT_WIDTHS, main_size=MAIN_SIZE, thumb_size=THUMB_SIZE,
+                  quality=QUALITY, remove_original=True, name=None):
+    """解码一次，生成主图、缩略图和多宽度的 WebP 版本
+
+    所有输出按尺寸从大到小排列，每一级都从上一级的结果继续缩小，
+    不再为每个输出复制一份完整的原图。
+    name 为输出文件名前缀，默认取原图文件名。
+    返回 {'filename', 'thumb', 'variants'}；Pillow 不可用时返回 None，处理失败时抛出异常。
+    """
+    if not PILLOW_AVAILABLE:
+        return None
+    PILImage, ImageOps = _pillow()
+
+    base_dir = os.path.dirname(filepath)
+    name = name or os.path.splitext(os.path.basename(filepath))[0]
+    webp_name = f"{name}.webp"
+    thumb_name = f"thumb_{name}.webp"
+
+    with PILImage.open(filepath) as img:
+        # 原图已是无需旋转的 RGB WebP 时，同尺寸输出可直接沿用原图
+        reusable = img.format == 'WEBP' and img.mode == 'RGB' and img.getexif().get(0x0112, 1) == 1
+
+        # JPEG 可在解码阶段直接按比例缩小，减少解码开销
+        largest = max(max(widths, default=0), max(main_size))
+        img.draft('RGB', (largest, largest))
+
+        # 处理方向信息
+        img = ImageOps.exif_transpose(img)
+
+        # 转换为RGB
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        # 尺寸 -> 文件名；与主图或缩略图尺寸相同的版本直接复用对应文件
+        outputs = {_fit(img.size, main_size): webp_name}
+        thumb_name = outputs.setdefault(_fit(img.size, thumb_size), thumb_name)
+        variants = []
+        for width in sorted(set(widths)):
+            size = _fit_width(img.size, width)
+            if any(variant['width'] == size[0] for variant in variants):
+                continue
+            filename = outputs.setdefault(size, variant_name(name, size[0]))
+            variants.append({'width': size[0], 'height': size[1], 'file': filename})
+
+        current = img
+        for size in sorted(outputs, reverse=True):
+            if current.size != size:
+                current = current.resize(size, PILImage.Resampling.LANCZOS)
+            elif reusable and os.path.join(base_dir, outputs[size]) == filepath:
+                # 输出就是原图本身，无需重新编码
+                continue
+            current.save(os.path.join(base_dir, outputs[size]), 'WEBP', quality=quality, optimize=True)
+
+    # 如果原始文件不是WebP，且转换成功，可以删除原始文件
+    if remove_original and filepath != os.path.join(base_dir, webp_name):
+        os.remove(filepath)
+
+    return {'filename': webp_name, 'thumb': thumb_name, 'variants': variants}
+
+
+SAVE_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+
+
+def render_width(source, dest, width, fmt='webp', quality=QUALITY):
+    """将 source 缩放到指定宽度（不放大）并以 fmt 格式写入 dest"""
+    PILImage, ImageOps = _pillow()
+    with PILImage.open(source) as img:
+        img.draft('RGB', (width, width))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        size = _fit_width(img.size, width)
+        if img.size != size:
+            img = img.resize(size, PILImage.Resampling.LANCZOS)
+        img.save(dest, SAVE_FORMATS[fmt], quality=quality, optimize=True)
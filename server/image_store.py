@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import uuid
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Image, GalleryImage, ImageAsset
+from image_jobs import enqueue
+from storage import current_storage, key_from_url, url_for_key
+
+CHUNK_SIZE = 64 * 1024
+
+
+def save_upload(file, upload_folder):
+    """边写入临时文件边计算 SHA-256，返回 (哈希, 临时文件路径)"""
+    digest = hashlib.sha256()
+    temp_path = os.path.join(upload_folder, f"{uuid.uuid4().hex}.part")
+    with open(temp_path, 'wb') as out:
+        while True:
+            chunk = file.stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest(), temp_path
+
+
+def hash_file(filepath):
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def acquire(content_hash, temp_path, ext):
+    """获取内容对应的图片文件并增加引用计数
+
+    已存在相同内容时直接复用，丢弃临时文件；否则将临时文件作为原图保存，
+    并返回需要执行的处理任务。返回 (asset, job)，job 可能为 None。
+    """
+    storage = current_storage()
+    filename = storage.key_for(f"{content_hash[:32]}.{ext}")
+    created = False
+    asset = ImageAsset.query.filter_by(content_hash=content_hash).first()
+    if asset is None:
+        try:
+            with db.session.begin_nested():
+                asset = ImageAsset(content_hash=content_hash, filename=filename, path=url_for_key(filename))
+                db.session.add(asset)
+            created = True
+        except IntegrityError:
+            # 其他请求同时上传了相同内容
+            asset = ImageAsset.query.filter_by(content_hash=content_hash).one()
+
+    job = None
+    if created or asset.status == 'failed':
+        # 新内容或之前处理失败：以本次上传的文件作为原图（重新）处理
+        storage.put_file(filename, temp_path)
+        asset.filename = filename
+        asset.original = None
+        asset.path = asset.thumb_path = url_for_key(filename)
+        asset.variants = None
+        asset.status = 'processing'
+        db.session.flush()
+        job = enqueue(asset, filename)
+    else:
+        os.remove(temp_path)
+
+    asset.ref_count = ImageAsset.ref_count + 1
+    db.session.flush()
+    return asset, job
+
+
+def apply_asset(target, asset):
+    """将图片文件信息写入 Image / GalleryImage 记录"""
+    target.content_hash = asset.content_hash
+    target.filename = asset.filename
+    target.path = asset.path
+    target.thumb_path = asset.thumb_path
+    target.variants = asset.variants
+    target.status = asset.status
+
+
+def asset_files(asset):
+    """图片文件（ImageAsset 或未去重的旧图片记录）对应的所有存储键"""
+    paths = {asset.path, asset.thumb_path}
+    if asset.variants:
+        paths.update(variant['path'] for variant in json.loads(asset.variants))
+    keys = {key_from_url(path) for path in paths if path} | {asset.filename}
+    # 旧图片记录没有 original 列
+    if getattr(asset, 'original', None):
+        keys.add(asset.original)
+    return keys
+
+
+def legacy_files(record):
+    """未去重的旧图片记录对应的文件，其他记录仍在使用同一文件时返回空列表"""
+    users = sum(model.query.filter_by(filename=record.filename).count() for model in (Image, GalleryImage))
+    return asset_files(record) if users <= 1 else []
+
+
+def release(content_hash):
+    """减少引用计数，不再被引用时删除记录，返回需要在提交后删除的文件"""
+    ImageAsset.query.filter_by(content_hash=content_hash).update(
+        {ImageAsset.ref_count: ImageAsset.ref_count - 1}, synchronize_session=False
+    )
+    asset = ImageAsset.query.filter_by(content_hash=content_hash).populate_existing().first()
+    if asset is None or asset.ref_count > 0:
+        return []
+    files = asset_files(asset)
+    db.session.delete(asset)
+    return files
+
+
+def remove_files(keys):
+    current_storage().delete_many(keys)
@@ -0,0 +1,89 @@
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import traceback
+
+# Add the server directory to the path so we can import models
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app import create_app
+from models import db
+from image_jobs import claim_next, release, run_job
+
+stop_event = threading.Event()
+
+
+def handle_signal(signum, frame):
+    # 处理完当前任务后退出
+    stop_event.set()
+
+
+def work(poll_interval, once):
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    app = create_app()
+    with app.app_context():
+        print(f"Image worker {os.getpid()} started")
+        while not stop_event.is_set():
+            job_id = None
+            try:
+                job = claim_next()
+                if job is None:
+                    if once:
+                        break
+                    stop_event.wait(poll_interval)
+                    continue
+                job_id = job.id
+                print(f"Processing job {job.id} ({job.kind} #{job.target_id})")
+                run_job(job)
+            except Exception as e:
+                # 提交时数据库被锁、记录已被删除等意外错误不应终止 worker
+                db.session.rollback()
+                traceback.print_exc()
+                if job_id is not None:
+                    try:
+                        release(job_id, e)
+                    except Exception:
+                        db.session.rollback()
+                        print(f"Failed to release job {job_id}; it will be retried after the lock timeout")
+                stop_event.wait(poll_interval)
+            finally:
+                db.session.remove()
+        print(f"Image worker {os.getpid()} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图片处理任务 worker')
+    parser.add_argument('--processes', type=int, default=1, help='worker 进程数')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='没有任务时的轮询间隔（秒）')
+    parser.add_argument('--once', action='store_true', help='处理完当前队列后退出')
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        work(args.poll_interval, args.once)
+        return
+
+    processes = [
+        multiprocessing.Process(target=work, args=(args.poll_interval, args.once))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward_signal(signum, frame):
+        # 将停止信号转发给子进程，由子进程处理完当前任务后退出
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, forward_signal)
+    signal.signal(signal.SIGINT, forward_signal)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""JSON Patch（RFC 6902）
+
+支持 add / remove / replace / move / copy / test 操作，路径使用 JSON Pointer（RFC 6901）。
+操作作用于文档的副本，全部成功后才返回新文档。
+"""
+import copy
+
+
+class JsonPatchError(ValueError):
+    """补丁格式错误或路径无效"""
+
+
+class JsonPatchConflict(JsonPatchError):
+    """test 操作不满足"""
+
+
+def parse_pointer(pointer):
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith('/')):
+        raise JsonPatchError(f'无效的路径: {pointer}')
+    if pointer == '':
+        return []
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def _index(container, token, allow_end=False):
+    if allow_end and token == '-':
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith('0')):
+        raise JsonPatchError(f'无效的数组下标: {token}')
+    index = int(token)
+    limit = len(container) + (1 if allow_end else 0)
+    if index >= limit:
+        raise JsonPatchError(f'数组下标越界: {token}')
+    return index
+
+
+def _resolve(doc, tokens):
+    """返回路径最后一段的父容器"""
+    node = doc
+    for token in tokens[:-1]:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f'路径不存在: {token}')
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_index(node, token)]
+        else:
+            raise JsonPatchError(f'路径不存在: {token}')
+    return node
+
+
+def _get(doc, tokens):
+    if not tokens:
+        return doc
+    parent = _resolve(doc, tokens)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f'路径不存在: {token}')
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_index(parent, token)]
+    raise JsonPatchError(f'路径不存在: {token}')
+
+
+def _add(doc, tokens, value):
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, token, allow_end=True), value)
+    else:
+        raise JsonPatchError(f'路径不存在: {token}')
+    return doc
+
+
+def _remove(doc, tokens):
+    if not tokens:
+        raise JsonPatchError('不能删除整个文档')
+    parent = _resolve(doc, tokens)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f'路径不存在: {token}')
+        return parent.pop(token)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, token))
+    raise JsonPatchError(f'路径不存在: {token}')
+
+
+def apply_patch(doc, operations):
+    """依次执行补丁操作，返回新文档（不修改 doc）"""
+    if not isinstance(operations, list):
+        raise JsonPatchError('补丁必须是操作数组')
+
+    doc = copy.deepcopy(doc)
+    for operation in operations:
+        if not isinstance(operation, dict) or 'op' not in operation or 'path' not in operation:
+            raise JsonPatchError('每个操作需要包含 op 和 path')
+        op = operation['op']
+        path = parse_pointer(operation['path'])
+
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise JsonPatchError(f'{op} 操作缺少 value')
+
+        if op == 'add':
+            doc = _add(doc, path, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            _remove(doc, path)
+        elif op == 'replace':
+            if not path:
+                doc = copy.deepcopy(operation['value'])
+                continue
+            _get(doc, path)
+            _remove(doc, path)
+            doc = _add(doc, path, copy.deepcopy(operation['value']))
+        elif op in ('move', 'copy'):
+            source = parse_pointer(operation.get('from'))
+            if op == 'move':
+                if path[:len(source)] == source and path != source:
+                    raise JsonPatchError('不能移动到自身的子路径')
+                value = _remove(doc, source)
+            else:
+                value = copy.deepcopy(_get(doc, source))
+            doc = _add(doc, path, value)
+        elif op == 'test':
+            if _get(doc, path) != operation['value']:
+                raise JsonPatchConflict(f"test 失败: {operation['path']}")
+        else:
+            raise JsonPatchError(f'不支持的操作: {op}')
+    return doc
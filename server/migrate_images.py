@@ -1,60 +1,224 @@
+import argparse
+import json
 import os
 import sys
-from PIL import Image as PILImage
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 
 # Add the server directory to the path so we can import models
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from app import create_app
-from models import db, Image, GalleryImage
+from models import db, Image, GalleryImage, ImageAsset
+from image_pipeline import process_image
+from image_jobs import update_asset_users
+from cache import invalidate
+from storage import current_storage, key_from_url, url_for_key
 
-def migrate():
+
+def _files_exist(storage, paths):
+    return all(storage.exists(key_from_url(p)) for p in paths if p)
+
+
+def is_up_to_date(record, widths, storage):
+    """variants 已覆盖当前配置的所有宽度，且文件都存在"""
+    if not record.variants or not record.thumb_path or record.thumb_path == record.path:
+        return False
+    variants = json.loads(record.variants)
+    if not variants:
+        return False
+    present = {variant['width'] for variant in variants}
+    largest = max(present)
+    # 超过原图宽度的配置由最大的版本覆盖
+    if any(width not in present for width in widths if width < largest):
+        return False
+    paths = [record.path, record.thumb_path] + [variant['path'] for variant in variants]
+    return _files_exist(storage, paths)
+
+
+def pick_source(record, storage):
+    """选择用于重新生成的源文件（存储键）
+
+    优先使用上传的原图；原图不存在时才使用最大的已有版本（WebP 再次压缩会损失画质）。
+    旧图片记录的 filename 即原图。
+    """
+    original = record.original if isinstance(record, ImageAsset) else record.filename
+    candidates = [original] if original else []
+    if record.variants:
+        variants = sorted(json.loads(record.variants), key=lambda variant: variant['width'], reverse=True)
+        candidates.extend(key_from_url(variant['path']) for variant in variants)
+    candidates.append(record.filename)
+    for key in dict.fromkeys(candidates):
+        if storage.exists(key):
+            return key
+    return None
+
+
+def _unit(storage, key, source, name):
+    # worker 进程直接读写本地文件，生成的版本与源文件在同一目录
+    return {'key': key, 'source': storage.path(source), 'source_key': source, 'name': name}
+
+
+def collect_units(widths, storage, force):
+    """按文件分组待处理记录：图片文件（ImageAsset）一组，旧记录按文件名一组"""
+    units = []
+    skipped = missing = 0
+
+    for asset in ImageAsset.query.filter_by(status='ready').order_by(ImageAsset.id).yield_per(500):
+        if not force and is_up_to_date(asset, widths, storage):
+            skipped += 1
+            continue
+        source = pick_source(asset, storage)
+        if source is None:
+            missing += 1
+            print(f"Missing source for asset {asset.content_hash[:12]}")
+            continue
+        name = os.path.splitext(os.path.basename(asset.filename))[0]
+        units.append(_unit(storage, ('asset', asset.id), source, name))
+
+    for model in (Image, GalleryImage):
+        legacy = {}
+        for record in model.query.filter(model.content_hash.is_(None)).order_by(model.id).yield_per(500):
+            if not force and is_up_to_date(record, widths, storage):
+                skipped += 1
+                continue
+            if record.filename in legacy:
+                legacy[record.filename]['ids'].append(record.id)
+                continue
+            source = pick_source(record, storage)
+            if source is None:
+                missing += 1
+                print(f"Missing source for {model.__tablename__} #{record.id} ({record.filename})")
+                continue
+            name = os.path.splitext(os.path.basename(record.filename))[0]
+            legacy[record.filename] = {
+                **_unit(storage, (model.__tablename__, record.filename), source, name),
+                'ids': [record.id]
+            }
+        units.extend(legacy.values())
+
+    return units, skipped, missing
+
+
+def render(unit, widths):
+    """在 worker 进程中生成所有版本（不访问数据库）"""
+    try:
+        result = process_image(unit['source'], widths=widths, remove_original=False, name=unit['name'])
+        return unit, result, None
+    except Exception as e:
+        return unit, None, str(e)
+
+
+def apply_result(storage, unit, result):
+    """将生成结果写回数据库"""
+    def key(name):
+        return storage.sibling(unit['source_key'], name)
+
+    filename = key(result['filename'])
+    path = url_for_key(filename)
+    thumb_path = url_for_key(key(result['thumb']))
+    variants = json.dumps([
+        {'width': v['width'], 'height': v['height'], 'path': url_for_key(key(v['file']))}
+        for v in result['variants']
+    ])
+
+    kind, ident = unit['key']
+    if kind == 'asset':
+        asset = db.session.get(ImageAsset, ident)
+        if asset is None:
+            return
+        asset.filename = filename
+        asset.path = path
+        asset.thumb_path = thumb_path
+        asset.variants = variants
+        update_asset_users(asset)
+        return
+
+    model = Image if kind == Image.__tablename__ else GalleryImage
+    model.query.filter(model.id.in_(unit['ids'])).update({
+        model.filename: filename,
+        model.path: path,
+        model.thumb_path: thumb_path,
+        model.variants: variants,
+        model.status: 'ready'
+    }, synchronize_session=False)
+
+
+def migrate(workers=os.cpu_count(), checkpoint=50, dry_run=False, force=False):
     app = create_app()
     with app.app_context():
-        print("Starting image migration...")
-        upload_folder = app.config['UPLOAD_FOLDER']
-        
-        # 1. Process regular images
-        images = Image.query.all()
-        for img in images:
-            if not img.thumb_path:
-                filepath = os.path.join(upload_folder, img.filename)
-                if os.path.exists(filepath):
-                    name, ext = os.path.splitext(img.filename)
-                    thumb_name = f"thumb_{name}.webp"
-                    thumb_path = os.path.join(upload_folder, thumb_name)
-                    
-                    try:
-                        with PILImage.open(filepath) as pimg:
-                            pimg.thumbnail((400, 400))
-                            pimg.save(thumb_path, 'WEBP', quality=85)
-                        
-                        img.thumb_path = f'/uploads/{thumb_name}'
-                        print(f"Created thumbnail for {img.filename}")
-                    except Exception as e:
-                        print(f"Failed to create thumbnail for {img.filename}: {e}")
-        
-        # 2. Process gallery images
-        g_images = GalleryImage.query.all()
-        for img in g_images:
-            if not img.thumb_path:
-                filepath = os.path.join(upload_folder, img.filename)
-                if os.path.exists(filepath):
-                    name, ext = os.path.splitext(img.filename)
-                    thumb_name = f"thumb_{name}.webp"
-                    thumb_path = os.path.join(upload_folder, thumb_name)
-                    
-                    try:
-                        with PILImage.open(filepath) as pimg:
-                            pimg.thumbnail((400, 400))
-                            pimg.save(thumb_path, 'WEBP', quality=85)
-                        
-                        img.thumb_path = f'/uploads/{thumb_name}'
-                        print(f"Created thumbnail for gallery image {img.filename}")
-                    except Exception as e:
-                        print(f"Failed to create thumbnail for gallery image {img.filename}: {e}")
-        
+        storage = current_storage()
+        if not storage.local:
+            print("Only local storage is supported")
+            return
+        widths = app.config['IMAGE_VARIANT_WIDTHS']
+
+        print("Scanning images...")
+        units, skipped, missing = collect_units(widths, storage, force)
+        total = len(units)
+        print(f"{total} to process, {skipped} up to date, {missing} missing source")
+
+        if dry_run:
+            for unit in units:
+                print(f"Would process {unit['source']}")
+            return
+        if not units:
+            print("Migration completed!")
+            return
+
+        done = failed = pending_commit = 0
+        started = time.monotonic()
+        window = max(1, workers) * 4
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            queue = iter(units)
+            in_flight = set()
+            while True:
+                # 限制同时提交的任务数，避免一次性占用大量内存
+                for unit in queue:
+                    in_flight.add(executor.submit(render, unit, widths))
+                    if len(in_flight) >= window:
+                        break
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    unit, result, error = future.result()
+                    done += 1
+                    if error:
+                        failed += 1
+                        print(f"Failed to process {unit['source']}: {error}")
+                        continue
+                    if result:
+                        apply_result(storage, unit, result)
+                        pending_commit += 1
+
+                # 定期提交，中断后重新运行会跳过已完成的记录
+                if pending_commit >= checkpoint:
+                    invalidate()
+                    db.session.commit()
+                    pending_commit = 0
+                    elapsed = time.monotonic() - started
+                    rate = done / elapsed if elapsed else 0
+                    eta = (total - done) / rate if rate else 0
+                    print(f"{done}/{total} processed ({failed} failed), {rate:.1f} images/s, ETA {eta:.0f}s")
+
+        invalidate()
         db.session.commit()
-        print("Migration completed!")
+        elapsed = time.monotonic() - started
+        print(f"Migration completed! {done - failed} processed, {failed} failed in {elapsed:.1f}s "
+              f"({done / elapsed if elapsed else 0:.1f} images/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='为已有图片生成缩略图和多宽度版本')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='并行处理的进程数')
+    parser.add_argument('--checkpoint', type=int, default=50, help='每处理多少张图片提交一次')
+    parser.add_argument('--dry-run', action='store_true', help='只列出需要处理的图片')
+    parser.add_argument('--force', action='store_true', help='忽略已有版本，全部重新生成')
+    args = parser.parse_args()
+    migrate(args.workers, args.checkpoint, args.dry_run, args.force)
+
 
 if __name__ == "__main__":
-    migrate()
+    main()
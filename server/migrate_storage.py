@@ -0,0 +1,175 @@
+"""将上传目录中平铺的文件迁移到分目录结构
+
+    python migrate_storage.py            # 迁移文件并改写数据库中的路径
+    python migrate_storage.py --dry-run  # 只统计需要迁移的文件
+
+文件先硬链接（不同磁盘时复制）到新位置，再逐批提交数据库中 filename / path /
+thumb_path / variants 的改写；所有记录改写完成后才删除旧文件，服务运行时
+尚未改写的记录始终指向存在的文件。中断后重新运行会跳过已迁移的记录，
+残留的旧文件由 upload_gc.py 清理。
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app import create_app
+from models import db, Image, GalleryImage, ImageAsset, ImageJob, Page
+from cache import invalidate
+from storage import current_storage, key_from_url, url_for_key
+
+MODELS = (ImageAsset, Image, GalleryImage)
+# 页面内容中引用的上传文件
+UPLOAD_REFERENCE = re.compile(r'/uploads/([^"\'\s?#\\]+)')
+
+
+def is_flat(key):
+    return bool(key) and '/' not in key
+
+
+class Mover:
+    """记录已迁移的文件，全部记录改写完成后再删除旧文件"""
+
+    def __init__(self, storage, dry_run):
+        self.storage = storage
+        self.dry_run = dry_run
+        self.moved = {}
+        self.missing = set()
+
+    def key(self, old):
+        """返回平铺文件的新键，文件不存在时记为缺失（仍改写路径）"""
+        if not is_flat(old):
+            return old
+        new = self.storage.key_for(old)
+        if old in self.moved or self.dry_run:
+            self.moved.setdefault(old, new)
+            return new
+        source = self.storage.path(old)
+        dest = self.storage.path(new)
+        if os.path.isfile(source):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if not os.path.exists(dest):
+                try:
+                    os.link(source, dest)
+                except OSError:
+                    shutil.copy2(source, dest)
+            self.moved[old] = new
+        elif not os.path.isfile(dest):
+            self.missing.add(old)
+        return new
+
+    def url(self, path):
+        if not path:
+            return path
+        return url_for_key(self.key(key_from_url(path)))
+
+    def cleanup(self):
+        if not self.dry_run:
+            self.storage.delete_many(self.moved)
+
+
+def _flat_condition(model):
+    condition = db.or_(~model.filename.contains('/'), model.path.notlike('/uploads/%/%'))
+    if model is ImageAsset:
+        condition = db.or_(condition, ~model.original.contains('/'))
+    return condition
+
+
+def migrate_rows(model, mover, batch_size, pause):
+    """迁移一个表中仍使用平铺路径的记录，返回处理的记录数"""
+    total = 0
+    last_id = 0
+    while True:
+        rows = model.query.filter(model.id > last_id, _flat_condition(model)).order_by(model.id).limit(batch_size).all()
+        if not rows:
+            return total
+        for row in rows:
+            row.filename = mover.key(row.filename)
+            if model is ImageAsset and row.original:
+                row.original = mover.key(row.original)
+            row.path = mover.url(row.path)
+            row.thumb_path = mover.url(row.thumb_path)
+            if row.variants:
+                variants = json.loads(row.variants)
+                for variant in variants:
+                    variant['path'] = mover.url(variant.get('path'))
+                row.variants = json.dumps(variants)
+        last_id = rows[-1].id
+        total += len(rows)
+
+        if mover.dry_run:
+            db.session.rollback()
+        else:
+            invalidate()
+            db.session.commit()
+        if pause:
+            time.sleep(pause)
+
+
+def migrate_jobs(mover):
+    for job in ImageJob.query.filter(ImageJob.status.in_(('queued', 'running'))):
+        if is_flat(job.filename):
+            job.filename = mover.key(job.filename)
+
+
+def migrate_pages(mover):
+    """改写页面内容中的平铺路径（文件已随图片记录迁移）"""
+    def replace(match):
+        if not is_flat(match.group(1)):
+            return match.group(0)
+        new = mover.key(match.group(1))
+        if mover.dry_run or mover.storage.exists(new):
+            return url_for_key(new)
+        return match.group(0)
+
+    for page in Page.query.all():
+        content = UPLOAD_REFERENCE.sub(replace, page.content or '')
+        if content != page.content:
+            page.content = content
+
+
+def migrate(batch_size, pause, dry_run):
+    app = create_app()
+    with app.app_context():
+        storage = current_storage()
+        if not storage.local:
+            print("只支持本地存储")
+            return
+        if not storage.depth:
+            print("STORAGE_SHARD_DEPTH 为 0，无需迁移")
+            return
+
+        mover = Mover(storage, dry_run)
+        for model in MODELS:
+            count = migrate_rows(model, mover, batch_size, pause)
+            print(f"{model.__tablename__}: {count} 条记录{'需要' if dry_run else '已'}迁移")
+
+        migrate_jobs(mover)
+        migrate_pages(mover)
+        if dry_run:
+            db.session.rollback()
+        else:
+            invalidate()
+            db.session.commit()
+        mover.cleanup()
+
+        for key in sorted(mover.missing):
+            print(f"文件不存在: {key}")
+        print("迁移完成！")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将上传文件迁移到分目录结构')
+    parser.add_argument('--batch-size', type=int, default=200, help='每批处理的记录数')
+    parser.add_argument('--pause', type=float, default=0.05, help='每批之间的间隔秒数')
+    parser.add_argument('--dry-run', action='store_true', help='只统计，不移动文件')
+    args = parser.parse_args()
+    migrate(args.batch_size, args.pause, args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+import json
 
 db = SQLAlchemy()
 
@@ -22,6 +23,10 @@ class Admin(db.Model):
 class Jewelry(db.Model):
     """饰品模型"""
     __tablename__ = 'jewelry'
+    __table_args__ = (
+        # 游标分页按 (order_index, id) 排序
+        db.Index('ix_jewelry_order_index_id', 'order_index', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -38,8 +43,8 @@ class Jewelry(db.Model):
     # 关联图片
     images = db.relationship('Image', backref='jewelry', lazy=True, order_by='Image.order_index')
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_images=True):
+        data = {
             'id': self.id,
             'name': self.name,
             'name_en': self.name_en,
@@ -49,20 +54,29 @@ class Jewelry(db.Model):
             'order_index': self.order_index,
             'is_visible': self.is_visible,
             'is_featured': self.is_featured,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'images': [img.to_dict() for img in self.images]
+            'created_at': self.created_at.isoformat() if self.created_at else None
         }
+        if include_images:
+            data['images'] = [img.to_dict() for img in self.images]
+        return data
 
 
 class Image(db.Model):
     """图片模型"""
     __tablename__ = 'images'
+    __table_args__ = (
+        # 图片管理按上传时间游标分页
+        db.Index('ix_images_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
     original_name = db.Column(db.String(255))
     path = db.Column(db.String(500), nullable=False)
     thumb_path = db.Column(db.String(500)) # 缩略图路径
+    variants = db.Column(db.Text)  # 多宽度版本 JSON: [{width, height, path}]
+    content_hash = db.Column(db.String(64), index=True)  # 对应 ImageAsset 的内容哈希
+    status = db.Column(db.String(20), default='ready')  # processing / ready / failed
     jewelry_id = db.Column(db.Integer, db.ForeignKey('jewelry.id'), nullable=True)
     description = db.Column(db.Text)  # 为该图片添加特定说明
     description_en = db.Column(db.Text) # 英文特定说明
@@ -76,6 +90,8 @@ class Image(db.Model):
             'original_name': self.original_name,
             'path': self.path,
             'thumb_path': self.thumb_path or self.path,
+            'variants': json.loads(self.variants) if self.variants else [],
+            'status': self.status or 'ready',
             'jewelry_id': self.jewelry_id,
             'description': self.description,
             'description_en': self.description_en,
@@ -86,6 +102,11 @@ class Image(db.Model):
 class PageView(db.Model):
     """页面访问记录模型"""
     __tablename__ = 'page_views'
+    __table_args__ = (
+        db.Index('ix_page_views_created_at', 'created_at'),
+        db.Index('ix_page_views_page_path_created_at', 'page_path', 'created_at'),
+        db.Index('ix_page_views_visitor_id_created_at', 'visitor_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     page_path = db.Column(db.String(255), nullable=False)
@@ -131,6 +152,9 @@ class GalleryImage(db.Model):
     original_name = db.Column(db.String(255))
     path = db.Column(db.String(500), nullable=False)
     thumb_path = db.Column(db.String(500)) # 缩略图路径
+    variants = db.Column(db.Text)  # 多宽度版本 JSON: [{width, height, path}]
+    content_hash = db.Column(db.String(64), index=True)  # 对应 ImageAsset 的内容哈希
+    status = db.Column(db.String(20), default='ready')  # processing / ready / failed
     title = db.Column(db.String(100))  # 图片标题
     title_en = db.Column(db.String(100))  # 英文标题
     alt = db.Column(db.String(200))  # alt描述
@@ -145,6 +169,8 @@ class GalleryImage(db.Model):
             'original_name': self.original_name,
             'path': self.path,
             'thumb_path': self.thumb_path or self.path,
+            'variants': json.loads(self.variants) if self.variants else [],
+            'status': self.status or 'ready',
             'title': self.title,
             'title_en': self.title_en,
             'alt': self.alt,
@@ -152,3 +178,112 @@ class GalleryImage(db.Model):
             'is_visible': self.is_visible,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class Counter(db.Model):
+    """计数器模型（多个 worker 共享的键值计数）"""
+    __tablename__ = 'counters'
+    
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
+class PageViewDaily(db.Model):
+    """页面访问日汇总（page_path 为 '*' 的行表示全站汇总）"""
+    __tablename__ = 'page_view_daily'
+    
+    day = db.Column(db.Date, primary_key=True)
+    page_path = db.Column(db.String(255), primary_key=True)
+    pv = db.Column(db.Integer, nullable=False, default=0)
+    uv = db.Column(db.Integer, nullable=False, default=0)
+
+
+class PageViewDailyVisitor(db.Model):
+    """每日访客去重记录（用于增量计算UV）"""
+    __tablename__ = 'page_view_daily_visitors'
+    
+    day = db.Column(db.Date, primary_key=True)
+    page_path = db.Column(db.String(255), primary_key=True)
+    visitor_id = db.Column(db.String(100), primary_key=True)
+
+
+class ImageJob(db.Model):
+    """图片处理任务模型"""
+    __tablename__ = 'image_jobs'
+    __table_args__ = (
+        db.Index('ix_image_jobs_status_run_after', 'status', 'run_after'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # asset: 处理 ImageAsset
+    target_id = db.Column(db.Integer, nullable=False)  # ImageAsset.id
+    filename = db.Column(db.String(255), nullable=False)  # 待处理的原始文件
+    status = db.Column(db.String(20), default='queued')  # queued / running / done / failed
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=3)
+    last_error = db.Column(db.Text)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'target_id': self.target_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class ImageAsset(db.Model):
+    """图片文件模型（按内容哈希去重，多个图片记录可共用）"""
+    __tablename__ = 'image_assets'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)
+    filename = db.Column(db.String(255), nullable=False, index=True)
+    original = db.Column(db.String(255))  # 上传的原图，用于重新生成各版本（避免有损格式重复压缩）
+    path = db.Column(db.String(500), nullable=False)
+    thumb_path = db.Column(db.String(500))
+    variants = db.Column(db.Text)
+    status = db.Column(db.String(20), default='processing')  # processing / ready / failed
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class UploadSession(db.Model):
+    """分片上传会话模型"""
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # image / gallery
+    original_name = db.Column(db.String(255))
+    ext = db.Column(db.String(10), nullable=False)
+    total_size = db.Column(db.Integer, nullable=False)
+    params = db.Column(db.Text)  # 完成时创建记录所需的参数 JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Translation(db.Model):
+    """翻译缓存模型（按源语言、目标语言和原文哈希保存译文）"""
+    __tablename__ = 'translations'
+    
+    source = db.Column(db.String(10), primary_key=True)
+    target = db.Column(db.String(10), primary_key=True)
+    text_hash = db.Column(db.String(64), primary_key=True)
+    text = db.Column(db.Text, nullable=False)
+    translated = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class SchemaMigration(db.Model):
+    """已执行的数据库迁移版本（见 db_migrate.py）"""
+    __tablename__ = 'schema_migrations'
+    
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200))
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,175 @@
+"""展廊图片、饰品和饰品图片的排序
+
+order_index 使用稀疏的整数排序键（间隔 RANK_GAP），调整顺序时只修改位置变化的记录：
+保留新顺序中排序键已经递增的最长子序列，其余记录在相邻记录的排序键之间取值。
+移动一项只会更新一行；间隔用完时才重新编号整个列表，两种情况得到的顺序相同。
+请求只包含列表的一部分（例如当前分页）时，这些记录按请求的顺序占据它们原来的位置，
+未列出的记录位置不变。
+所有修改通过一条 UPDATE ... CASE 语句写入。
+"""
+from bisect import bisect_left
+
+from sqlalchemy import case, text
+
+from models import db, GalleryImage, Jewelry, Image
+
+RANK_GAP = 1024
+
+# 类型 -> (模型, 分组字段)；饰品图片在各自饰品内排序
+ORDERINGS = {
+    'gallery': (GalleryImage, None),
+    'jewelry': (Jewelry, None),
+    'images': (Image, 'jewelry_id'),
+}
+
+
+def _scoped(query, model, scope_column, scope_id):
+    if scope_column is None:
+        return query
+    return query.filter(getattr(model, scope_column) == scope_id)
+
+
+def next_rank(model, scope_column=None, scope_id=None):
+    """追加到列表末尾时使用的排序键"""
+    query = _scoped(db.session.query(db.func.max(model.order_index)), model, scope_column, scope_id)
+    return (query.scalar() or 0) + RANK_GAP
+
+
+def _longest_increasing(ranks):
+    """返回严格递增的最长子序列的下标集合（None 不参与）"""
+    tails = []  # 各长度子序列末尾的排序键
+    tail_index = []  # 对应的下标
+    previous = [None] * len(ranks)
+    for i, rank in enumerate(ranks):
+        if rank is None:
+            continue
+        pos = bisect_left(tails, rank)
+        if pos == len(tails):
+            tails.append(rank)
+            tail_index.append(i)
+        else:
+            tails[pos] = rank
+            tail_index[pos] = i
+        previous[i] = tail_index[pos - 1] if pos else None
+
+    keep = set()
+    i = tail_index[-1] if tail_index else None
+    while i is not None:
+        keep.add(i)
+        i = previous[i]
+    return keep
+
+
+def plan_ranks(current):
+    """current 为按新顺序排列的 [(id, 排序键)]，返回需要修改的 {id: 新排序键}
+
+    相邻保留记录之间没有足够的间隔时返回 None，需要重新编号。
+    """
+    ranks = [rank for _, rank in current]
+    keep = _longest_increasing(ranks)
+    changes = {}
+
+    i = 0
+    while i < len(current):
+        if i in keep:
+            i += 1
+            continue
+        # 找出连续的一段需要移动的记录及其前后保留记录的排序键
+        start = i
+        while i < len(current) and i not in keep:
+            i += 1
+        count = i - start
+        low = ranks[start - 1] if start > 0 else None
+        high = ranks[i] if i < len(current) else None
+
+        if low is None and high is None:
+            new_ranks = [RANK_GAP * (n + 1) for n in range(count)]
+        elif low is None:
+            new_ranks = [high - RANK_GAP * (count - n) for n in range(count)]
+        elif high is None:
+            new_ranks = [low + RANK_GAP * (n + 1) for n in range(count)]
+        else:
+            step = (high - low) // (count + 1)
+            if step < 1:
+                return None
+            new_ranks = [low + step * (n + 1) for n in range(count)]
+
+        for n, rank in enumerate(new_ranks):
+            changes[current[start + n][0]] = rank
+            ranks[start + n] = rank
+    return changes
+
+
+def _new_order(rows, ids):
+    """rows 为按当前顺序排列的整个列表，返回按新顺序排列的 [(id, 排序键)]
+
+    ids 中的记录按 ids 的顺序占据它们原来的位置，其余记录不动。
+    """
+    current = dict(rows)
+    listed = set(ids)
+    queue = iter(ids)
+    ordered = [next(queue) if item_id in listed else item_id for item_id, _ in rows]
+    return [(item_id, current[item_id]) for item_id in ordered]
+
+
+def _rebalance(ordered):
+    """按新顺序重新编号整个列表"""
+    return {
+        item_id: RANK_GAP * (n + 1)
+        for n, (item_id, rank) in enumerate(ordered)
+        if rank != RANK_GAP * (n + 1)
+    }
+
+
+def apply_ranks(model, ranks):
+    """一条 UPDATE 语句写入所有排序键"""
+    if not ranks:
+        return
+    model.query.filter(model.id.in_(list(ranks))).update(
+        {model.order_index: case(ranks, value=model.id)},
+        synchronize_session=False
+    )
+
+
+def reorder(kind, ids, scope_id=None):
+    """按 ids 的顺序排列记录，返回修改的行数
+
+    ids 可以只包含列表的一部分，这些记录按 ids 的顺序占据它们原来的位置。
+    """
+    if kind not in ORDERINGS:
+        raise ValueError('不支持的排序类型')
+    model, scope_column = ORDERINGS[kind]
+    if scope_column and scope_id is None:
+        raise ValueError(f'缺少 {scope_column}')
+    if not all(isinstance(item_id, int) for item_id in ids) or len(set(ids)) != len(ids):
+        raise ValueError('排序列表无效')
+
+    if not ids:
+        return 0
+
+    rows = _scoped(db.session.query(model.id, model.order_index), model, scope_column, scope_id)
+    rows = [tuple(row) for row in rows.order_by(model.order_index, model.id)]
+    if not set(ids) <= {item_id for item_id, _ in rows}:
+        raise ValueError('排序列表包含不存在的记录')
+
+    ordered = _new_order(rows, ids)
+    ranks = plan_ranks(ordered)
+    if ranks is None:
+        ranks = _rebalance(ordered)
+    apply_ranks(model, ranks)
+    return len(ranks)
+
+
+def spread_ranks(conn, table, scope_column=None):
+    """将已有的连续排序键改为稀疏排序键（保持原有顺序，用于数据库迁移）"""
+    scope = f"{scope_column}, " if scope_column else ''
+    rows = conn.execute(text(
+        f"SELECT id, {scope_column or 'NULL'} FROM {table} ORDER BY {scope}order_index, id"
+    )).all()
+    positions = {}
+    params = []
+    for row_id, scope_id in rows:
+        positions[scope_id] = positions.get(scope_id, 0) + 1
+        params.append({'id': row_id, 'rank': positions[scope_id] * RANK_GAP})
+    if params:
+        conn.execute(text(f"UPDATE {table} SET order_index = :rank WHERE id = :id"), params)
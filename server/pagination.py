@@ -0,0 +1,77 @@
+"""游标分页（keyset pagination）与字段筛选
+
+游标记录上一页最后一条记录的排序键，下一页用 WHERE (排序键) > (游标) 直接定位，
+不需要 COUNT，也不需要 OFFSET 扫描跳过前面的记录，每一页的开销都相同。
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+MAX_LIMIT = 100
+
+
+def encode_cursor(values):
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """解析游标，格式错误时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError('无效的游标') from e
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('无效的游标')
+    return [
+        datetime.fromisoformat(value) if isinstance(value, str) and _is_datetime(column) else value
+        for value, column in zip(values, columns)
+    ]
+
+
+def _is_datetime(column):
+    return getattr(getattr(column, 'type', None), 'python_type', None) is datetime
+
+
+def _after(columns, values, descending):
+    """(c1, c2, ...) 在游标之后的条件：展开为 c1 > v1 OR (c1 = v1 AND c2 > v2) ..."""
+    conditions = []
+    for i, column in enumerate(columns):
+        compare = column < values[i] if descending else column > values[i]
+        conditions.append(and_(*[columns[j] == values[j] for j in range(i)], compare))
+    return or_(*conditions)
+
+
+def keyset_page(query, columns, cursor=None, limit=20, descending=False):
+    """按 columns 排序取一页，返回 (记录列表, 下一页游标)，没有下一页时游标为 None
+
+    columns 的最后一列必须唯一（通常为 id），保证排序稳定。
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns), descending))
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+    items = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return items, next_cursor
+
+
+def parse_fields(value):
+    """解析 ?fields=id,name,cover，未指定时返回 None（返回全部字段）"""
+    if not value:
+        return None
+    return {field.strip() for field in value.split(',') if field.strip()}
+
+
+def select_fields(data, fields):
+    if fields is None:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# 其他进程正在生成同一文件时，等待的最长时间（秒）
+LOCK_TIMEOUT = 60
+# 缓存总大小记录在目录中，所有进程（gunicorn worker、图片处理 worker）共用
+SIZE_FILE = '.size'
+
+
+class ResizeCache:
+    """按需缩放图片的磁盘缓存
+
+    使用文件修改时间记录最近访问时间，总大小超过上限时按 LRU 淘汰。
+    同一个 key 的并发未命中只会生成一次：进程内用锁合并，
+    跨进程用 O_EXCL 创建的锁文件合并。
+    总大小保存在缓存目录的 .size 文件中，在锁文件保护下累加和淘汰，
+    多个进程共用同一个上限。
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        # key -> [锁, 等待和持有锁的线程数]，计数归零时删除
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get_or_render(self, key, render):
+        """返回 key 对应的缓存文件路径，不存在时调用 render(dest) 生成"""
+        path = self.path(key)
+        if self._touch(path):
+            return path
+
+        with self._key_lock(key):
+            if self._touch(path):
+                return path
+            rendered = self._render_exclusive(path, render)
+
+        if rendered:
+            self._add_size(path)
+        return path
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def _key_lock(self, key):
+        with self._locks_lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def _acquire(self, lock_path, ready=None):
+        """用 O_EXCL 创建锁文件；等待期间 ready() 为真时不再等待，返回 False"""
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                if ready and ready():
+                    return False
+                if time.monotonic() > deadline:
+                    # 锁文件残留（进程异常退出），清理后重试
+                    try:
+                        os.remove(lock_path)
+                    except FileNotFoundError:
+                        pass
+                    deadline = time.monotonic() + LOCK_TIMEOUT
+                time.sleep(0.05)
+
+    def _render_exclusive(self, path, render):
+        """生成文件，返回是否由本次调用生成（其他进程已生成时返回 False）"""
+        lock_path = f"{path}.lock"
+        # 其他进程正在生成时等待其完成
+        if not self._acquire(lock_path, ready=lambda: os.path.exists(path)):
+            return False
+
+        try:
+            if os.path.exists(path):
+                return False
+            temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            try:
+                render(temp_path)
+                os.replace(temp_path, path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            return True
+        finally:
+            os.remove(lock_path)
+
+    def _entries(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.') and not entry.name.endswith(('.lock', '.tmp')):
+                yield entry
+
+    def _read_size(self):
+        try:
+            with open(self.path(SIZE_FILE)) as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_size(self, size):
+        temp_path = self.path(f"{SIZE_FILE}.{uuid.uuid4().hex}.tmp")
+        with open(temp_path, 'w') as f:
+            f.write(str(size))
+        os.replace(temp_path, self.path(SIZE_FILE))
+
+    def _add_size(self, path):
+        """将新文件计入共享的总大小，超过上限时淘汰"""
+        size = os.path.getsize(path)
+        lock_path = self.path(f"{SIZE_FILE}.lock")
+        self._acquire(lock_path)
+        try:
+            total = self._read_size()
+            if total is None:
+                total = sum(entry.stat().st_size for entry in self._entries())
+            else:
+                total += size
+            if total > self.max_bytes:
+                total = self._evict(keep=path)
+            self._write_size(total)
+        finally:
+            os.remove(lock_path)
+
+    def _evict(self, keep):
+        """重新扫描目录，按最近访问时间淘汰，直到总大小降到上限的 90%（保留刚生成的文件）
+
+        返回淘汰后的总大小。
+        """
+        entries = sorted(
+            ((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in self._entries())
+        )
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
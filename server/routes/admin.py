@@ -1,9 +1,12 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models import db, Jewelry, Image
+from models import db
+from stats_counters import read_counts, JEWELRY_COUNT, JEWELRY_VISIBLE, IMAGE_COUNT
+from cache import invalidate
+from ordering import reorder
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -11,12 +14,33 @@ admin_bp = Blueprint('admin', __name__)
 @jwt_required()
 def get_stats():
     """获取统计数据"""
-    jewelry_count = Jewelry.query.count()
-    image_count = Image.query.count()
-    visible_count = Jewelry.query.filter_by(is_visible=True).count()
+    counts = read_counts()
     
     return jsonify({
-        'jewelryCount': jewelry_count,
-        'imageCount': image_count,
-        'visibleCount': visible_count
+        'jewelryCount': counts[JEWELRY_COUNT],
+        'imageCount': counts[IMAGE_COUNT],
+        'visibleCount': counts[JEWELRY_VISIBLE]
     })
+
+
+@admin_bp.route('/reorder', methods=['POST'])
+@jwt_required()
+def reorder_items():
+    """调整展廊图片 / 饰品 / 饰品图片的顺序
+
+    请求体: { type: 'gallery' | 'jewelry' | 'images', ids: [按新顺序排列的 id], jewelry_id }
+    ids 可以只包含列表的一部分（例如当前分页），这些记录按 ids 的顺序占据它们原来的位置，
+    只会修改位置变化的记录。
+    """
+    data = request.get_json() or {}
+    
+    try:
+        updated = reorder(data.get('type'), data.get('ids') or [], data.get('jewelry_id'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    if updated:
+        invalidate()
+    db.session.commit()
+    
+    return jsonify({'message': '排序更新成功', 'updated': updated})
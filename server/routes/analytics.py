@@ -1,11 +1,13 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta
 from sqlalchemy import func
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models import db, PageView
+from models import db, PageView, PageViewDaily, Counter
+from analytics_buffer import DROPPED_COUNTER
+from analytics_rollup import ALL_PAGES, apply_events
 
 analytics_bp = Blueprint('analytics', __name__)
 
@@ -14,16 +16,23 @@ def track_page_view():
     """记录页面访问（无需认证，前端调用）"""
     data = request.get_json() or {}
     
-    page_view = PageView(
-        page_path=data.get('path', '/'),
-        visitor_id=data.get('visitor_id'),
-        ip_address=request.remote_addr,
-        user_agent=request.headers.get('User-Agent', '')[:500],
-        referrer=data.get('referrer', '')[:500] if data.get('referrer') else None
-    )
+    event = {
+        'page_path': data.get('path', '/'),
+        'visitor_id': data.get('visitor_id'),
+        'ip_address': request.remote_addr,
+        'user_agent': request.headers.get('User-Agent', '')[:500],
+        'referrer': data.get('referrer', '')[:500] if data.get('referrer') else None,
+        'created_at': datetime.utcnow()
+    }
     
-    db.session.add(page_view)
-    db.session.commit()
+    buffer = current_app.extensions.get('pageview_buffer')
+    if buffer:
+        # 写缓冲模式：入队后由后台线程批量写入
+        buffer.put(event)
+    else:
+        db.session.add(PageView(**event))
+        apply_events([event])
+        db.session.commit()
     
     return jsonify({'success': True})
 
@@ -31,56 +40,54 @@ def track_page_view():
 @analytics_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_analytics_stats():
-    """获取统计数据（需要管理员认证）"""
-    now = datetime.utcnow()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    week_start = today_start - timedelta(days=today_start.weekday())
-    month_start = today_start.replace(day=1)
+    """获取统计数据（需要管理员认证，读取日汇总表）"""
+    today = datetime.utcnow().date()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    trend_start = today - timedelta(days=6)
     
-    # 今日PV
-    today_pv = PageView.query.filter(PageView.created_at >= today_start).count()
+    # 一次取出统计所需的全站日汇总
+    rows = PageViewDaily.query.filter(
+        PageViewDaily.page_path == ALL_PAGES,
+        PageViewDaily.day >= min(month_start, week_start, trend_start)
+    ).all()
+    daily = {row.day: row for row in rows}
     
-    # 今日UV（按visitor_id去重）
-    today_uv = db.session.query(func.count(func.distinct(PageView.visitor_id))).filter(
-        PageView.created_at >= today_start,
-        PageView.visitor_id.isnot(None)
-    ).scalar() or 0
-    
-    # 本周PV
-    week_pv = PageView.query.filter(PageView.created_at >= week_start).count()
+    def sum_pv(start):
+        return sum(row.pv for day, row in daily.items() if day >= start)
     
-    # 本月PV
-    month_pv = PageView.query.filter(PageView.created_at >= month_start).count()
+    today_row = daily.get(today)
     
     # 总PV
-    total_pv = PageView.query.count()
+    total_pv = db.session.query(func.sum(PageViewDaily.pv)).filter(
+        PageViewDaily.page_path == ALL_PAGES
+    ).scalar() or 0
     
     # 热门页面（Top 5）
-    top_pages = db.session.query(
-        PageView.page_path,
-        func.count(PageView.id).label('count')
-    ).group_by(PageView.page_path).order_by(func.count(PageView.id).desc()).limit(5).all()
+    page_pv = func.sum(PageViewDaily.pv)
+    top_pages = db.session.query(PageViewDaily.page_path, page_pv).filter(
+        PageViewDaily.page_path != ALL_PAGES
+    ).group_by(PageViewDaily.page_path).order_by(page_pv.desc()).limit(5).all()
     
     # 最近7天每日PV趋势
     daily_stats = []
     for i in range(6, -1, -1):
-        day_start = today_start - timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
-        count = PageView.query.filter(
-            PageView.created_at >= day_start,
-            PageView.created_at < day_end
-        ).count()
+        day = today - timedelta(days=i)
         daily_stats.append({
-            'date': day_start.strftime('%m-%d'),
-            'pv': count
+            'date': day.strftime('%m-%d'),
+            'pv': daily[day].pv if day in daily else 0
         })
     
+    # 写缓冲队列已满时丢弃的访问事件数
+    dropped = db.session.get(Counter, DROPPED_COUNTER)
+    
     return jsonify({
-        'todayPV': today_pv,
-        'todayUV': today_uv,
-        'weekPV': week_pv,
-        'monthPV': month_pv,
+        'todayPV': today_row.pv if today_row else 0,
+        'todayUV': today_row.uv if today_row else 0,
+        'weekPV': sum_pv(week_start),
+        'monthPV': sum_pv(month_start),
         'totalPV': total_pv,
         'topPages': [{'path': p[0], 'count': p[1]} for p in top_pages],
-        'dailyStats': daily_stats
+        'dailyStats': daily_stats,
+        'droppedEvents': dropped.value if dropped else 0
     })
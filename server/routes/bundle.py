@@ -0,0 +1,35 @@
+from flask import Blueprint, jsonify
+from sqlalchemy.orm import selectinload
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import Jewelry, GalleryImage, Page
+from cache import cached_response
+from routes.pages import parse_content
+
+bundle_bp = Blueprint('bundle', __name__)
+
+# 首页展示的精选饰品数量
+HOME_FEATURED_LIMIT = 3
+
+
+@bundle_bp.route('/home', methods=['GET'])
+@cached_response
+def get_home_bundle():
+    """首页所需的全部数据（页面内容、精选饰品、展廊图片），一次请求返回
+
+    各部分与 /api/pages/home、/api/jewelry?featured=true&limit=3、/api/gallery 的返回相同。
+    """
+    page = Page.query.filter_by(page_key='home').first()
+    
+    featured = Jewelry.query.options(selectinload(Jewelry.images)).filter_by(
+        is_visible=True, is_featured=True
+    ).order_by(Jewelry.order_index.asc()).limit(HOME_FEATURED_LIMIT).all()
+    
+    gallery = GalleryImage.query.filter_by(is_visible=True).order_by(GalleryImage.order_index).all()
+    
+    return jsonify({
+        'page': parse_content(page.content) if page else {},
+        'featured': [j.to_dict() for j in featured],
+        'gallery': [img.to_dict() for img in gallery]
+    })
@@ -2,19 +2,16 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 from werkzeug.utils import secure_filename
 import os
-import uuid
 import sys
 
-# Pillow is optional - if not available, images won't be compressed
-try:
-    from PIL import Image as PILImage
-    PILLOW_AVAILABLE = True
-except ImportError:
-    PILLOW_AVAILABLE = False
-    print("警告: Pillow未安装，图片将不会被压缩")
-
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import db, Image
+from cache import invalidate
+from image_jobs import run_inline
+from ordering import next_rank
+from pagination import keyset_page, parse_fields, select_fields
+from image_store import save_upload, acquire, apply_asset, legacy_files, release, remove_files
+from bulk import apply_images, BatchError
 
 images_bp = Blueprint('images', __name__)
 
@@ -24,58 +21,6 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def compress_image(filepath, max_size=(1200, 1200), thumb_size=(400, 400), quality=85):
-    """压缩图片并生成缩略图（如果Pillow可用）"""
-    if not PILLOW_AVAILABLE:
-        return None  # 跳过压缩
-    
-    try:
-        # 获取基础文件名和路径
-        base_dir = os.path.dirname(filepath)
-        filename = os.path.basename(filepath)
-        name, ext = os.path.splitext(filename)
-        
-        # 定义WebP文件名
-        webp_name = f"{name}.webp"
-        webp_path = os.path.join(base_dir, webp_name)
-        
-        # 定义缩略图文件名
-        thumb_name = f"thumb_{name}.webp"
-        thumb_path = os.path.join(base_dir, thumb_name)
-        
-        with PILImage.open(filepath) as img:
-            # 处理方向信息
-            try:
-                from PIL import ImageOps
-                img = ImageOps.exif_transpose(img)
-            except:
-                pass
-                
-            # 转换为RGB
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # 1. 保存主图 WebP
-            main_img = img.copy()
-            main_img.thumbnail(max_size, PILImage.Resampling.LANCZOS)
-            main_img.save(webp_path, 'WEBP', quality=quality, optimize=True)
-            
-            # 2. 保存缩略图 WebP
-            thumb_img = img.copy()
-            thumb_img.thumbnail(thumb_size, PILImage.Resampling.LANCZOS)
-            thumb_img.save(thumb_path, 'WEBP', quality=quality, optimize=True)
-            
-        # 如果原始文件不是WebP，且转换成功，可以删除原始文件
-        if filepath != webp_path and os.path.exists(webp_path):
-            os.remove(filepath)
-            
-        return webp_name, thumb_name
-    except Exception as e:
-        print(f'压缩图片失败: {e}')
-        return None, None
-
 @images_bp.route('/upload', methods=['POST'])
 @jwt_required()
 def upload_images():
@@ -88,41 +33,41 @@ def upload_images():
         return jsonify({'message': '没有上传文件'}), 400
     
     files = request.files.getlist('images')
-    jewelry_id = request.form.get('jewelry_id')
+    jewelry_id = int(request.form['jewelry_id']) if request.form.get('jewelry_id') else None
+    # wait=true 时在请求内直接完成处理（例如页面内容编辑需要最终路径）
+    wait = request.form.get('wait', 'false').lower() == 'true' or current_app.config['IMAGE_JOBS_INLINE']
     
     uploaded = []
+    jobs = []
     
     for file in files:
         if file and allowed_file(file.filename):
-            # 生成唯一文件名
             ext = file.filename.rsplit('.', 1)[1].lower()
             if ext in ('jpg', 'jpeg'):
                 ext = 'jpg'
-            filename = f"{uuid.uuid4().hex}.{ext}"
-            
-            # 保存文件
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            
-            # 压缩图片并生成缩略图
-            new_filename, thumb_filename = compress_image(filepath)
             
-            # 如果转换成功，更新信息
-            final_filename = new_filename if new_filename else filename
+            # 保存文件并计算内容哈希，相同内容复用已有的图片文件
+            content_hash, temp_path = save_upload(file, current_app.config['UPLOAD_FOLDER'])
+            asset, job = acquire(content_hash, temp_path, ext)
+            if job:
+                jobs.append(job)
             
-            # 保存到数据库
+            # 保存到数据库，压缩和缩略图由后台任务完成
             image = Image(
-                filename=final_filename,
                 original_name=secure_filename(file.filename),
-                path=f'/uploads/{final_filename}',
-                thumb_path=f'/uploads/{thumb_filename}' if thumb_filename else f'/uploads/{final_filename}',
-                jewelry_id=int(jewelry_id) if jewelry_id else None
+                jewelry_id=jewelry_id,
+                order_index=next_rank(Image, 'jewelry_id', jewelry_id) if jewelry_id else 0
             )
+            apply_asset(image, asset)
             db.session.add(image)
             uploaded.append(image)
     
+    invalidate()
     db.session.commit()
     
+    if wait:
+        run_inline(jobs)
+    
     return jsonify({
         'message': f'成功上传 {len(uploaded)} 张图片',
         'images': [img.to_dict() for img in uploaded]
@@ -132,9 +77,30 @@ def upload_images():
 @images_bp.route('/images', methods=['GET'])
 @jwt_required()
 def get_images():
-    """获取所有图片"""
-    images = Image.query.order_by(Image.created_at.desc()).all()
-    return jsonify([img.to_dict() for img in images])
+    """获取图片（按上传时间倒序）
+
+    传入 cursor 参数（第一页为空字符串）时使用游标分页，返回 {items, next_cursor}；
+    否则返回所有图片。fields 指定返回的字段。
+    """
+    cursor = request.args.get('cursor')
+    fields = parse_fields(request.args.get('fields'))
+    query = Image.query
+    
+    if cursor is not None:
+        try:
+            images, next_cursor = keyset_page(
+                query, [Image.created_at, Image.id], cursor,
+                request.args.get('limit', 50, type=int), descending=True
+            )
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        return jsonify({
+            'items': [select_fields(img.to_dict(), fields) for img in images],
+            'next_cursor': next_cursor
+        })
+    
+    images = query.order_by(Image.created_at.desc()).all()
+    return jsonify([select_fields(img.to_dict(), fields) for img in images])
 
 
 @images_bp.route('/images/<int:id>', methods=['PUT'])
@@ -153,24 +119,49 @@ def update_image(id):
     if 'description_en' in data:
         image.description_en = data['description_en']
     
+    invalidate()
     db.session.commit()
     
     return jsonify(image.to_dict())
 
 
+@images_bp.route('/images/batch', methods=['POST'])
+@jwt_required()
+def batch_images():
+    """批量更新 / 删除图片（例如批量分配到饰品），全部操作在同一事务中执行
+
+    请求体: { operations: [{op: 'update', id, data: {jewelry_id, order_index, ...}}, {op: 'delete', id}] }
+    任一操作无效时不做任何修改，返回 400 和每个操作的校验结果。
+    """
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    
+    try:
+        results, files = apply_images(operations, current_app.config['BULK_BATCH_LIMIT'])
+    except BatchError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e), 'results': e.results}), 400
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
+    
+    invalidate()
+    db.session.commit()
+    remove_files(files)
+    
+    return jsonify({'results': results})
+
+
 @images_bp.route('/images/<int:id>', methods=['DELETE'])
 @jwt_required()
 def delete_image(id):
     """删除图片"""
     image = Image.query.get_or_404(id)
     
-    # 删除文件
-    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], image.filename)
-    if os.path.exists(filepath):
-        os.remove(filepath)
-    
-    # 删除数据库记录
+    # 删除数据库记录，图片文件不再被引用时一并删除
+    files = release(image.content_hash) if image.content_hash else legacy_files(image)
     db.session.delete(image)
+    invalidate()
     db.session.commit()
+    remove_files(files)
     
     return jsonify({'message': '删除成功'})
@@ -1,23 +1,50 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import selectinload
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import db, Jewelry
+from cache import cached_response, invalidate
+from pagination import keyset_page, parse_fields, select_fields
+from ordering import next_rank
+import search
+from bulk import apply_jewelry, BatchError
 
 jewelry_bp = Blueprint('jewelry', __name__)
 
+def serialize(jewelry, fields=None):
+    """按 fields 输出饰品字段；cover 为第一张图片（列表页只需要封面）"""
+    if fields is None:
+        return jewelry.to_dict()
+    data = jewelry.to_dict(include_images='images' in fields)
+    if 'cover' in fields:
+        data['cover'] = jewelry.images[0].to_dict() if jewelry.images else None
+    return select_fields(data, fields)
+
+
 @jewelry_bp.route('', methods=['GET'])
+@cached_response
 def get_jewelry():
-    """获取饰品列表"""
+    """获取饰品列表
+
+    传入 cursor 参数（第一页为空字符串）时使用游标分页，返回 {items, next_cursor}；
+    fields 指定返回的字段，例如 fields=id,name,cover。
+    """
     featured = request.args.get('featured')
     limit = request.args.get('limit', type=int)
     all_items = request.args.get('all', 'false').lower() == 'true'
+    category = request.args.get('category')
+    cursor = request.args.get('cursor')
+    fields = parse_fields(request.args.get('fields'))
     
     
     page = request.args.get('page', type=int)
     
     query = Jewelry.query
+    if fields is None or fields & {'images', 'cover'}:
+        # 批量预加载图片，避免逐条查询（N+1）
+        query = query.options(selectinload(Jewelry.images))
     
     if not all_items:
         query = query.filter_by(is_visible=True)
@@ -25,13 +52,27 @@ def get_jewelry():
     if featured:
         query = query.filter_by(is_featured=True)
     
+    if category:
+        # category 为逗号分隔的多个分类
+        query = query.filter(("," + Jewelry.category + ",").contains(f",{category},"))
+    
+    if cursor is not None:
+        try:
+            items, next_cursor = keyset_page(query, [Jewelry.order_index, Jewelry.id], cursor, limit or 20)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        return jsonify({
+            'items': [serialize(j, fields) for j in items],
+            'next_cursor': next_cursor
+        })
+    
     query = query.order_by(Jewelry.order_index.asc())
     
     if page:
         per_page = limit if limit else 10
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         return jsonify({
-            'items': [j.to_dict() for j in pagination.items],
+            'items': [serialize(j, fields) for j in pagination.items],
             'total': pagination.total,
             'pages': pagination.pages,
             'page': pagination.page,
@@ -42,13 +83,48 @@ def get_jewelry():
         query = query.limit(limit)
     
     jewelry = query.all()
-    return jsonify([j.to_dict() for j in jewelry])
+    return jsonify([serialize(j, fields) for j in jewelry])
+
+
+@jewelry_bp.route('/search', methods=['GET'])
+@cached_response
+def search_jewelry():
+    """搜索饰品（按相关度排序）
+
+    参数: q 关键词, category 分类, cursor 游标, limit 每页数量, fields 返回字段。
+    返回 {items, next_cursor, total, facets}，facets 为各分类的结果数（不受 category 影响）。
+    """
+    q = request.args.get('q', '').strip()
+    fields = parse_fields(request.args.get('fields'))
+    
+    try:
+        ids, next_cursor, total, facets = search.search(
+            q,
+            category=request.args.get('category') or None,
+            cursor=request.args.get('cursor') or None,
+            limit=request.args.get('limit', 20, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    query = Jewelry.query.filter(Jewelry.id.in_(ids))
+    if fields is None or fields & {'images', 'cover'}:
+        query = query.options(selectinload(Jewelry.images))
+    found = {j.id: j for j in query}
+    
+    return jsonify({
+        'items': [serialize(found[i], fields) for i in ids if i in found],
+        'next_cursor': next_cursor,
+        'total': total,
+        'facets': facets
+    })
 
 
 @jewelry_bp.route('/<int:id>', methods=['GET'])
+@cached_response
 def get_jewelry_item(id):
     """获取单个饰品"""
-    jewelry = Jewelry.query.get_or_404(id)
+    jewelry = Jewelry.query.options(selectinload(Jewelry.images)).get_or_404(id)
     return jsonify(jewelry.to_dict())
 
 
@@ -64,12 +140,15 @@ def create_jewelry():
         category=data.get('category', '耳饰'),
         description=data.get('description', ''),
         description_en=data.get('description_en', ''),
-        order_index=data.get('order_index', 0),
+        order_index=data['order_index'] if 'order_index' in data else next_rank(Jewelry),
         is_visible=data.get('is_visible', True),
         is_featured=data.get('is_featured', False)
     )
     
     db.session.add(jewelry)
+    db.session.flush()
+    search.index_jewelry(jewelry)
+    invalidate()
     db.session.commit()
     
     return jsonify(jewelry.to_dict()), 201
@@ -99,17 +178,46 @@ def update_jewelry(id):
     if 'is_featured' in data:
         jewelry.is_featured = data['is_featured']
     
+    search.index_jewelry(jewelry)
+    invalidate()
     db.session.commit()
     
     return jsonify(jewelry.to_dict())
 
 
+@jewelry_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch_jewelry():
+    """批量创建 / 更新 / 删除饰品，全部操作在同一事务中执行
+
+    请求体: { operations: [{op: 'create', data}, {op: 'update', id, data}, {op: 'delete', id}] }
+    任一操作无效时不做任何修改，返回 400 和每个操作的校验结果。
+    """
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    
+    try:
+        results = apply_jewelry(operations, current_app.config['BULK_BATCH_LIMIT'])
+    except BatchError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e), 'results': e.results}), 400
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
+    
+    invalidate()
+    db.session.commit()
+    
+    return jsonify({'results': results})
+
+
 @jewelry_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
 def delete_jewelry(id):
     """删除饰品"""
     jewelry = Jewelry.query.get_or_404(id)
     db.session.delete(jewelry)
+    search.remove_jewelry(id)
+    invalidate()
     db.session.commit()
     
     return jsonify({'message': '删除成功'})
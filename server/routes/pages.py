@@ -1,13 +1,47 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
+from datetime import datetime
 import json
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import db, Page
+from cache import cached_response, invalidate
+from json_patch import apply_patch, JsonPatchError, JsonPatchConflict
 
 pages_bp = Blueprint('pages', __name__)
 
+# 页面内容解析缓存：page_key -> (updated_at, 序列化后的响应体)
+# 只有 updated_at 变化时才重新解析 content
+_parsed = {}
+
+# 并发 PATCH 冲突时的重试次数
+PATCH_RETRIES = 3
+
+
+def parse_content(content):
+    try:
+        return json.loads(content) if content else {}
+    except ValueError:
+        return {}
+
+
+def _page_body(page_key):
+    """返回页面内容的 JSON 响应体，内容未修改时使用缓存"""
+    row = db.session.query(Page.updated_at).filter_by(page_key=page_key).first()
+    if row is None:
+        return b'{}'
+    
+    cached = _parsed.get(page_key)
+    if cached and cached[0] == row.updated_at:
+        return cached[1]
+    
+    page = Page.query.filter_by(page_key=page_key).first()
+    body = json.dumps(parse_content(page.content), ensure_ascii=False, separators=(',', ':')).encode()
+    _parsed[page_key] = (page.updated_at, body)
+    return body
+
+
 @pages_bp.route('', methods=['GET'])
 @jwt_required()
 def get_pages():
@@ -17,19 +51,10 @@ def get_pages():
 
 
 @pages_bp.route('/<page_key>', methods=['GET'])
+@cached_response
 def get_page(page_key):
     """获取单个页面内容"""
-    page = Page.query.filter_by(page_key=page_key).first()
-    
-    if not page:
-        return jsonify({}), 200
-    
-    try:
-        content = json.loads(page.content) if page.content else {}
-    except:
-        content = {}
-    
-    return jsonify(content)
+    return current_app.response_class(_page_body(page_key), mimetype='application/json')
 
 
 @pages_bp.route('/<page_key>', methods=['PUT'])
@@ -44,7 +69,47 @@ def update_page(page_key):
     
     data = request.get_json()
     page.content = data.get('content', '{}')
+    page.updated_at = datetime.utcnow()
     
+    invalidate()
     db.session.commit()
     
     return jsonify(page.to_dict())
+
+
+@pages_bp.route('/<page_key>', methods=['PATCH'])
+@jwt_required()
+def patch_page(page_key):
+    """按 JSON Patch（RFC 6902）修改页面内容，只需提交变化的字段
+
+    请求体为操作数组，例如 [{"op": "replace", "path": "/heroTitle", "value": "..."}]，
+    也可以是 {"operations": [...]}
+    """
+    operations = request.get_json(force=True, silent=True)
+    if isinstance(operations, dict):
+        operations = operations.get('operations')
+    
+    for _ in range(PATCH_RETRIES):
+        page = Page.query.filter_by(page_key=page_key).first_or_404()
+        try:
+            content = apply_patch(parse_content(page.content), operations)
+        except JsonPatchConflict as e:
+            db.session.rollback()
+            return jsonify({'message': str(e)}), 409
+        except JsonPatchError as e:
+            db.session.rollback()
+            return jsonify({'message': str(e)}), 400
+        
+        # 条件更新：其他请求已修改页面时重新读取并应用补丁
+        updated_at = datetime.utcnow()
+        updated = Page.query.filter_by(id=page.id, updated_at=page.updated_at).update({
+            Page.content: json.dumps(content, ensure_ascii=False),
+            Page.updated_at: updated_at
+        }, synchronize_session=False)
+        if updated:
+            invalidate()
+            db.session.commit()
+            return jsonify({'page_key': page_key, 'updated_at': updated_at.isoformat()})
+        db.session.rollback()
+    
+    return jsonify({'message': '页面正在被其他请求修改，请重试'}), 409
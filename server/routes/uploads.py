@@ -0,0 +1,198 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from werkzeug.utils import secure_filename
+import json
+import os
+import uuid
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import db, Image, GalleryImage, UploadSession
+from cache import invalidate
+from image_jobs import run_inline
+from ordering import next_rank
+from image_store import CHUNK_SIZE, hash_file, acquire, apply_asset
+
+uploads_bp = Blueprint('uploads', __name__)
+
+ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp'}
+UPLOAD_KINDS = {'image', 'gallery'}
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def _part_path(session):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], f"{session.id}.part")
+
+
+def _received(session):
+    path = _part_path(session)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _status(session):
+    return {
+        'id': session.id,
+        'offset': _received(session),
+        'total_size': session.total_size,
+        'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE']
+    }
+
+
+@uploads_bp.route('', methods=['POST'])
+@jwt_required()
+def init_upload():
+    """创建分片上传会话"""
+    data = request.get_json() or {}
+    filename = data.get('filename', '')
+    kind = data.get('kind', 'image')
+    total_size = data.get('size')
+
+    if not allowed_file(filename):
+        return jsonify({'message': '不支持的文件格式'}), 400
+    if kind not in UPLOAD_KINDS:
+        return jsonify({'message': '不支持的上传类型'}), 400
+    if not isinstance(total_size, int) or total_size <= 0:
+        return jsonify({'message': '文件大小无效'}), 400
+    if total_size > current_app.config['UPLOAD_MAX_SIZE']:
+        return jsonify({'message': '文件过大'}), 413
+
+    ext = filename.rsplit('.', 1)[1].lower()
+    if ext in ('jpg', 'jpeg'):
+        ext = 'jpg'
+
+    session = UploadSession(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        original_name=secure_filename(filename),
+        ext=ext,
+        total_size=total_size,
+        params=json.dumps({
+            key: data[key] for key in ('jewelry_id', 'title', 'title_en', 'alt') if key in data
+        })
+    )
+    db.session.add(session)
+    db.session.commit()
+
+    open(_part_path(session), 'wb').close()
+
+    return jsonify(_status(session)), 201
+
+
+@uploads_bp.route('/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload(upload_id):
+    """查询已接收的字节数，用于断点续传"""
+    session = UploadSession.query.get_or_404(upload_id)
+    return jsonify(_status(session))
+
+
+@uploads_bp.route('/<upload_id>', methods=['PUT'])
+@jwt_required()
+def put_chunk(upload_id):
+    """写入一个分片（请求体为原始字节，offset 为分片起始位置）"""
+    session = UploadSession.query.get_or_404(upload_id)
+    offset = request.args.get('offset', type=int)
+    received = _received(session)
+
+    # 允许重发已确认的分片，但不允许跳过未接收的部分
+    if offset is None or offset < 0 or offset > received:
+        return jsonify({'message': '分片位置无效', **_status(session)}), 409
+
+    with open(_part_path(session), 'r+b') as out:
+        out.seek(offset)
+        position = offset
+        while True:
+            chunk = request.stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            if position + len(chunk) > session.total_size:
+                return jsonify({'message': '超出文件大小', **_status(session)}), 400
+            out.write(chunk)
+            position += len(chunk)
+
+    return jsonify(_status(session))
+
+
+def _claim(session):
+    """条件删除会话并立即提交，同一会话只有一个 complete 请求能继续处理
+
+    返回恢复会话所需的字段，会话已被其他请求领取时返回 None。
+    """
+    fields = {column.name: getattr(session, column.name) for column in UploadSession.__table__.columns}
+    claimed = UploadSession.query.filter_by(id=session.id).delete(synchronize_session=False)
+    db.session.commit()
+    return fields if claimed else None
+
+
+@uploads_bp.route('/<upload_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_upload(upload_id):
+    """完成上传，交给图片处理流程"""
+    session = UploadSession.query.get_or_404(upload_id)
+    data = request.get_json(silent=True) or {}
+    part_path = _part_path(session)
+
+    if _received(session) != session.total_size:
+        return jsonify({'message': '文件尚未上传完整', **_status(session)}), 409
+
+    # 客户端重试 complete（如代理超时）时，两个请求不能同时处理同一个 .part 文件
+    fields = _claim(session)
+    if fields is None:
+        return jsonify({'message': '上传正在完成或已完成'}), 409
+
+    try:
+        content_hash = hash_file(part_path)
+        asset, job = acquire(content_hash, part_path, fields['ext'])
+
+        params = json.loads(fields['params'] or '{}')
+        if fields['kind'] == 'gallery':
+            target = GalleryImage(
+                original_name=fields['original_name'],
+                title=params.get('title', ''),
+                title_en=params.get('title_en', ''),
+                alt=params.get('alt', ''),
+                order_index=next_rank(GalleryImage),
+                is_visible=True
+            )
+        else:
+            jewelry_id = int(params['jewelry_id']) if params.get('jewelry_id') else None
+            target = Image(
+                original_name=fields['original_name'],
+                jewelry_id=jewelry_id,
+                order_index=next_rank(Image, 'jewelry_id', jewelry_id) if jewelry_id else 0
+            )
+        apply_asset(target, asset)
+        db.session.add(target)
+        invalidate()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # .part 文件仍在时恢复会话，客户端可以重新 complete
+        if os.path.exists(part_path):
+            db.session.add(UploadSession(**fields))
+            db.session.commit()
+        raise
+
+    if job and (data.get('wait') or current_app.config['IMAGE_JOBS_INLINE']):
+        run_inline([job])
+
+    return jsonify({
+        'message': '上传成功',
+        'image': target.to_dict()
+    }), 201
+
+
+@uploads_bp.route('/<upload_id>', methods=['DELETE'])
+@jwt_required()
+def abort_upload(upload_id):
+    """取消上传"""
+    session = UploadSession.query.get_or_404(upload_id)
+    part_path = _part_path(session)
+    db.session.delete(session)
+    db.session.commit()
+
+    if os.path.exists(part_path):
+        os.remove(part_path)
+
+    return jsonify({'message': '已取消上传'})
@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
-from deep_translator import GoogleTranslator
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from translation import translate_many
 
 utils_bp = Blueprint('utils', __name__)
 
@@ -14,10 +17,31 @@ def translate_text():
     if not text:
         return jsonify({'translatedText': ''})
     
-    try:
-        # 使用 deep-translator 进行翻译
-        translated = GoogleTranslator(source='zh-CN', target='en').translate(text)
-        return jsonify({'translatedText': translated})
-    except Exception as e:
-        print(f"翻译出错: {str(e)}")
-        return jsonify({'error': '翻译失败', 'details': str(e)}), 500
+    translations, errors = translate_many([text])
+    if errors:
+        print(f"翻译出错: {errors[text]}")
+        return jsonify({'error': '翻译失败', 'details': errors[text]}), 500
+    return jsonify({'translatedText': translations[0]})
+
+
+@utils_bp.route('/translate/batch', methods=['POST'])
+@jwt_required()
+def translate_batch():
+    """批量翻译文字 (中文 -> 英文)，只有未缓存的文字会请求翻译服务"""
+    data = request.get_json() or {}
+    texts = data.get('texts', [])
+    
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return jsonify({'message': 'texts 必须是字符串数组'}), 400
+    if len(texts) > current_app.config['TRANSLATE_BATCH_LIMIT']:
+        return jsonify({'message': '一次翻译的文字过多'}), 400
+    
+    translations, errors = translate_many(texts)
+    for text, error in errors.items():
+        print(f"翻译出错: {error}")
+    
+    # 部分失败时仍返回成功的译文，失败的位置为 null
+    return jsonify({
+        'translations': translations,
+        'failed': len(errors)
+    })
@@ -0,0 +1,171 @@
+"""饰品全文搜索
+
+jewelry_fts 为 FTS5 虚拟表（trigram 分词，支持中文子串匹配），索引饰品的
+中英文名称和描述，由 jewelry.py 在创建 / 更新 / 删除饰品时同步。
+trigram 至少需要 3 个字符，较短的关键词（如“珍珠”）改用 LIKE 匹配。
+两种匹配方式使用同一个相关度：按关键词出现的字段加权计分（名称高于描述），
+同分按 id 排列，输入第三个字符时结果顺序不会跳变，(相关度, id) 游标也对两者都有效。
+
+搜索结果、结果总数和各分类的数量由同一条 SQL 查询返回。
+"""
+from sqlalchemy import text
+
+from models import db
+from pagination import encode_cursor, decode_cursor, MAX_LIMIT
+
+FTS_TABLE = 'jewelry_fts'
+FTS_COLUMNS = ('name', 'name_en', 'description', 'description_en')
+# 相关度中各列的权重：名称匹配比描述匹配更相关
+COLUMN_WEIGHTS = (10, 10, 1, 1)
+MIN_TRIGRAM = 3
+
+_available = False
+
+
+def create_index(conn):
+    """创建 FTS5 表并导入已有饰品（用于数据库迁移）"""
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        f"USING fts5({', '.join(FTS_COLUMNS)}, tokenize='trigram')"
+    )
+    conn.exec_driver_sql(f"DELETE FROM {FTS_TABLE}")
+    conn.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+        f"SELECT id, {', '.join(FTS_COLUMNS)} FROM jewelry"
+    )
+
+
+def fts_available():
+    """FTS5 表是否已创建（SQLite 未编译 FTS5 时退回 LIKE 搜索）"""
+    global _available
+    if not _available:
+        _available = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE}
+        ).first() is not None
+    return _available
+
+
+def index_jewelry(jewelry):
+    """写入或更新饰品的索引（在调用方的事务中，需要已有 id）"""
+    index_many([jewelry])
+
+
+def index_many(items):
+    """批量写入或更新多个饰品的索引"""
+    if not items or not fts_available():
+        return
+    remove_many([jewelry.id for jewelry in items])
+    db.session.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+             f"VALUES (:id, {', '.join(':' + column for column in FTS_COLUMNS)})"),
+        [
+            {'id': jewelry.id, **{column: getattr(jewelry, column) or '' for column in FTS_COLUMNS}}
+            for jewelry in items
+        ]
+    )
+
+
+def remove_jewelry(jewelry_id):
+    remove_many([jewelry_id])
+
+
+def remove_many(jewelry_ids):
+    if not jewelry_ids or not fts_available():
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{'id': i} for i in jewelry_ids])
+
+
+def _terms(query):
+    return [term for term in query.split() if term]
+
+
+def _rank_sql(terms, params, prefix=''):
+    """相关度排序值（越小越靠前）：每个关键词在各列中出现时累加该列的权重"""
+    scores = []
+    for i, term in enumerate(terms):
+        params[f'like{i}'] = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        scores.extend(
+            f"{weight} * (COALESCE({prefix}{column}, '') LIKE :like{i} ESCAPE '\\')"
+            for column, weight in zip(FTS_COLUMNS, COLUMN_WEIGHTS)
+        )
+    return f"-CAST({' + '.join(scores)} AS REAL)"
+
+
+def _matched_sql(terms, params):
+    """匹配的饰品及其排序值（越小越靠前）"""
+    if fts_available() and all(len(term) >= MIN_TRIGRAM for term in terms):
+        # 每个关键词作为短语，多个关键词同时匹配
+        params['match'] = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+        return f"""
+            SELECT j.id, j.category, {_rank_sql(terms, params, 'j.')} AS rank
+            FROM {FTS_TABLE} JOIN jewelry j ON j.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH :match AND j.is_visible = 1
+        """
+
+    rank = _rank_sql(terms, params)
+    conditions = []
+    for i in range(len(terms)):
+        conditions.append('(' + ' OR '.join(
+            f"{column} LIKE :like{i} ESCAPE '\\'" for column in FTS_COLUMNS
+        ) + ')')
+    return f"""
+        SELECT id, category, {rank} AS rank
+        FROM jewelry
+        WHERE is_visible = 1 AND {' AND '.join(conditions)}
+    """
+
+
+def search(query, category=None, cursor=None, limit=20):
+    """搜索饰品，返回 (饰品 id 列表, 下一页游标, 结果总数, {分类: 数量})
+
+    分类数量不受 category 筛选影响，用于显示各分类下的结果数。
+    """
+    terms = _terms(query)
+    if not terms:
+        return [], None, 0, {}
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    params = {'category': category, 'limit': limit + 1}
+    after = ''
+    if cursor:
+        params['after_rank'], params['after_id'] = decode_cursor(cursor, [None, None])
+        after = 'WHERE rank > :after_rank OR (rank = :after_rank AND id > :after_id)'
+
+    sql = f"""
+        WITH matched AS ({_matched_sql(terms, params)}),
+        filtered AS (
+            SELECT id, rank FROM matched
+            WHERE :category IS NULL OR (',' || category || ',') LIKE '%,' || :category || ',%'
+        )
+        SELECT * FROM (
+            SELECT 'hit' AS kind, id, rank, NULL AS category, NULL AS count
+            FROM filtered {after}
+            ORDER BY rank, id LIMIT :limit
+        )
+        UNION ALL
+        SELECT 'total', NULL, NULL, NULL, COUNT(*) FROM filtered
+        UNION ALL
+        SELECT 'facet', NULL, NULL, facet.value, COUNT(*)
+        FROM matched, json_each('["' || replace(replace(replace(matched.category, '\\', ''), '"', ''), ',', '","') || '"]') AS facet
+        WHERE facet.value != ''
+        GROUP BY facet.value
+    """
+    hits = []
+    total = 0
+    facets = {}
+    for row in db.session.execute(text(sql), params):
+        if row.kind == 'hit':
+            hits.append((row.id, row.rank))
+        elif row.kind == 'total':
+            total = row.count
+        else:
+            facets[row.category] = row.count
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor([hits[-1][1], hits[-1][0]])
+
+    ids = [jewelry_id for jewelry_id, _ in hits]
+    return ids, next_cursor, total, facets
@@ -0,0 +1,112 @@
+import json
+import mimetypes
+import os
+import re
+
+from flask import abort, current_app, send_file, send_from_directory
+from werkzeug.security import safe_join
+
+from models import ImageAsset
+from image_pipeline import PILLOW_AVAILABLE, render_width
+from storage import current_storage, key_from_url
+
+# 内容寻址（哈希 / uuid 命名）的文件内容永不改变，可长期缓存
+IMMUTABLE_NAME = re.compile(r'^(?:thumb_)?(?:gallery_)?[0-9a-f]{32}(?:_w\d+)?\.(?:webp|jpg|png)$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# 按需缩放的文件名（不含扩展名）
+RESIZE_STEM = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def is_immutable(filename):
+    return bool(IMMUTABLE_NAME.match(os.path.basename(filename)))
+
+
+def send_upload(storage, filename):
+    """发送上传的文件
+
+    本地存储时 UPLOADS_ACCEL 为 x-accel 返回 X-Accel-Redirect 由 nginx 直接发送文件，
+    为 x-sendfile 时返回 X-Sendfile；否则由 Flask 发送（支持条件请求与 Range）。
+    """
+    immutable = is_immutable(filename)
+    mode = current_app.config['UPLOADS_ACCEL']
+
+    if not storage.local:
+        if not storage.exists(filename):
+            abort(404)
+        response = send_file(
+            storage.open(filename),
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+            max_age=31536000 if immutable else None
+        )
+    elif mode == 'x-accel':
+        filepath = safe_join(storage.root, filename)
+        if filepath is None or not os.path.isfile(filepath):
+            abort(404)
+        response = current_app.response_class()
+        response.headers['X-Accel-Redirect'] = current_app.config['UPLOADS_ACCEL_PREFIX'].rstrip('/') + '/' + filename
+        response.headers['Content-Type'] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    else:
+        # send_file 会在 USE_X_SENDFILE 开启时改为返回 X-Sendfile
+        response = send_from_directory(storage.root, filename, max_age=31536000 if immutable else None)
+
+    if immutable:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def find_master(stem):
+    """查找用于缩放的原图的存储键
+
+    优先使用上传的原图，原图不存在时使用图片文件中最大的版本（避免有损格式重复压缩）。
+    """
+    storage = current_storage()
+    names = [f'{stem}.{ext}' for ext in ('webp', 'jpg', 'png')]
+    # 分目录的键，以及尚未迁移的平铺文件
+    candidates = [storage.key_for(name) for name in names] + names
+    asset = ImageAsset.query.filter(ImageAsset.filename.in_(candidates)).first()
+    if asset and asset.status == 'ready':
+        if asset.original and storage.exists(asset.original):
+            return asset.original
+        variants = json.loads(asset.variants) if asset.variants else []
+        if variants:
+            largest = max(variants, key=lambda variant: variant['width'])
+            return key_from_url(largest['path'])
+        return asset.filename
+
+    for candidate in candidates:
+        if storage.exists(candidate):
+            return candidate
+    return None
+
+
+def send_resized(width, filename):
+    """按白名单中的宽度和格式返回缩放后的图片，结果保存在磁盘 LRU 缓存中"""
+    stem, _, fmt = filename.rpartition('.')
+    if (width not in current_app.config['RESIZE_WIDTHS']
+            or fmt not in current_app.config['RESIZE_FORMATS']
+            or not RESIZE_STEM.match(stem)
+            or not PILLOW_AVAILABLE):
+        abort(404)
+
+    def render(dest):
+        master = find_master(stem)
+        if master is None or not current_storage().exists(master):
+            raise FileNotFoundError(stem)
+        with current_storage().workspace(master) as filepath:
+            render_width(filepath, dest, width, fmt)
+
+    cache = current_app.extensions['resize_cache']
+    key = f'{stem}_r{width}.{fmt}'
+    try:
+        cache.get_or_render(key, render)
+    except FileNotFoundError:
+        abort(404)
+
+    response = send_from_directory(cache.directory, key, max_age=31536000)
+    if is_immutable(f'{stem}.webp'):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
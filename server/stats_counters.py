@@ -0,0 +1,148 @@
+"""后台统计计数
+
+饰品总数、可见饰品数和图片总数保存在 counters 表中，由 Jewelry / Image 的
+ORM 事件在同一事务中增减，/api/admin/stats 只需按主键读取，不再每次 COUNT(*)。
+
+绕过 ORM 的批量写入（Query.update / delete、原生 SQL）不会触发事件，
+计数出现偏差时执行：
+
+    python stats_counters.py reconcile
+"""
+import argparse
+import os
+import sys
+
+from sqlalchemy import event, func, inspect
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from models import db, Counter, Jewelry, Image
+
+JEWELRY_COUNT = 'jewelry_count'
+JEWELRY_VISIBLE = 'jewelry_visible'
+IMAGE_COUNT = 'image_count'
+
+KEYS = (JEWELRY_COUNT, JEWELRY_VISIBLE, IMAGE_COUNT)
+
+
+def _bump(connection, key, delta):
+    table = Counter.__table__
+    updated = connection.execute(
+        table.update().where(table.c.key == key).values(value=table.c.value + delta)
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert().values(key=key, value=delta))
+
+
+def _jewelry_inserted(mapper, connection, target):
+    _bump(connection, JEWELRY_COUNT, 1)
+    if target.is_visible:
+        _bump(connection, JEWELRY_VISIBLE, 1)
+
+
+def _jewelry_deleted(mapper, connection, target):
+    _bump(connection, JEWELRY_COUNT, -1)
+    if target.is_visible:
+        _bump(connection, JEWELRY_VISIBLE, -1)
+
+
+def _jewelry_updated(mapper, connection, target):
+    history = inspect(target).attrs.is_visible.history
+    if not history.has_changes():
+        return
+    before = bool(history.deleted[0]) if history.deleted else False
+    after = bool(target.is_visible)
+    if before != after:
+        _bump(connection, JEWELRY_VISIBLE, 1 if after else -1)
+
+
+def _image_inserted(mapper, connection, target):
+    _bump(connection, IMAGE_COUNT, 1)
+
+
+def _image_deleted(mapper, connection, target):
+    _bump(connection, IMAGE_COUNT, -1)
+
+
+LISTENERS = [
+    (Jewelry, 'after_insert', _jewelry_inserted),
+    (Jewelry, 'after_delete', _jewelry_deleted),
+    (Jewelry, 'after_update', _jewelry_updated),
+    (Image, 'after_insert', _image_inserted),
+    (Image, 'after_delete', _image_deleted),
+]
+
+
+def register():
+    """注册计数事件（可重复调用）"""
+    for model, name, listener in LISTENERS:
+        if not event.contains(model, name, listener):
+            event.listen(model, name, listener)
+
+
+def actual_counts(connection):
+    return {
+        JEWELRY_COUNT: connection.execute(
+            db.select(func.count()).select_from(Jewelry.__table__)
+        ).scalar(),
+        JEWELRY_VISIBLE: connection.execute(
+            db.select(func.count()).select_from(Jewelry.__table__).where(Jewelry.__table__.c.is_visible.is_(True))
+        ).scalar(),
+        IMAGE_COUNT: connection.execute(
+            db.select(func.count()).select_from(Image.__table__)
+        ).scalar(),
+    }
+
+
+def reconcile(connection):
+    """按实际行数重写计数，返回 {key: (原值, 实际值)}（只包含有偏差的计数）"""
+    table = Counter.__table__
+    stored = {
+        row.key: row.value
+        for row in connection.execute(db.select(table).where(table.c.key.in_(KEYS)))
+    }
+    drift = {}
+    for key, value in actual_counts(connection).items():
+        if stored.get(key) == value:
+            continue
+        drift[key] = (stored.get(key), value)
+        if key in stored:
+            connection.execute(table.update().where(table.c.key == key).values(value=value))
+        else:
+            connection.execute(table.insert().values(key=key, value=value))
+    return drift
+
+
+def read_counts():
+    """一次主键查询读取全部计数"""
+    rows = Counter.query.filter(Counter.key.in_(KEYS)).all()
+    counts = dict.fromkeys(KEYS, 0)
+    counts.update({row.key: row.value for row in rows})
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='后台统计计数')
+    parser.add_argument('command', choices=['reconcile', 'check'],
+                        help='reconcile: 按实际行数修正计数；check: 只检查不修改')
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            if args.command == 'reconcile':
+                drift = reconcile(conn)
+            else:
+                stored = read_counts()
+                drift = {
+                    key: (stored[key], value)
+                    for key, value in actual_counts(conn).items() if stored[key] != value
+                }
+        if not drift:
+            print('计数正确')
+        for key, (stored, actual) in drift.items():
+            print(f"{key}: {stored} -> {actual}")
+
+
+if __name__ == '__main__':
+    main()
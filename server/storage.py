@@ -0,0 +1,205 @@
+"""上传文件存储
+
+数据库中的 filename 保存文件的存储键（相对路径），path / thumb_path / variants
+中保存对外的 URL（/uploads/<键>）。
+
+- LocalStorage：保存在 UPLOAD_FOLDER 下，按文件名中的内容哈希分两级子目录
+  （ab/cd/<哈希>.webp），避免单个目录中文件过多。同一张图片的原图、缩略图和
+  多宽度版本文件名中哈希相同，位于同一目录。没有子目录的键（旧的平铺文件）
+  仍然可以读取，执行 migrate_storage.py 迁移到分目录结构。
+- MemoryStorage：保存在进程内存中，用于测试（STORAGE_BACKEND=memory），
+  独立的图片处理 worker 无法访问，需同时设置 IMAGE_JOBS_INLINE=true。
+
+分片上传的 .part 文件等临时文件始终直接写在 UPLOAD_FOLDER 中。
+"""
+import hashlib
+import io
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+
+from flask import current_app
+from werkzeug.security import safe_join
+
+URL_PREFIX = '/uploads/'
+# 内容寻址的文件名中的哈希（sha256 前 32 位或 uuid）
+HASH_IN_NAME = re.compile(r'[0-9a-f]{32}')
+
+
+def url_for_key(key):
+    return URL_PREFIX + key
+
+
+def key_from_url(path):
+    """由 /uploads/... 形式的 URL 得到存储键"""
+    if not path:
+        return None
+    if path.startswith(URL_PREFIX):
+        return path[len(URL_PREFIX):]
+    return os.path.basename(path)
+
+
+def shard_prefix(name, depth):
+    match = HASH_IN_NAME.search(name)
+    digest = match.group(0) if match else hashlib.md5(name.encode()).hexdigest()
+    return '/'.join(digest[i * 2:i * 2 + 2] for i in range(depth))
+
+
+class Storage:
+    """存储后端的公共部分"""
+    local = False
+
+    def __init__(self, depth=2):
+        self.depth = depth
+
+    def key_for(self, name):
+        """新文件的存储键"""
+        if not self.depth:
+            return name
+        return f"{shard_prefix(name, self.depth)}/{name}"
+
+    def sibling(self, key, name):
+        """与 key 位于同一目录的文件的键（处理结果与原图放在一起）"""
+        return posixpath.join(posixpath.dirname(key), name)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+
+class LocalStorage(Storage):
+    local = True
+
+    def __init__(self, root, depth=2):
+        super().__init__(depth)
+        self.root = root
+
+    def path(self, key):
+        filepath = safe_join(self.root, key)
+        if filepath is None:
+            raise ValueError(f'无效的存储键: {key}')
+        return filepath
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def size(self, key):
+        return os.path.getsize(self.path(key))
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def put_file(self, key, source):
+        """将本地文件移动到 key（source 需与存储目录在同一磁盘）"""
+        dest = self.path(key)
+        # upload_gc 会删除空的分目录，目录在创建后被删除时重试一次
+        for attempt in range(2):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            try:
+                os.replace(source, dest)
+                return
+            except FileNotFoundError:
+                if attempt or not os.path.exists(source):
+                    raise
+
+    def put_bytes(self, key, data):
+        dest = self.path(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        temp_path = f"{dest}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'wb') as out:
+            out.write(data)
+        os.replace(temp_path, dest)
+
+    def delete(self, key):
+        filepath = self.path(key)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+    @contextmanager
+    def workspace(self, key):
+        """返回 key 对应的本地文件路径；在同一目录中生成的文件即保存在 key 所在目录"""
+        yield self.path(key)
+
+    def iter_keys(self):
+        """遍历所有文件的键（跳过 . 开头的目录，如隔离目录）"""
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+            relative = os.path.relpath(dirpath, self.root)
+            for filename in filenames:
+                yield filename if relative == '.' else posixpath.join(relative.replace(os.sep, '/'), filename)
+
+
+class MemoryStorage(Storage):
+    def __init__(self, depth=2):
+        super().__init__(depth)
+        self.files = {}
+        self._lock = threading.Lock()
+
+    def exists(self, key):
+        return key in self.files
+
+    def size(self, key):
+        return len(self.files[key])
+
+    def open(self, key):
+        try:
+            return io.BytesIO(self.files[key])
+        except KeyError:
+            raise FileNotFoundError(key) from None
+
+    def put_file(self, key, source):
+        with open(source, 'rb') as f:
+            self.put_bytes(key, f.read())
+        os.remove(source)
+
+    def put_bytes(self, key, data):
+        with self._lock:
+            self.files[key] = bytes(data)
+
+    def delete(self, key):
+        with self._lock:
+            self.files.pop(key, None)
+
+    @contextmanager
+    def workspace(self, key):
+        """将文件写入临时目录供 Pillow 处理，退出时保存目录中新生成的文件"""
+        if key not in self.files:
+            raise FileNotFoundError(key)
+        directory = tempfile.mkdtemp()
+        try:
+            name = posixpath.basename(key)
+            filepath = os.path.join(directory, name)
+            with open(filepath, 'wb') as out:
+                out.write(self.files[key])
+            yield filepath
+            for output in os.listdir(directory):
+                if output != name:
+                    with open(os.path.join(directory, output), 'rb') as f:
+                        self.put_bytes(self.sibling(key, output), f.read())
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def iter_keys(self):
+        return iter(sorted(self.files))
+
+
+BACKENDS = {
+    'local': lambda config: LocalStorage(config['UPLOAD_FOLDER'], config['STORAGE_SHARD_DEPTH']),
+    'memory': lambda config: MemoryStorage(config['STORAGE_SHARD_DEPTH']),
+}
+
+
+def create_storage(config):
+    backend = config['STORAGE_BACKEND']
+    if backend not in BACKENDS:
+        raise ValueError(f'未知的存储后端: {backend}')
+    return BACKENDS[backend](config)
+
+
+def current_storage():
+    return current_app.extensions['storage']
@@ -0,0 +1,134 @@
+"""数据库并发压力测试
+
+在多个进程中同时运行读请求（公开接口）和写请求（访问统计、后台编辑），
+模拟多个 gunicorn worker，统计吞吐量、延迟和 "database is locked" 错误。
+
+    python stress_db.py --readers 4 --writers 4 --duration 10
+    SQLITE_JOURNAL_MODE=DELETE python stress_db.py   # 对比默认日志模式
+
+默认使用临时数据库文件，不影响 instance/database.sqlite。
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+READ_PATHS = ['/api/jewelry', '/api/gallery', '/api/pages/home']
+
+
+def _login(client):
+    res = client.post('/api/auth/login', json={'username': 'admin', 'password': 'pearl2024'})
+    data = res.get_json() or {}
+    return {'Authorization': f"Bearer {data.get('token')}"}
+
+
+def _reader(client, headers, n):
+    return client.get(READ_PATHS[n % len(READ_PATHS)])
+
+
+def _writer(client, headers, n):
+    if n % 10 == 0:
+        # 后台编辑（会递增内容版本号，使读缓存失效）
+        return client.put('/api/pages/about', json={'content': json.dumps({'title': f'stress {n}'})}, headers=headers)
+    return client.post('/api/analytics/track', json={'path': f'/stress/{n % 20}', 'visitor_id': f'v{n % 50}'})
+
+
+def worker(role, duration, results):
+    # 屏蔽启动信息
+    sys.stdout = open(os.devnull, 'w')
+    from app import create_app
+
+    app = create_app()
+    # 让异常直接抛出，以便区分 "database is locked"
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    client = app.test_client()
+    headers = _login(client)
+    action = _reader if role == 'reader' else _writer
+
+    ops = errors = locked = 0
+    latencies = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            res = action(client, headers, ops)
+            if res.status_code >= 500:
+                errors += 1
+        except Exception as e:
+            errors += 1
+            if 'database is locked' in str(e):
+                locked += 1
+        latencies.append(time.monotonic() - started)
+        ops += 1
+
+    results.put((role, ops, errors, locked, latencies))
+
+
+def percentile(values, p):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多进程读写并发压力测试')
+    parser.add_argument('--readers', type=int, default=4, help='读进程数')
+    parser.add_argument('--writers', type=int, default=4, help='写进程数')
+    parser.add_argument('--duration', type=float, default=10, help='运行时长（秒）')
+    parser.add_argument('--database-url', help='数据库地址（默认使用临时 SQLite 文件）')
+    args = parser.parse_args()
+
+    temp_dir = None
+    if not args.database_url:
+        temp_dir = tempfile.mkdtemp(prefix='pearl-stress-')
+        args.database_url = f"sqlite:///{os.path.join(temp_dir, 'stress.sqlite')}"
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['ANALYTICS_BUFFERED'] = 'false'
+
+    # 先在主进程中建表和初始化数据，避免多个进程同时建表
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    from app import create_app
+    from db_migrate import upgrade
+    upgrade(create_app())
+    sys.stdout = stdout
+
+    print(f"数据库: {args.database_url}")
+    print(f"日志模式: {os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')}, "
+          f"{args.readers} 个读进程, {args.writers} 个写进程, {args.duration:.0f} 秒")
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(role, args.duration, results))
+        for role in ['reader'] * args.readers + ['writer'] * args.writers
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    for role in ('reader', 'writer'):
+        rows = [row for row in collected if row[0] == role]
+        if not rows:
+            continue
+        ops = sum(row[1] for row in rows)
+        errors = sum(row[2] for row in rows)
+        locked = sum(row[3] for row in rows)
+        latencies = [latency for row in rows for latency in row[4]]
+        print(f"{role:>6}: {ops} 次 ({ops / args.duration:.0f}/s), 错误 {errors}（其中 locked {locked}）, "
+              f"p50 {percentile(latencies, 0.5) * 1000:.1f}ms, p99 {percentile(latencies, 0.99) * 1000:.1f}ms")
+
+    if temp_dir:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """使用临时 SQLite 文件和内存存储的应用"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.sqlite'}")
+    monkeypatch.setenv('RESIZE_CACHE_FOLDER', str(tmp_path / 'resize_cache'))
+    monkeypatch.setenv('STORAGE_BACKEND', 'memory')
+    monkeypatch.setenv('IMAGE_JOBS_INLINE', 'true')
+    monkeypatch.setenv('ANALYTICS_BUFFERED', 'false')
+    monkeypatch.setenv('TRANSLATOR_BACKEND', 'stub')
+
+    from app import create_app
+    from db_migrate import upgrade
+
+    app = create_app()
+    app.config['TESTING'] = True
+    upgrade(app)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    res = client.post('/api/auth/login', json={'username': 'admin', 'password': 'pearl2024'})
+    return {'Authorization': f"Bearer {res.get_json()['token']}"}
+
+
+@pytest.fixture
+def upload_image(client, auth_headers):
+    """上传一张 JPEG（内容由 seed 决定），返回接口返回的图片记录"""
+    PILImage = pytest.importorskip('PIL.Image')
+    import io
+    import random
+
+    def upload(seed=0, size=(1600, 1200)):
+        rng = random.Random(seed)
+        image = PILImage.new('RGB', size, tuple(rng.randrange(256) for _ in range(3)))
+        out = io.BytesIO()
+        image.save(out, 'JPEG', quality=90)
+        res = client.post('/api/upload', headers=auth_headers, content_type='multipart/form-data', data={
+            'images': (io.BytesIO(out.getvalue()), f"test-{seed}.jpg"),
+            'wait': 'true',
+        })
+        assert res.status_code == 201
+        return res.get_json()['images'][0]
+
+    return upload
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import analytics_buffer
+from analytics_buffer import DROPPED_COUNTER, PageViewBuffer
+from models import db, Counter, PageView
+
+
+def events(count):
+    return [{'page_path': '/', 'visitor_id': f"v{n}", 'created_at': datetime.utcnow()} for n in range(count)]
+
+
+def fail(batch):
+    raise RuntimeError('database is locked')
+
+
+def test_failed_flush_is_counted_as_dropped(app, monkeypatch):
+    buffer = PageViewBuffer(app)
+    buffer._pending_dropped = 2
+    monkeypatch.setattr(analytics_buffer, 'apply_events', fail)
+    buffer._flush(events(3))
+    assert PageView.query.count() == 0
+    assert db.session.get(Counter, DROPPED_COUNTER) is None
+
+    monkeypatch.undo()
+    buffer._flush(events(1))
+    assert PageView.query.count() == 1
+    assert db.session.get(Counter, DROPPED_COUNTER).value == 5
+    assert buffer.dropped == 3
+
+
+def test_failed_flush_is_logged(app, monkeypatch, caplog):
+    monkeypatch.setattr(analytics_buffer, 'apply_events', fail)
+    PageViewBuffer(app)._flush(events(1))
+    assert '写入访问记录失败（1 条）' in caplog.text
@@ -0,0 +1,89 @@
+from argparse import Namespace
+from datetime import datetime, timedelta
+
+import pytest
+
+import analytics_maintenance
+from analytics_rollup import ALL_PAGES, rebuild
+from models import db, PageView, PageViewDaily
+
+EVENTS = 100
+
+
+@pytest.fixture
+def old_day(app):
+    """保留期之前的一天，100 个访客各访问一次，已计入日汇总"""
+    created_at = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=200)
+    db.session.add_all(
+        PageView(page_path='/', visitor_id=f"v{i}", created_at=created_at + timedelta(seconds=i))
+        for i in range(EVENTS)
+    )
+    db.session.commit()
+    rebuild()
+    db.session.commit()
+    return created_at.date()
+
+
+def site_row(day):
+    return db.session.get(PageViewDaily, (day, ALL_PAGES))
+
+
+def prune_args():
+    return Namespace(days=90, batch_size=60, pause=0, vacuum='none')
+
+
+def interrupt_after_first_batch(monkeypatch):
+    original = analytics_maintenance.delete_in_batches
+
+    def delete_one_batch(model, condition, batch_size, pause):
+        table = model.__table__
+        rowid = db.literal_column('rowid')
+        batch = db.select(rowid).select_from(table).where(condition).limit(batch_size)
+        db.session.execute(table.delete().where(rowid.in_(batch)))
+        db.session.commit()
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(analytics_maintenance, 'delete_in_batches', delete_one_batch)
+    return original
+
+
+def test_interrupted_prune_keeps_rollup(app, old_day, monkeypatch):
+    original = interrupt_after_first_batch(monkeypatch)
+    with pytest.raises(KeyboardInterrupt):
+        analytics_maintenance.prune(prune_args())
+    assert PageView.query.count() == EVENTS - 60
+
+    monkeypatch.setattr(analytics_maintenance, 'delete_in_batches', original)
+    analytics_maintenance.prune(prune_args())
+
+    row = site_row(old_day)
+    assert (row.pv, row.uv) == (EVENTS, EVENTS)
+    assert PageView.query.count() == 0
+
+
+def test_backfill_skips_partially_pruned_day(app, old_day, monkeypatch):
+    interrupt_after_first_batch(monkeypatch)
+    with pytest.raises(KeyboardInterrupt):
+        analytics_maintenance.prune(prune_args())
+
+    analytics_maintenance.backfill(Namespace(since=None))
+    analytics_maintenance.backfill(Namespace(since=(old_day - timedelta(days=1)).isoformat()))
+
+    row = site_row(old_day)
+    assert (row.pv, row.uv) == (EVENTS, EVENTS)
+
+
+def test_aggregate_only_adds_missing_events(app, old_day):
+    # 没有清理边界时（旧版本中断的清理），原始记录少于汇总的日期也不重建
+    PageView.query.filter(PageView.visitor_id.in_([f"v{i}" for i in range(60)])).delete()
+    db.session.commit()
+    cutoff = datetime.utcnow() - timedelta(days=90)
+    analytics_maintenance.aggregate_before(cutoff)
+    assert site_row(old_day).pv == EVENTS
+
+    # 原始记录多于汇总时补算
+    created_at = datetime.combine(old_day, datetime.min.time())
+    db.session.add_all(PageView(page_path='/', visitor_id=f"n{i}", created_at=created_at) for i in range(EVENTS))
+    db.session.commit()
+    analytics_maintenance.aggregate_before(cutoff)
+    assert site_row(old_day).pv == EVENTS + EVENTS - 60
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from analytics_rollup import apply_events, rebuild
+from models import db, PageView, PageViewDaily
+
+PATHS = ['/', '/gallery', '/about']
+
+
+def daily_rows():
+    return sorted((row.day, row.page_path, row.pv, row.uv) for row in PageViewDaily.query)
+
+
+def test_incremental_rollup_matches_rebuild(app, client):
+    for i in range(60):
+        res = client.post('/api/analytics/track', json={'path': PATHS[i % 3], 'visitor_id': f"v{i % 7}"})
+        assert res.status_code == 200
+    client.post('/api/analytics/track', json={'path': '/'})
+
+    incremental = daily_rows()
+    rebuild()
+    db.session.commit()
+    assert incremental == daily_rows()
+    assert {path: (pv, uv) for _, path, pv, uv in incremental}['*'] == (61, 7)
+
+
+def test_batch_with_repeated_visitors(app):
+    now = datetime.utcnow()
+    events = [
+        {'page_path': PATHS[i % 3], 'visitor_id': f"v{i % 400}", 'created_at': now}
+        for i in range(1000)
+    ]
+    db.session.add_all(PageView(**event) for event in events)
+    apply_events(events)
+    apply_events(events[:10])
+    db.session.add_all(PageView(**event) for event in events[:10])
+    db.session.commit()
+
+    incremental = daily_rows()
+    rebuild()
+    db.session.commit()
+    assert incremental == daily_rows()
+
+
+def test_track_does_not_recount_visitors(app, client):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lower())
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        client.post('/api/analytics/track', json={'path': '/', 'visitor_id': 'v1'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert not any('count(' in statement for statement in statements)
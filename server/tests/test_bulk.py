@@ -0,0 +1,82 @@
+import cache
+import search
+import stats_counters
+from models import db, Image, Jewelry
+from storage import current_storage, key_from_url
+
+
+def create(client, auth_headers, name, **data):
+    res = client.post('/api/jewelry', headers=auth_headers, json={'name': name, **data})
+    assert res.status_code == 201
+    return res.get_json()['id']
+
+
+def test_invalid_operation_rolls_back_jewelry_batch(client, auth_headers):
+    kept = create(client, auth_headers, '珍珠项链')
+    edited = create(client, auth_headers, '银耳环')
+    counts = stats_counters.read_counts()
+    generation = cache.current_generation()
+
+    res = client.post('/api/jewelry/batch', headers=auth_headers, json={'operations': [
+        {'op': 'create', 'data': {'name': '淡水珍珠手链'}},
+        {'op': 'update', 'id': edited, 'data': {'name': '珍珠耳环', 'is_visible': False}},
+        {'op': 'delete', 'id': kept},
+        {'op': 'update', 'id': 999, 'data': {'name': '不存在'}},
+        {'op': 'create', 'data': {'name': 1}},
+    ]})
+
+    assert res.status_code == 400
+    assert [(result['index'], result['status']) for result in res.get_json()['results']] == [
+        (0, 'skipped'), (1, 'skipped'), (2, 'skipped'), (3, 'error'), (4, 'error'),
+    ]
+    db.session.expire_all()
+    assert sorted(row.name for row in Jewelry.query) == ['珍珠项链', '银耳环']
+    assert stats_counters.read_counts() == counts
+    assert cache.current_generation() == generation
+    assert search.search('珍珠项链')[0] == [kept]
+    assert search.search('淡水珍珠')[0] == []
+    assert search.search('珍珠耳环')[0] == []
+
+
+def test_valid_jewelry_batch(client, auth_headers):
+    kept = create(client, auth_headers, '珍珠项链')
+    removed = create(client, auth_headers, '银耳环')
+
+    res = client.post('/api/jewelry/batch', headers=auth_headers, json={'operations': [
+        {'op': 'create', 'data': {'name': '淡水珍珠手链'}},
+        {'op': 'update', 'id': kept, 'data': {'is_visible': False}},
+        {'op': 'delete', 'id': removed},
+    ]})
+
+    assert res.status_code == 200
+    results = res.get_json()['results']
+    assert [(result['op'], result['status']) for result in results] == [
+        ('create', 'ok'), ('update', 'ok'), ('delete', 'ok'),
+    ]
+    assert results[0]['item']['name'] == '淡水珍珠手链'
+    assert stats_counters.read_counts() == {
+        stats_counters.JEWELRY_COUNT: 2, stats_counters.JEWELRY_VISIBLE: 1, stats_counters.IMAGE_COUNT: 0,
+    }
+    assert search.search('淡水珍珠')[0] == [results[0]['id']]
+    assert search.search('银耳环')[0] == []
+
+
+def test_invalid_operation_rolls_back_image_batch(client, auth_headers, upload_image):
+    jewelry_id = create(client, auth_headers, '珍珠项链')
+    first, second = upload_image(seed=1), upload_image(seed=2)
+    counts = stats_counters.read_counts()
+
+    res = client.post('/api/images/batch', headers=auth_headers, json={'operations': [
+        {'op': 'update', 'id': first['id'], 'data': {'jewelry_id': jewelry_id}},
+        {'op': 'delete', 'id': second['id']},
+        {'op': 'update', 'id': first['id'], 'data': {'jewelry_id': 999}},
+    ]})
+
+    assert res.status_code == 400
+    assert [result['status'] for result in res.get_json()['results']] == ['skipped', 'skipped', 'error']
+    db.session.expire_all()
+    assert Image.query.count() == 2
+    assert db.session.get(Image, first['id']).jewelry_id is None
+    assert stats_counters.read_counts() == counts
+    # 图片文件在事务回滚后仍然保留
+    assert current_storage().exists(key_from_url(second['path']))
@@ -0,0 +1,44 @@
+import cache
+from db_migrate import upgrade
+from models import db, Counter, SchemaMigration
+
+
+def test_not_modified_until_a_write(client, auth_headers):
+    res = client.get('/api/jewelry')
+    assert res.status_code == 200
+    etag = res.headers['ETag']
+    assert not etag.startswith('W/')
+
+    res = client.get('/api/jewelry', headers={'If-None-Match': etag})
+    assert res.status_code == 304
+    assert res.headers['ETag'] == etag
+
+    res = client.post('/api/jewelry', headers=auth_headers, json={'name': '珍珠耳钉'})
+    assert res.status_code == 201
+
+    res = client.get('/api/jewelry', headers={'If-None-Match': etag})
+    assert res.status_code == 200
+    assert res.headers['ETag'] != etag
+    assert [item['name'] for item in res.get_json()] == ['珍珠耳钉']
+
+
+def test_generation_does_not_repeat_across_databases(app, client):
+    etag = client.get('/api/jewelry').headers['ETag']
+
+    # 模拟换成另一个（或从备份恢复的）数据库：版本号记录重新生成
+    Counter.query.filter_by(key=cache.CONTENT_GENERATION).delete()
+    SchemaMigration.query.filter_by(version=10).delete()
+    db.session.commit()
+    upgrade(app)
+
+    assert cache.current_generation() != 0
+    assert client.get('/api/jewelry', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_invalidate_changes_generation(app):
+    generations = set()
+    for _ in range(3):
+        cache.invalidate()
+        db.session.commit()
+        generations.add(cache.current_generation())
+    assert len(generations) == 3
@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+import routes.uploads
+from models import Image, UploadSession
+
+
+@pytest.fixture
+def start_upload(app, client, auth_headers, tmp_path):
+    """创建分片上传会话并写入全部内容，返回会话 id"""
+    PILImage = pytest.importorskip('PIL.Image')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+
+    def start():
+        out = io.BytesIO()
+        PILImage.new('RGB', (800, 600), (120, 80, 40)).save(out, 'JPEG')
+        data = out.getvalue()
+        res = client.post('/api/uploads', headers=auth_headers,
+                          json={'filename': 'ring.jpg', 'size': len(data)})
+        assert res.status_code == 201
+        upload_id = res.get_json()['id']
+        res = client.put(f"/api/uploads/{upload_id}?offset=0", headers=auth_headers, data=data)
+        assert res.get_json()['offset'] == len(data)
+        return upload_id
+
+    return start
+
+
+def test_repeated_complete(client, auth_headers, start_upload):
+    upload_id = start_upload()
+    res = client.post(f"/api/uploads/{upload_id}/complete", headers=auth_headers, json={})
+    assert res.status_code == 201
+
+    res = client.post(f"/api/uploads/{upload_id}/complete", headers=auth_headers, json={})
+    assert res.status_code == 404
+    assert Image.query.count() == 1
+
+
+def test_concurrent_complete(app, client, auth_headers, start_upload, monkeypatch):
+    upload_id = start_upload()
+    received = routes.uploads._received
+    responses = []
+
+    def retry_before_claim(session):
+        # 第一个请求检查完文件大小、领取前，客户端的重试请求完成了整个流程（独立的数据库会话）
+        monkeypatch.setattr(routes.uploads, '_received', received)
+        size = received(session)
+        with app.app_context():
+            responses.append(client.post(f"/api/uploads/{upload_id}/complete", headers=auth_headers, json={}))
+        return size
+
+    monkeypatch.setattr(routes.uploads, '_received', retry_before_claim)
+    res = client.post(f"/api/uploads/{upload_id}/complete", headers=auth_headers, json={})
+
+    assert responses[0].status_code == 201
+    assert res.status_code == 409
+    assert Image.query.count() == 1
+    assert UploadSession.query.count() == 0
+
+
+def test_failed_complete_can_be_retried(client, auth_headers, start_upload, monkeypatch):
+    upload_id = start_upload()
+    hash_file = routes.uploads.hash_file
+
+    def fail_once(path):
+        monkeypatch.setattr(routes.uploads, 'hash_file', hash_file)
+        raise OSError('disk error')
+
+    monkeypatch.setattr(routes.uploads, 'hash_file', fail_once)
+    with pytest.raises(OSError):
+        client.post(f"/api/uploads/{upload_id}/complete", headers=auth_headers, json={})
+    assert UploadSession.query.count() == 1
+
+    res = client.post(f"/api/uploads/{upload_id}/complete", headers=auth_headers, json={})
+    assert res.status_code == 201
+    assert Image.query.count() == 1
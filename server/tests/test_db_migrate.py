@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+from db_migrate import upgrade
+from models import db, PageView, PageViewDaily, PageViewDailyVisitor, SchemaMigration
+
+
+def test_upgrade_rolls_up_existing_page_views(app, client, auth_headers):
+    # 模拟在迁移 9 之前已有访问记录、还没有日汇总的数据库
+    SchemaMigration.query.filter_by(version=9).delete()
+    PageViewDaily.query.delete()
+    PageViewDailyVisitor.query.delete()
+    now = datetime.utcnow()
+    db.session.add_all(
+        PageView(page_path=path, visitor_id=visitor, created_at=now - timedelta(days=days))
+        for path, visitor, days in [
+            ('/', 'v1', 0), ('/', 'v2', 0), ('/gallery', 'v1', 0),
+            ('/', 'v1', 1), ('/about', None, 30),
+        ]
+    )
+    db.session.commit()
+
+    upgrade(app)
+
+    stats = client.get('/api/analytics/stats', headers=auth_headers).get_json()
+    assert (stats['todayPV'], stats['todayUV'], stats['totalPV']) == (3, 2, 5)
+    assert stats['topPages'][0] == {'path': '/', 'count': 3}
+    assert {page['path'] for page in stats['topPages']} == {'/', '/gallery', '/about'}
+    assert stats['dailyStats'][-2:] == [
+        {'date': (now - timedelta(days=1)).strftime('%m-%d'), 'pv': 1},
+        {'date': now.strftime('%m-%d'), 'pv': 3},
+    ]
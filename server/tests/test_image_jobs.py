@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from image_jobs import LOCK_TIMEOUT, claim_next, release
+from models import db, Image, ImageAsset, ImageJob
+
+
+@pytest.fixture
+def asset(app):
+    asset = ImageAsset(content_hash='a' * 64, filename='aa/aa/original.jpg', path='/uploads/aa/aa/original.jpg')
+    db.session.add(asset)
+    db.session.add(Image(filename=asset.filename, path=asset.path, content_hash=asset.content_hash,
+                         status='processing'))
+    db.session.commit()
+    return asset
+
+
+def stale_job(asset, attempts):
+    job = ImageJob(kind='asset', target_id=asset.id, filename=asset.filename, status='running',
+                   attempts=attempts, max_attempts=3, locked_at=datetime.utcnow() - LOCK_TIMEOUT * 2)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_stale_job_with_attempts_left_is_reclaimed(asset):
+    job_id = stale_job(asset, attempts=1)
+    job = claim_next()
+    assert job.id == job_id
+    assert (job.status, job.attempts) == ('running', 2)
+
+
+def test_stale_job_out_of_attempts_is_failed(asset):
+    job_id = stale_job(asset, attempts=3)
+    assert claim_next() is None
+
+    job = db.session.get(ImageJob, job_id)
+    assert job.status == 'failed'
+    assert db.session.get(ImageAsset, asset.id).status == 'failed'
+    assert Image.query.one().status == 'failed'
+
+
+def test_release_requeues_job(asset):
+    job_id = stale_job(asset, attempts=1)
+    release(job_id, RuntimeError('database is locked'))
+
+    job = db.session.get(ImageJob, job_id)
+    assert job.status == 'queued'
+    assert job.last_error == 'database is locked'
+    assert job.run_after > datetime.utcnow()
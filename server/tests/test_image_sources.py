@@ -0,0 +1,32 @@
+import json
+
+from image_store import asset_files
+from migrate_images import pick_source
+from models import ImageAsset
+from static_files import find_master
+from storage import current_storage, key_from_url
+
+
+def test_original_is_kept_and_preferred(app, upload_image):
+    image = upload_image()
+    asset = ImageAsset.query.one()
+    storage = current_storage()
+
+    assert asset.original and asset.original.endswith('.jpg')
+    assert asset.original != asset.filename
+    assert storage.exists(asset.original)
+    assert asset.original in asset_files(asset)
+
+    assert pick_source(asset, storage) == asset.original
+    stem = key_from_url(image['path']).rsplit('/', 1)[-1].rsplit('.', 1)[0]
+    assert find_master(stem) == asset.original
+
+
+def test_falls_back_to_largest_variant_without_original(app, upload_image):
+    upload_image()
+    asset = ImageAsset.query.one()
+    storage = current_storage()
+    storage.delete(asset.original)
+
+    largest = max(json.loads(asset.variants), key=lambda variant: variant['width'])
+    assert pick_source(asset, storage) == key_from_url(largest['path'])
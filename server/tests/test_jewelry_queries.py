@@ -0,0 +1,66 @@
+"""饰品读接口的 SQL 语句数不随饰品和图片数量增长（没有 N+1 查询）"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+import cache
+from models import db, Jewelry, Image
+
+IMAGES_PER_ITEM = 3
+# 路径 -> 语句数（内容版本号 + 饰品 + 图片，分页多一条 COUNT）
+PATHS = {
+    '/api/jewelry': 3,
+    '/api/jewelry?page=1&limit=100': 4,
+    '/api/jewelry?cursor=&limit=100': 3,
+    '/api/jewelry?cursor=&limit=100&fields=id,name,cover': 3,
+    '/api/jewelry/1': 3,
+}
+
+
+def add_items(count):
+    start = Jewelry.query.count()
+    for i in range(start, start + count):
+        jewelry = Jewelry(name=f"珍珠 {i}", order_index=i + 1)
+        jewelry.images = [
+            Image(filename=f"{i}_{n}.webp", path=f"/uploads/{i}_{n}.webp", order_index=n)
+            for n in range(IMAGES_PER_ITEM)
+        ]
+        db.session.add(jewelry)
+    db.session.commit()
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def statement_count(client, path):
+    # 清空响应缓存，统计实际查询
+    cache.clear()
+    with count_statements() as statements:
+        res = client.get(path)
+    assert res.status_code == 200
+    return len(statements), res.get_json()
+
+
+@pytest.mark.parametrize('path,expected', PATHS.items())
+def test_statement_count_is_constant(app, client, path, expected):
+    add_items(1)
+    small, _ = statement_count(client, path)
+    add_items(49)
+    large, data = statement_count(client, path)
+    assert small == large == expected
+
+    if path != '/api/jewelry/1':
+        items = data if isinstance(data, list) else data['items']
+        assert len(items) == 50
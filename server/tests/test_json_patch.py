@@ -0,0 +1,66 @@
+import pytest
+
+from json_patch import JsonPatchConflict, JsonPatchError, apply_patch, parse_pointer
+
+DOC = {'title': '珍珠', 'tags': ['a', 'b'], 'meta': {'a/b': 1, 'm~n': 2}}
+
+
+@pytest.mark.parametrize('operations, expected', [
+    ([{'op': 'add', 'path': '/subtitle', 'value': 'x'}], {**DOC, 'subtitle': 'x'}),
+    ([{'op': 'add', 'path': '/tags/0', 'value': 'z'}], {**DOC, 'tags': ['z', 'a', 'b']}),
+    ([{'op': 'add', 'path': '/tags/-', 'value': 'z'}], {**DOC, 'tags': ['a', 'b', 'z']}),
+    ([{'op': 'remove', 'path': '/tags/0'}], {**DOC, 'tags': ['b']}),
+    ([{'op': 'replace', 'path': '/title', 'value': '贝壳'}], {**DOC, 'title': '贝壳'}),
+    ([{'op': 'replace', 'path': '', 'value': []}], []),
+    ([{'op': 'move', 'from': '/title', 'path': '/name'}],
+     {'name': '珍珠', 'tags': ['a', 'b'], 'meta': DOC['meta']}),
+    ([{'op': 'move', 'from': '/tags/0', 'path': '/tags/-'}], {**DOC, 'tags': ['b', 'a']}),
+    ([{'op': 'copy', 'from': '/tags', 'path': '/labels'}], {**DOC, 'labels': ['a', 'b']}),
+    ([{'op': 'test', 'path': '/tags/1', 'value': 'b'}], DOC),
+    # ~1 表示 /，~0 表示 ~
+    ([{'op': 'replace', 'path': '/meta/a~1b', 'value': 3}, {'op': 'remove', 'path': '/meta/m~0n'}],
+     {**DOC, 'meta': {'a/b': 3}}),
+])
+def test_operations(operations, expected):
+    assert apply_patch(DOC, operations) == expected
+
+
+def test_document_is_not_modified():
+    apply_patch(DOC, [{'op': 'add', 'path': '/tags/-', 'value': 'z'}, {'op': 'remove', 'path': '/meta/a~1b'}])
+    assert DOC == {'title': '珍珠', 'tags': ['a', 'b'], 'meta': {'a/b': 1, 'm~n': 2}}
+
+
+def test_pointer_escaping():
+    # 先替换 ~1 再替换 ~0：~01 表示字面的 ~1
+    assert parse_pointer('/~01/a~1b/~0') == ['~1', 'a/b', '~']
+    assert parse_pointer('') == []
+
+
+def test_failed_test_is_conflict():
+    with pytest.raises(JsonPatchConflict):
+        apply_patch(DOC, [{'op': 'test', 'path': '/title', 'value': '贝壳'}])
+
+
+@pytest.mark.parametrize('operations', [
+    {'op': 'add', 'path': '/x', 'value': 1},
+    [{'op': 'add', 'path': 'x', 'value': 1}],
+    [{'op': 'add', 'path': '/x'}],
+    [{'op': 'remove', 'path': '/missing'}],
+    [{'op': 'remove', 'path': '/tags/2'}],
+    [{'op': 'remove', 'path': '/tags/01'}],
+    [{'op': 'replace', 'path': '/tags/-', 'value': 1}],
+    [{'op': 'add', 'path': '/tags/3', 'value': 1}],
+    [{'op': 'move', 'from': '/meta', 'path': '/meta/child'}],
+    [{'op': 'remove', 'path': ''}],
+    [{'op': 'rename', 'path': '/title'}],
+])
+def test_invalid_patch(operations):
+    with pytest.raises(JsonPatchError) as info:
+        apply_patch(DOC, operations)
+    assert not isinstance(info.value, JsonPatchConflict)
+
+
+def test_failed_operation_discards_earlier_ones():
+    with pytest.raises(JsonPatchError):
+        apply_patch(DOC, [{'op': 'remove', 'path': '/title'}, {'op': 'remove', 'path': '/missing'}])
+    assert DOC['title'] == '珍珠'
@@ -0,0 +1,46 @@
+"""STORAGE_BACKEND=memory + IMAGE_JOBS_INLINE=true：上传、访问、缩放和删除都不写上传目录"""
+import io
+import json
+
+import pytest
+
+from models import ImageAsset
+from storage import MemoryStorage, current_storage, key_from_url
+
+
+def test_upload_serve_resize_delete(app, client, auth_headers, upload_image):
+    PILImage = pytest.importorskip('PIL.Image')
+    storage = current_storage()
+    assert isinstance(storage, MemoryStorage)
+
+    image = upload_image()
+    assert image['status'] == 'ready'
+    key = key_from_url(image['path'])
+    # 分目录的键 ab/cd/<哈希>.webp，处理结果由 workspace() 写回内存存储
+    prefix, name = key.rsplit('/', 1)
+    assert prefix == f"{name[:2]}/{name[2:4]}"
+    variant_keys = [key_from_url(variant['path']) for variant in image['variants']]
+    assert variant_keys and all(storage.exists(variant_key) for variant_key in variant_keys)
+    assert storage.exists(key_from_url(image['thumb_path']))
+
+    res = client.get(image['path'])
+    assert res.status_code == 200
+    assert res.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert PILImage.open(io.BytesIO(res.data)).format == 'WEBP'
+
+    res = client.get(f"/uploads/r/320/{name}")
+    assert res.status_code == 200
+    assert PILImage.open(io.BytesIO(res.data)).width == 320
+
+    assert client.get('/uploads/00/00/missing.webp').status_code == 404
+
+    asset = ImageAsset.query.one()
+    files = {asset.filename, asset.original, key_from_url(asset.thumb_path)}
+    files.update(key_from_url(variant['path']) for variant in json.loads(asset.variants))
+
+    res = client.delete(f"/api/images/{image['id']}", headers=auth_headers)
+    assert res.status_code == 200
+    assert ImageAsset.query.count() == 0
+    assert not any(storage.exists(file_key) for file_key in files)
+    assert not storage.files
+    assert client.get(image['path']).status_code == 404
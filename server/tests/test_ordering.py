@@ -0,0 +1,58 @@
+import pytest
+
+from models import db, Jewelry
+from ordering import RANK_GAP
+
+
+def create(client, auth_headers, count):
+    ids = []
+    for n in range(count):
+        res = client.post('/api/jewelry', headers=auth_headers, json={'name': f"饰品 {n}"})
+        assert res.status_code == 201
+        ids.append(res.get_json()['id'])
+    return ids
+
+
+def order():
+    return [row.id for row in Jewelry.query.order_by(Jewelry.order_index, Jewelry.id)]
+
+
+def reorder(client, auth_headers, ids):
+    res = client.post('/api/admin/reorder', headers=auth_headers, json={'type': 'jewelry', 'ids': ids})
+    assert res.status_code == 200
+    return res.get_json()['updated']
+
+
+def test_new_items_are_appended(client, auth_headers):
+    ids = create(client, auth_headers, 5)
+    assert [db.session.get(Jewelry, i).order_index for i in ids] == [RANK_GAP * (n + 1) for n in range(5)]
+
+    res = client.post('/api/jewelry/batch', headers=auth_headers, json={'operations': [
+        {'op': 'create', 'data': {'name': '批量 1'}},
+        {'op': 'create', 'data': {'name': '批量 2'}},
+    ]})
+    assert res.status_code == 200
+    created = [result['id'] for result in res.get_json()['results']]
+    assert order() == ids + created
+
+    # 移动一项只修改一行
+    assert reorder(client, auth_headers, [ids[4], ids[0], ids[1], ids[2], ids[3]]) == 1
+    db.session.expire_all()
+    assert order() == [ids[4]] + ids[:4] + created
+
+
+@pytest.mark.parametrize('ranks', [
+    [RANK_GAP, RANK_GAP * 2, RANK_GAP * 3, RANK_GAP * 4],
+    # 相邻排序键之间没有间隔，需要重新编号
+    [1, 2, 3, 4],
+])
+def test_partial_list_keeps_positions(client, auth_headers, ranks):
+    a, b, c, d = create(client, auth_headers, 4)
+    for item_id, rank in zip((a, b, c, d), ranks):
+        db.session.get(Jewelry, item_id).order_index = rank
+    db.session.commit()
+
+    # 列出的记录按新顺序占据它们原来的位置，未列出的记录不动
+    reorder(client, auth_headers, [c, a])
+    db.session.expire_all()
+    assert order() == [c, b, a, d]
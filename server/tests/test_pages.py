@@ -0,0 +1,67 @@
+import json
+from datetime import datetime, timedelta
+
+import routes.pages
+from models import db, Page
+
+
+def concurrent_edit(content):
+    """用另一个连接修改页面，模拟并发的编辑请求"""
+    with db.engine.begin() as conn:
+        conn.execute(Page.__table__.update().where(Page.__table__.c.page_key == 'home').values(
+            content=json.dumps(content),
+            updated_at=datetime.utcnow() + timedelta(seconds=len(content))
+        ))
+
+
+def patch(client, auth_headers, operations):
+    return client.patch('/api/pages/home', headers=auth_headers, json=operations)
+
+
+def test_patch_page(client, auth_headers):
+    res = patch(client, auth_headers, [{'op': 'add', 'path': '/heroTitle', 'value': '珍珠'}])
+    assert res.status_code == 200
+    assert client.get('/api/pages/home').get_json() == {'heroTitle': '珍珠'}
+
+    res = patch(client, auth_headers, [{'op': 'test', 'path': '/heroTitle', 'value': '贝壳'}])
+    assert res.status_code == 409
+    res = patch(client, auth_headers, [{'op': 'remove', 'path': '/missing'}])
+    assert res.status_code == 400
+
+
+def test_concurrent_change_is_retried(client, auth_headers, monkeypatch):
+    apply_patch = routes.pages.apply_patch
+    calls = []
+
+    def apply_after_concurrent_edit(content, operations):
+        calls.append(content)
+        if len(calls) == 1:
+            concurrent_edit({'about': '关于'})
+        return apply_patch(content, operations)
+
+    monkeypatch.setattr(routes.pages, 'apply_patch', apply_after_concurrent_edit)
+    res = patch(client, auth_headers, [{'op': 'add', 'path': '/heroTitle', 'value': '珍珠'}])
+
+    assert res.status_code == 200
+    # 第二次在重新读取的内容上应用补丁，不覆盖并发的修改
+    assert calls == [{}, {'about': '关于'}]
+    db.session.expire_all()
+    assert json.loads(Page.query.filter_by(page_key='home').one().content) == {'about': '关于', 'heroTitle': '珍珠'}
+
+
+def test_conflict_after_retries(client, auth_headers, monkeypatch):
+    apply_patch = routes.pages.apply_patch
+    edits = []
+
+    def apply_with_concurrent_edit(content, operations):
+        edits.append(len(edits))
+        concurrent_edit({f"edit{n}": n for n in edits})
+        return apply_patch(content, operations)
+
+    monkeypatch.setattr(routes.pages, 'apply_patch', apply_with_concurrent_edit)
+    res = patch(client, auth_headers, [{'op': 'add', 'path': '/heroTitle', 'value': '珍珠'}])
+
+    assert res.status_code == 409
+    assert len(edits) == routes.pages.PATCH_RETRIES
+    db.session.expire_all()
+    assert 'heroTitle' not in json.loads(Page.query.filter_by(page_key='home').one().content)
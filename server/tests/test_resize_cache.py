@@ -0,0 +1,57 @@
+import os
+import threading
+
+from resize_cache import ResizeCache
+
+
+def render_bytes(size):
+    def render(dest):
+        with open(dest, 'wb') as f:
+            f.write(b'x' * size)
+    return render
+
+
+def cached_size(directory):
+    return sum(
+        entry.stat().st_size for entry in os.scandir(directory)
+        if not entry.name.startswith('.')
+    )
+
+
+def test_size_limit_is_shared_between_processes(tmp_path):
+    # 两个实例模拟两个 worker 进程共用同一个缓存目录
+    workers = [ResizeCache(str(tmp_path), 10_000) for _ in range(2)]
+    for n in range(20):
+        workers[n % 2].get_or_render(f"{n}.webp", render_bytes(1000))
+        assert cached_size(tmp_path) <= 10_000
+
+    # 最近生成的文件保留
+    assert os.path.exists(tmp_path / '19.webp')
+    assert not os.path.exists(tmp_path / '0.webp')
+    assert int((tmp_path / '.size').read_text()) == cached_size(tmp_path)
+
+
+def test_concurrent_misses_render_once(tmp_path):
+    cache = ResizeCache(str(tmp_path), 10_000)
+    calls = []
+    start = threading.Event()
+
+    def render(dest):
+        calls.append(dest)
+        render_bytes(100)(dest)
+
+    def request():
+        start.wait()
+        cache.get_or_render('a.webp', render)
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert int((tmp_path / '.size').read_text()) == 100
+    # 生成结束后不保留每个 key 的锁
+    assert cache._locks == {}
@@ -0,0 +1,72 @@
+import pytest
+
+import search
+
+
+@pytest.fixture
+def catalogue(client, auth_headers):
+    """创建饰品，返回 {名称: id}"""
+    items = [
+        {'name': '珍珠项链', 'category': '项链'},
+        {'name': '银耳环', 'category': '耳饰', 'description': '搭配珍珠项链'},
+        {'name': '淡水珍珠项链', 'category': '项链,套装'},
+        {'name': '珍珠手链', 'category': '手链', 'description': '珍珠项链同款'},
+        {'name': '隐藏的珍珠项链', 'category': '项链', 'is_visible': False},
+        {'name': '金戒指', 'category': '戒指'},
+    ]
+    ids = {}
+    for item in items:
+        res = client.post('/api/jewelry', headers=auth_headers, json=item)
+        assert res.status_code == 201
+        ids[item['name']] = res.get_json()['id']
+    return ids
+
+
+
+def test_relevance_order(client, catalogue):
+    # 名称和描述都匹配的排在前面，同分按 id 排列，不包含隐藏的饰品
+    res = client.get('/api/jewelry/search?q=珍珠').get_json()
+    assert names_from(res, catalogue) == ['珍珠手链', '珍珠项链', '淡水珍珠项链', '银耳环']
+
+
+@pytest.mark.parametrize('q', ['珍珠项链', '项链同款', 'xyz'])
+def test_like_fallback_matches_fts_order(client, catalogue, monkeypatch, q):
+    assert search.fts_available()
+    fts = client.get(f"/api/jewelry/search?q={q}").get_json()
+    # 关键词少于 3 个字符（或没有 FTS5）时使用 LIKE 匹配，排序相同
+    monkeypatch.setattr(search, 'fts_available', lambda: False)
+    like = search.search(q)
+    assert like[0] == [item['id'] for item in fts['items']]
+    assert like[2:] == (fts['total'], fts['facets'])
+
+
+def test_facets_and_category_filter(client, catalogue):
+    res = client.get('/api/jewelry/search?q=珍珠项链&category=项链').get_json()
+    assert names_from(res, catalogue) == ['珍珠项链', '淡水珍珠项链']
+    assert res['total'] == 2
+    # 分类数量不受 category 筛选影响，不包含隐藏的饰品
+    assert res['facets'] == {'项链': 2, '套装': 1, '耳饰': 1, '手链': 1}
+
+
+@pytest.mark.parametrize('q', ['珍珠', '珍珠项链'])
+def test_cursor_pages_through_results(client, catalogue, q):
+    expected = [item['id'] for item in client.get(f"/api/jewelry/search?q={q}").get_json()['items']]
+    seen = []
+    cursor = ''
+    while True:
+        res = client.get(f"/api/jewelry/search?q={q}&limit=1&cursor={cursor}").get_json()
+        seen.extend(item['id'] for item in res['items'])
+        assert res['total'] == len(expected)
+        cursor = res['next_cursor']
+        if not cursor:
+            break
+    assert seen == expected
+
+
+def test_invalid_cursor(client, catalogue):
+    assert client.get('/api/jewelry/search?q=珍珠&cursor=bad').status_code == 400
+
+
+def names_from(res, catalogue):
+    by_id = {jewelry_id: name for name, jewelry_id in catalogue.items()}
+    return [by_id[item['id']] for item in res['items']]
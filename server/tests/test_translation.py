@@ -0,0 +1,59 @@
+import pytest
+
+import translation
+from models import Translation
+
+
+@pytest.fixture
+def translator(app):
+    # 进程内缓存在测试之间共用，每个测试从空缓存开始
+    translation.clear()
+    yield app.extensions['translator']
+    translation.clear()
+
+
+def translate(client, auth_headers, texts):
+    res = client.post('/api/utils/translate/batch', headers=auth_headers, json={'texts': texts})
+    assert res.status_code == 200
+    return res.get_json()
+
+
+def test_cache_tiers(client, auth_headers, translator):
+    texts = ['珍珠', '项链', '珍珠', '', '项链']
+    expected = ['[en] 珍珠', '[en] 项链', '[en] 珍珠', '', '[en] 项链']
+
+    # 重复的文字只翻译一次，空文字不请求翻译服务
+    assert translate(client, auth_headers, texts) == {'translations': expected, 'failed': 0}
+    assert translator.calls == 2
+    assert Translation.query.count() == 2
+
+    # 第一级：进程内 LRU
+    assert translate(client, auth_headers, texts)['translations'] == expected
+    assert translator.calls == 2
+
+    # 第二级：数据库（例如其他 worker 已翻译过）
+    translation.clear()
+    assert translate(client, auth_headers, texts)['translations'] == expected
+    assert translator.calls == 2
+
+    res = client.post('/api/utils/translate', headers=auth_headers, json={'text': '珍珠'})
+    assert res.get_json() == {'translatedText': '[en] 珍珠'}
+    assert translate(client, auth_headers, ['珍珠', '耳环'])['translations'] == ['[en] 珍珠', '[en] 耳环']
+    assert translator.calls == 3
+
+
+def test_failed_texts_are_not_cached(client, auth_headers, translator, monkeypatch):
+    stub_translate = translator.translate
+
+    def flaky(text, source, target):
+        if text == '耳环':
+            raise RuntimeError('timeout')
+        return stub_translate(text, source, target)
+
+    monkeypatch.setattr(translator, 'translate', flaky)
+    assert translate(client, auth_headers, ['珍珠', '耳环']) == {'translations': ['[en] 珍珠', None], 'failed': 1}
+    assert Translation.query.count() == 1
+
+    monkeypatch.setattr(translator, 'translate', stub_translate)
+    assert translate(client, auth_headers, ['珍珠', '耳环'])['translations'] == ['[en] 珍珠', '[en] 耳环']
+    assert translator.calls == 2
@@ -0,0 +1,35 @@
+import os
+from argparse import Namespace
+
+import upload_gc
+from models import db, Image
+from storage import LocalStorage, url_for_key
+
+
+def test_scrub_removes_empty_shard_directories(app, tmp_path):
+    upload_folder = tmp_path / 'uploads'
+    quarantine = upload_folder / '.quarantine'
+    app.config['UPLOAD_FOLDER'] = str(upload_folder)
+    app.config['UPLOAD_QUARANTINE_FOLDER'] = str(quarantine)
+    storage = app.extensions['storage'] = LocalStorage(str(upload_folder), 2)
+
+    orphan = 'aa/bb/aabb' + '0' * 28 + '.webp'
+    storage.put_bytes(orphan, b'orphan')
+    kept = 'aa/cc/aacc' + '0' * 28 + '.webp'
+    storage.put_bytes(kept, b'kept')
+    db.session.add(Image(filename=kept, path=url_for_key(kept)))
+    db.session.commit()
+    args = Namespace(dry_run=False, min_age=0, retention=7, batch_size=100, pause=0)
+
+    upload_gc.scrub(args)
+    assert (quarantine / orphan).is_file()
+    assert not (upload_folder / 'aa' / 'bb').exists()
+    # 同一级目录中还有其他文件时保留
+    assert (upload_folder / kept).is_file()
+
+    # 隔离期满后删除，隔离目录中的空目录一并删除
+    args.retention = 0
+    upload_gc.scrub(args)
+    assert not (quarantine / 'aa').exists()
+    assert quarantine.is_dir()
+    assert os.listdir(upload_folder / 'aa') == ['cc']
@@ -0,0 +1,162 @@
+"""文字翻译及两级缓存
+
+第一级为进程内 LRU，第二级为数据库 translations 表（按源语言、目标语言和原文哈希），
+多个 gunicorn worker 之间共享译文。批量翻译时只有两级缓存都未命中的文字
+才会并发请求翻译服务。
+
+翻译服务通过 TRANSLATOR_BACKEND 配置选择，也可以直接替换
+app.extensions['translator']（例如测试时使用本地的 StubTranslator）。
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, Translation
+
+MAX_ENTRIES = 2048
+
+_entries = OrderedDict()  # (source, target, text_hash) -> translated
+_lock = threading.Lock()
+
+
+class GoogleTranslator:
+    """通过 deep-translator 调用 Google 翻译"""
+
+    def translate(self, text, source, target):
+        from deep_translator import GoogleTranslator as _GoogleTranslator
+        return _GoogleTranslator(source=source, target=target).translate(text)
+
+
+class StubTranslator:
+    """本地翻译（不访问网络），返回带目标语言前缀的原文"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def translate(self, text, source, target):
+        self.calls += 1
+        return f"[{target}] {text}"
+
+
+BACKENDS = {
+    'google': GoogleTranslator,
+    'stub': StubTranslator
+}
+
+
+def create_translator(name):
+    if name not in BACKENDS:
+        raise ValueError(f"未知的翻译服务: {name}")
+    return BACKENDS[name]()
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def clear():
+    """清空本进程内的缓存"""
+    with _lock:
+        _entries.clear()
+
+
+def _get(key):
+    with _lock:
+        translated = _entries.get(key)
+        if translated is not None:
+            _entries.move_to_end(key)
+        return translated
+
+
+def _put(key, translated):
+    with _lock:
+        _entries[key] = translated
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def _load(source, target, hashes):
+    """从数据库读取已保存的译文"""
+    found = {}
+    hashes = list(hashes)
+    # 分批查询，避免超过 SQLite 的参数数量限制
+    for start in range(0, len(hashes), 500):
+        rows = db.session.query(Translation.text_hash, Translation.translated).filter(
+            Translation.source == source,
+            Translation.target == target,
+            Translation.text_hash.in_(hashes[start:start + 500])
+        )
+        found.update(rows)
+    return found
+
+
+def _store(source, target, translations):
+    """保存新的译文（其他 worker 已保存时忽略）"""
+    db.session.execute(sqlite_insert(Translation.__table__).on_conflict_do_nothing(), [
+        {
+            'source': source,
+            'target': target,
+            'text_hash': text_hash(text),
+            'text': text,
+            'translated': translated
+        }
+        for text, translated in translations.items()
+    ])
+    db.session.commit()
+
+
+def translate_many(texts, source='zh-CN', target='en'):
+    """批量翻译，返回 (译文列表, 错误信息)
+
+    译文列表与 texts 一一对应，翻译失败的位置为 None；错误信息为 {原文: 错误}。
+    """
+    results = {}
+    missing = {}
+    for text in texts:
+        if not text or text in results or text in missing:
+            continue
+        digest = text_hash(text)
+        translated = _get((source, target, digest))
+        if translated is not None:
+            results[text] = translated
+        else:
+            missing[text] = digest
+
+    if missing:
+        stored = _load(source, target, missing.values())
+        for text, digest in list(missing.items()):
+            if digest in stored:
+                results[text] = stored[digest]
+                _put((source, target, digest), stored[digest])
+                del missing[text]
+
+    errors = {}
+    if missing:
+        translator = current_app.extensions['translator']
+        workers = min(len(missing), current_app.config['TRANSLATOR_WORKERS'])
+
+        def call(text):
+            try:
+                return text, translator.translate(text, source, target), None
+            except Exception as e:
+                return text, None, str(e)
+
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for text, translated, error in executor.map(call, missing):
+                if error or not translated:
+                    errors[text] = error or '翻译结果为空'
+                    continue
+                fetched[text] = translated
+                results[text] = translated
+                _put((source, target, missing[text]), translated)
+
+        if fetched:
+            _store(source, target, fetched)
+
+    return [results.get(text) if text else '' for text in texts], errors
@@ -0,0 +1,272 @@
+"""上传目录清理与完整性检查
+
+    python upload_gc.py scrub      # 隔离未被引用的文件，清除隔离期满的文件
+    python upload_gc.py missing    # 列出数据库引用但磁盘上不存在的文件
+
+早期的删除接口只删除原图，缩略图和多宽度版本留在磁盘上；中断的分片上传和
+处理失败的图片也会留下文件。scrub 将上传目录与数据库中的引用逐批对比：
+
+1. 删除超过 UPLOAD_SESSION_MAX_AGE 的分片上传会话及其 .part 文件；
+2. 未被引用且修改时间早于 --min-age 的文件移入隔离目录（同一磁盘，rename 即可）；
+3. 隔离目录中重新被引用的文件移回上传目录，隔离超过 --retention 的文件删除。
+
+上传目录包括分目录存储的子目录（见 storage.py），隔离时保留相对路径。
+服务运行时可以直接执行：新上传的文件在 --min-age 内不会被处理，移动前会按存储键
+再次查询数据库，误隔离的文件在隔离期内被引用时也会自动恢复。
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app import create_app
+from models import db, Image, GalleryImage, ImageAsset, ImageJob, Page, UploadSession
+from storage import current_storage, key_from_url, url_for_key
+
+PART_SUFFIX = '.part'
+# 页面内容（JSON）中引用的上传文件
+UPLOAD_REFERENCE = re.compile(r'/uploads/([^"\'\s?#\\]+)')
+
+IMAGE_MODELS = (Image, GalleryImage, ImageAsset)
+
+
+def quarantine_folder():
+    return current_app.config['UPLOAD_QUARANTINE_FOLDER']
+
+
+def _row_files(row):
+    """图片记录引用的所有存储键（原图、缩略图、多宽度版本）"""
+    keys = {row.filename, key_from_url(row.path), key_from_url(row.thumb_path)}
+    if row.variants:
+        try:
+            keys.update(key_from_url(variant.get('path')) for variant in json.loads(row.variants))
+        except (ValueError, AttributeError):
+            pass
+    keys.discard(None)
+    return keys
+
+
+def _stream_rows(model, batch_size):
+    columns = [model.id, model.filename, model.path, model.thumb_path, model.variants]
+    return db.session.query(*columns).execution_options(yield_per=batch_size)
+
+
+def referenced_files(batch_size):
+    """数据库中引用的所有存储键（逐批读取，只保留键）"""
+    names = set()
+    for model in IMAGE_MODELS:
+        for row in _stream_rows(model, batch_size):
+            names.update(_row_files(row))
+
+    # 保留的上传原图
+    for (original,) in db.session.query(ImageAsset.original).filter(
+        ImageAsset.original.isnot(None)
+    ).execution_options(yield_per=batch_size):
+        names.add(original)
+
+    # 尚未处理的原图
+    for (filename,) in db.session.query(ImageJob.filename).filter(
+        ImageJob.status.in_(('queued', 'running'))
+    ).execution_options(yield_per=batch_size):
+        names.add(filename)
+
+    for (content,) in db.session.query(Page.content):
+        names.update(UPLOAD_REFERENCE.findall(content or ''))
+
+    for (session_id,) in db.session.query(UploadSession.id):
+        names.add(f"{session_id}{PART_SUFFIX}")
+    return names
+
+
+def _still_referenced(names):
+    """移动前按存储键再查一次，避免扫描期间新增的引用被隔离"""
+    found = set()
+    for model in IMAGE_MODELS:
+        for column in (model.filename, model.path, model.thumb_path):
+            values = list(names) if column is model.filename else [url_for_key(name) for name in names]
+            found.update(
+                key_from_url(value) if column is not model.filename else value
+                for (value,) in db.session.query(column).filter(column.in_(values))
+            )
+    for column in (ImageAsset.original, ImageJob.filename):
+        found.update(value for (value,) in db.session.query(column).filter(column.in_(list(names))))
+    return found
+
+
+def expire_sessions(max_age, dry_run):
+    """删除过期的分片上传会话及其临时文件"""
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    sessions = UploadSession.query.filter(UploadSession.created_at < cutoff).all()
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    for session in sessions:
+        part_path = os.path.join(upload_folder, f"{session.id}{PART_SUFFIX}")
+        if not dry_run:
+            db.session.delete(session)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+    if not dry_run:
+        db.session.commit()
+    return len(sessions)
+
+
+def _scan(folder, batch_size):
+    """逐批返回目录（含子目录，跳过 . 开头的目录）中的文件 [(键, 路径, stat)]"""
+    batch = []
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        for filename in filenames:
+            filepath = os.path.join(dirpath, filename)
+            key = os.path.relpath(filepath, folder).replace(os.sep, '/')
+            batch.append((key, filepath, os.lstat(filepath)))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _move(source, dest):
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    os.replace(source, dest)
+
+
+def _remove_empty_parents(filepath, root):
+    """删除文件移走后留下的空目录（分目录存储的 ab/cd/），不删除 root 本身"""
+    root = os.path.abspath(root)
+    directory = os.path.dirname(os.path.abspath(filepath))
+    while directory != root and directory.startswith(root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            # 目录非空或已被删除
+            return
+        directory = os.path.dirname(directory)
+
+
+def quarantine_orphans(referenced, min_age, batch_size, pause, dry_run):
+    """将未被引用的旧文件移入隔离目录（保留相对路径），返回 (文件数, 字节数)"""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    target = quarantine_folder()
+    cutoff = time.time() - min_age
+    moved = size = 0
+
+    for batch in _scan(upload_folder, batch_size):
+        candidates = {
+            key: (filepath, stat) for key, filepath, stat in batch
+            if key not in referenced and stat.st_mtime < cutoff
+        }
+        if not candidates:
+            continue
+        for key in _still_referenced(candidates):
+            candidates.pop(key, None)
+
+        for key, (filepath, stat) in candidates.items():
+            moved += 1
+            size += stat.st_size
+            if dry_run:
+                print(f"将隔离: {key}")
+                continue
+            quarantined = os.path.join(target, key)
+            _move(filepath, quarantined)
+            _remove_empty_parents(filepath, upload_folder)
+            # 修改时间记为隔离时间，用于计算隔离期
+            os.utime(quarantined)
+        if pause:
+            time.sleep(pause)
+    return moved, size
+
+
+def reclaim(referenced, retention, batch_size, dry_run):
+    """恢复重新被引用的文件，删除隔离期满的文件，返回 (恢复数, 删除数, 删除字节数)"""
+    folder = quarantine_folder()
+    if not os.path.isdir(folder):
+        return 0, 0, 0
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    cutoff = time.time() - retention
+    restored = removed = size = 0
+
+    for batch in _scan(folder, batch_size):
+        keys = {key for key, _, _ in batch}
+        in_use = (keys & referenced) | _still_referenced(keys)
+        for key, filepath, stat in batch:
+            if key in in_use:
+                restored += 1
+                if not dry_run:
+                    _move(filepath, os.path.join(upload_folder, key))
+                    _remove_empty_parents(filepath, folder)
+            elif stat.st_mtime < cutoff:
+                removed += 1
+                size += stat.st_size
+                if not dry_run:
+                    os.remove(filepath)
+                    _remove_empty_parents(filepath, folder)
+    return restored, removed, size
+
+
+def scrub(args):
+    if not current_storage().local:
+        print("只支持本地存储")
+        return
+    dry_run = args.dry_run
+    if dry_run:
+        print("试运行，不会修改任何文件")
+
+    expired = expire_sessions(current_app.config['UPLOAD_SESSION_MAX_AGE'], dry_run)
+    print(f"过期的分片上传会话: {expired}")
+
+    referenced = referenced_files(args.batch_size)
+    print(f"数据库引用的文件: {len(referenced)}")
+
+    moved, size = quarantine_orphans(
+        referenced, args.min_age * 3600, args.batch_size, args.pause, dry_run
+    )
+    print(f"隔离未引用的文件: {moved} 个（{size / 1024 / 1024:.1f} MB）")
+
+    restored, removed, size = reclaim(referenced, args.retention * 86400, args.batch_size, dry_run)
+    print(f"恢复重新被引用的文件: {restored} 个")
+    print(f"删除隔离期满的文件: {removed} 个（{size / 1024 / 1024:.1f} MB）")
+
+
+def missing(args):
+    """列出数据库引用但不存在的文件"""
+    storage = current_storage()
+    total = 0
+    for model in IMAGE_MODELS:
+        for row in _stream_rows(model, args.batch_size):
+            for key in sorted(_row_files(row)):
+                if not storage.exists(key):
+                    total += 1
+                    print(f"{model.__tablename__} #{row.id}: {key}")
+    print(f"缺失的文件: {total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='上传目录清理与完整性检查')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrub_parser = subparsers.add_parser('scrub', help='隔离并清除未被引用的上传文件')
+    scrub_parser.add_argument('--min-age', type=float, default=24, help='只处理修改时间早于该小时数的文件')
+    scrub_parser.add_argument('--retention', type=float, default=7, help='隔离文件保留的天数')
+    scrub_parser.add_argument('--batch-size', type=int, default=500, help='每批处理的文件数')
+    scrub_parser.add_argument('--pause', type=float, default=0.05, help='每批之间的间隔秒数')
+    scrub_parser.add_argument('--dry-run', action='store_true', help='只输出将要处理的文件')
+    scrub_parser.set_defaults(func=scrub)
+
+    missing_parser = subparsers.add_parser('missing', help='列出数据库引用但不存在的文件')
+    missing_parser.add_argument('--batch-size', type=int, default=500, help='每批读取的记录数')
+    missing_parser.set_defaults(func=missing)
+
+    args = parser.parse_args()
+    app = create_app()
+    with app.app_context():
+        args.func(args)
+
+
+if __name__ == '__main__':
+    main()
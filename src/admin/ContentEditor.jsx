@@ -4,6 +4,8 @@ import { api } from '../utils/api'
 
 function ContentEditor() {
     const [pages, setPages] = useState({})
+    // 上次保存的内容，用于计算需要提交的字段
+    const [saved, setSaved] = useState({})
     const [activePage, setActivePage] = useState('home')
     const [saving, setSaving] = useState(false)
     const [message, setMessage] = useState('')
@@ -76,6 +78,7 @@ function ContentEditor() {
                 }
             })
             setPages(pagesMap)
+            setSaved(pagesMap)
         } catch (error) {
             console.error('加载失败')
         }
@@ -98,7 +101,7 @@ function ContentEditor() {
         setUploadError('')
 
         try {
-            const result = await api.uploadImages([file])
+            const result = await api.uploadImages([file], null, { wait: true })
             if (result.images && result.images[0]) {
                 handleChange(field, result.images[0].path)
                 setMessage('图片上传成功！')
@@ -115,12 +118,41 @@ function ContentEditor() {
         handleChange(field, '')
     }
 
+    // 对比上次保存的内容，生成 JSON Patch 操作
+    const diffContent = (before, after) => {
+        const pointer = key => '/' + key.replace(/~/g, '~0').replace(/\//g, '~1')
+        const operations = []
+        Object.keys(after).forEach(key => {
+            if (!(key in before)) {
+                operations.push({ op: 'add', path: pointer(key), value: after[key] })
+            } else if (JSON.stringify(before[key]) !== JSON.stringify(after[key])) {
+                operations.push({ op: 'replace', path: pointer(key), value: after[key] })
+            }
+        })
+        Object.keys(before).forEach(key => {
+            if (!(key in after)) {
+                operations.push({ op: 'remove', path: pointer(key) })
+            }
+        })
+        return operations
+    }
+
     const handleSave = async () => {
         setSaving(true)
         setMessage('')
 
+        const content = pages[activePage] || {}
         try {
-            await api.updatePageContent(activePage, pages[activePage] || {})
+            const operations = diffContent(saved[activePage] || {}, content)
+            if (operations.length > 0) {
+                try {
+                    await api.patchPageContent(activePage, operations)
+                } catch {
+                    // 页面不存在或补丁冲突时提交完整内容
+                    await api.updatePageContent(activePage, content)
+                }
+            }
+            setSaved(prev => ({ ...prev, [activePage]: content }))
             setMessage('保存成功！')
             setTimeout(() => setMessage(''), 3000)
         } catch (error) {
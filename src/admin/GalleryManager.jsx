@@ -113,9 +113,8 @@ function GalleryManager() {
         const newImages = [...images]
             ;[newImages[index - 1], newImages[index]] = [newImages[index], newImages[index - 1]]
 
-        const orderList = newImages.map((img, i) => ({ id: img.id, order_index: i }))
         try {
-            await api.reorderGalleryImages(orderList)
+            await api.reorder('gallery', newImages.map(img => img.id))
             loadImages()
         } catch (error) {
             console.error('排序失败')
@@ -127,9 +126,8 @@ function GalleryManager() {
         const newImages = [...images]
             ;[newImages[index], newImages[index + 1]] = [newImages[index + 1], newImages[index]]
 
-        const orderList = newImages.map((img, i) => ({ id: img.id, order_index: i }))
         try {
-            await api.reorderGalleryImages(orderList)
+            await api.reorder('gallery', newImages.map(img => img.id))
             loadImages()
         } catch (error) {
             console.error('排序失败')
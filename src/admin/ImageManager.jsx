@@ -2,8 +2,12 @@ import { useState, useEffect, useRef } from 'react'
 import { AdminLayout } from './Dashboard'
 import { api } from '../utils/api'
 
+const PAGE_SIZE = 48
+
 function ImageManager() {
     const [images, setImages] = useState([])
+    const [nextCursor, setNextCursor] = useState(null)
+    const [loadingMore, setLoadingMore] = useState(false)
     const [jewelry, setJewelry] = useState([])
     const [loading, setLoading] = useState(true)
     const [uploading, setUploading] = useState(false)
@@ -17,11 +21,12 @@ function ImageManager() {
     const loadData = async () => {
         try {
             const [imagesData, jewelryData] = await Promise.all([
-                api.getImages(),
-                api.getJewelry()
+                api.getImages({ cursor: '', limit: PAGE_SIZE }),
+                api.getJewelry({ fields: 'id,name' })
             ])
 
-            setImages(imagesData)
+            setImages(imagesData.items)
+            setNextCursor(imagesData.next_cursor)
             setJewelry(jewelryData)
         } catch (error) {
             console.error('加载失败')
@@ -30,6 +35,20 @@ function ImageManager() {
         }
     }
 
+    const loadMore = async () => {
+        if (!nextCursor) return
+        setLoadingMore(true)
+        try {
+            const data = await api.getImages({ cursor: nextCursor, limit: PAGE_SIZE })
+            setImages(prev => [...prev, ...data.items])
+            setNextCursor(data.next_cursor)
+        } catch (error) {
+            console.error('加载失败')
+        } finally {
+            setLoadingMore(false)
+        }
+    }
+
     const handleUpload = async (e) => {
         const files = Array.from(e.target.files)
         if (!files.length) return
@@ -37,7 +56,9 @@ function ImageManager() {
         setUploading(true)
 
         try {
-            await api.uploadImages(files, selectedJewelry || null)
+            for (const file of files) {
+                await api.uploadChunked(file, { kind: 'image', jewelry_id: selectedJewelry || null })
+            }
             loadData()
         } catch (error) {
             console.error('上传失败')
@@ -54,7 +75,7 @@ function ImageManager() {
 
         try {
             await api.deleteImage(id)
-            loadData()
+            setImages(prev => prev.filter(image => image.id !== id))
         } catch (error) {
             console.error('删除失败')
         }
@@ -62,8 +83,8 @@ function ImageManager() {
 
     const handleAssign = async (imageId, jewelryId) => {
         try {
-            await api.updateImage(imageId, { jewelry_id: jewelryId || null })
-            loadData()
+            const updated = await api.updateImage(imageId, { jewelry_id: jewelryId || null })
+            setImages(prev => prev.map(image => image.id === imageId ? updated : image))
         } catch (error) {
             console.error('更新失败')
         }
@@ -127,7 +148,7 @@ function ImageManager() {
 
             {/* 图片列表 */}
             <div className="admin-card">
-                <div className="admin-card-title">图片库 ({images.length})</div>
+                <div className="admin-card-title">图片库 ({images.length}{nextCursor ? '+' : ''})</div>
 
                 {images.length === 0 ? (
                     <div className="empty-state">
@@ -185,6 +206,14 @@ function ImageManager() {
                         ))}
                     </div>
                 )}
+
+                {nextCursor && (
+                    <div style={{ textAlign: 'center', marginTop: 'var(--space-6)' }}>
+                        <button className="btn btn-secondary" onClick={loadMore} disabled={loadingMore}>
+                            {loadingMore ? '加载中...' : '加载更多'}
+                        </button>
+                    </div>
+                )}
             </div>
         </AdminLayout>
     )
@@ -71,13 +71,14 @@ function JewelryManager() {
                 await api.updateJewelry(editingItem.id, formData)
                 // 同时保存图片的描述和排序
                 if (editingItem.images && editingItem.images.length > 0) {
-                    await Promise.all(editingItem.images.map((img, index) =>
+                    await Promise.all(editingItem.images.map(img =>
                         api.updateImage(img.id, {
                             description: img.description,
-                            description_en: img.description_en,
-                            order_index: index  // 使用当前在数组中的索引作为顺序
+                            description_en: img.description_en
                         })
                     ))
+                    // 按当前数组顺序一次提交排序，只有位置变化的图片会被修改
+                    await api.reorder('images', editingItem.images.map(img => img.id), editingItem.id)
                 }
             } else {
                 await api.createJewelry(formData)
@@ -192,21 +193,26 @@ function JewelryManager() {
         if (!window.confirm(confirmMsg)) return;
 
         const newImages = [...editingItem.images];
-        for (let i = 0; i < newImages.length; i++) {
-            const img = newImages[i];
-            if (img.description) {
-                try {
-                    setTranslating(prev => ({ ...prev, [`img_${i}`]: true }));
-                    const data = await api.translate(img.description);
-                    if (data.translatedText) {
-                        newImages[i] = { ...newImages[i], description_en: data.translatedText };
-                    }
-                } catch (error) {
-                    console.error('翻译失败:', error);
-                } finally {
-                    setTranslating(prev => ({ ...prev, [`img_${i}`]: false }));
+        const indexes = newImages.map((img, i) => i).filter(i => newImages[i].description);
+        if (indexes.length === 0) return;
+
+        const setFlags = (value) => setTranslating(prev => ({
+            ...prev,
+            ...Object.fromEntries(indexes.map(i => [`img_${i}`, value]))
+        }));
+        setFlags(true);
+        try {
+            // 一次请求翻译所有描述
+            const data = await api.translateBatch(indexes.map(i => newImages[i].description));
+            indexes.forEach((i, n) => {
+                if (data.translations[n]) {
+                    newImages[i] = { ...newImages[i], description_en: data.translations[n] };
                 }
-            }
+            });
+        } catch (error) {
+            console.error('翻译失败:', error);
+        } finally {
+            setFlags(false);
         }
         setEditingItem({ ...editingItem, images: newImages });
     };
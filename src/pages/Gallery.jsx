@@ -1,8 +1,11 @@
 import { useState, useEffect } from 'react'
 import { useSearchParams } from 'react-router-dom'
 import { useTranslation } from 'react-i18next'
+import { buildSrcSet } from '../utils/image'
 import '../styles/pagination.css'
 
+const LIST_FIELDS = 'id,name,name_en,category,description,description_en,cover'
+
 function Gallery() {
     const { t, i18n } = useTranslation()
     const [searchParams] = useSearchParams()
@@ -12,8 +15,14 @@ function Gallery() {
     const [selectedItem, setSelectedItem] = useState(null)
     const [currentImageIndex, setCurrentImageIndex] = useState(0)
 
-    // Pagination state
+    // Pagination state（游标分页：cursors[i] 为第 i + 1 页的游标）
     const [currentPage, setCurrentPage] = useState(1)
+    const [cursors, setCursors] = useState([''])
+    const [nextCursor, setNextCursor] = useState(null)
+    // 搜索：query 为输入框内容，searchTerm 为防抖后实际搜索的关键词
+    const [query, setQuery] = useState('')
+    const [searchTerm, setSearchTerm] = useState('')
+    const [facets, setFacets] = useState(null)
     const [itemsPerPage, setItemsPerPage] = useState(window.innerWidth > 768 ? 24 : 30)
 
     useEffect(() => {
@@ -25,39 +34,61 @@ function Gallery() {
     }, [])
 
     useEffect(() => {
-        loadJewelry()
-    }, [])
+        const timer = setTimeout(() => setSearchTerm(query.trim()), 300)
+        return () => clearTimeout(timer)
+    }, [query])
 
-    // Reset to first page when category changes
+    // Reset to first page when category, search or page size changes
     useEffect(() => {
         setCurrentPage(1)
-    }, [selectedCategory])
+        setCursors([''])
+        loadJewelry('')
+    }, [selectedCategory, itemsPerPage, searchTerm])
 
     useEffect(() => {
         // 如果URL中有id参数，打开对应饰品详情
         const id = searchParams.get('id')
-        if (id && jewelry.length > 0) {
-            const item = jewelry.find(j => j.id === parseInt(id))
-            if (item) setSelectedItem(item)
+        if (id) {
+            loadDetail(parseInt(id))
         }
-    }, [searchParams, jewelry])
+    }, [searchParams])
 
-    const loadJewelry = async () => {
+    const loadJewelry = async (cursor) => {
         try {
-            const res = await fetch('/api/jewelry')
+            // 列表只需要名称、描述和封面图，详情打开时再加载全部图片
+            const params = new URLSearchParams({ cursor, limit: itemsPerPage, fields: LIST_FIELDS })
+            if (selectedCategory !== 'all') params.set('category', selectedCategory)
+            if (searchTerm) params.set('q', searchTerm)
+            const res = await fetch(searchTerm ? `/api/jewelry/search?${params}` : `/api/jewelry?${params}`)
             if (res.ok) {
                 const data = await res.json()
-                setJewelry(data)
+                setJewelry(data.items)
+                setNextCursor(data.next_cursor)
+                setFacets(searchTerm ? data.facets : null)
             } else {
-                setJewelry(getDefaultJewelry())
+                setJewelry(getFallbackJewelry())
+                setNextCursor(null)
             }
         } catch (error) {
-            setJewelry(getDefaultJewelry())
+            setJewelry(getFallbackJewelry())
+            setNextCursor(null)
         } finally {
             setLoading(false)
         }
     }
 
+    const loadDetail = async (id) => {
+        try {
+            const res = await fetch(`/api/jewelry/${id}`)
+            if (res.ok) {
+                const item = await res.json()
+                setSelectedItem(prev => (!prev || prev.id === item.id) ? item : prev)
+            }
+        } catch (error) {
+            console.error('加载详情失败')
+        }
+    }
+
     const isEn = i18n.language === 'en'
 
     const getDefaultJewelry = () => [
@@ -71,10 +102,16 @@ function Gallery() {
         { id: 8, name: t('gallery.items.8.name'), name_en: t('gallery.items.8.name'), category: 'sets', description: t('gallery.items.8.desc'), description_en: t('gallery.items.8.desc'), images: [] },
     ]
 
+    const getFallbackJewelry = () => getDefaultJewelry().filter(item =>
+        selectedCategory === 'all' || item.category.split(',').includes(selectedCategory)
+    )
+
     const openDetail = (item) => {
-        setSelectedItem(item)
+        // 先用封面图显示，完整的图片列表加载后替换
+        setSelectedItem({ ...item, images: item.images || (item.cover ? [item.cover] : []) })
         setCurrentImageIndex(0)
         document.body.style.overflow = 'hidden'
+        if (!item.images) loadDetail(item.id)
     }
 
     const closeDetail = () => {
@@ -98,19 +135,13 @@ function Gallery() {
         }
     }
 
-    // 计算分页数据
-    const filteredItems = jewelry.filter(item =>
-        selectedCategory === 'all' ||
-        (item.category && item.category.split(',').includes(selectedCategory))
-    )
-    const totalPages = Math.ceil(filteredItems.length / itemsPerPage)
-    const paginatedItems = filteredItems.slice((currentPage - 1) * itemsPerPage, currentPage * itemsPerPage)
-
     const handlePageChange = (newPage) => {
-        if (newPage >= 1 && newPage <= totalPages) {
-            setCurrentPage(newPage)
-            window.scrollTo({ top: 0, behavior: 'smooth' })
-        }
+        if (newPage < 1 || (newPage > currentPage && !nextCursor)) return
+        const newCursors = newPage > currentPage ? [...cursors, nextCursor] : cursors.slice(0, newPage)
+        setCursors(newCursors)
+        setCurrentPage(newPage)
+        loadJewelry(newCursors[newPage - 1])
+        window.scrollTo({ top: 0, behavior: 'smooth' })
     }
 
     if (loading) {
@@ -131,6 +162,18 @@ function Gallery() {
                     <div className="section-subtitle">{t('gallery.subtitle')}</div>
 
 
+                    {/* 搜索 */}
+                    <div style={{ display: 'flex', justifyContent: 'center', marginTop: 'var(--space-8)' }}>
+                        <input
+                            type="search"
+                            className="form-input"
+                            value={query}
+                            onChange={(e) => setQuery(e.target.value)}
+                            placeholder={t('nav.search')}
+                            style={{ maxWidth: '360px', width: '100%' }}
+                        />
+                    </div>
+
                     {/* 分类标签 */}
                     <div className="category-tabs" style={{
                         display: 'flex',
@@ -156,6 +199,7 @@ function Gallery() {
                                 }}
                             >
                                 {t(`gallery.categories.${cat}`)}
+                                {facets && cat !== 'all' && ` (${facets[cat] || 0})`}
                                 {selectedCategory === cat && (
                                     <span style={{
                                         position: 'absolute',
@@ -172,7 +216,7 @@ function Gallery() {
 
                     {/* 展示区域 */}
                     <div className="jewelry-grid">
-                        {paginatedItems.map((item, index) => (
+                        {jewelry.map((item, index) => (
                             <div
                                 key={item.id}
                                 className="card animate-fade-in-up"
@@ -180,10 +224,12 @@ function Gallery() {
                                 onClick={() => openDetail(item)}
                             >
                                 <div style={{ overflow: 'hidden', position: 'relative' }}>
-                                    {item.images && item.images[0] ? (
+                                    {item.cover ? (
                                         <div className="image-container" style={{ aspectRatio: '3/4', position: 'relative' }}>
                                             <img
-                                                src={item.images[0].thumb_path || item.images[0].path}
+                                                src={item.cover.thumb_path || item.cover.path}
+                                                srcSet={buildSrcSet(item.cover)}
+                                                sizes="(max-width: 768px) 50vw, 25vw"
                                                 alt={isEn ? (item.name_en || item.name) : item.name}
                                                 className="card-image"
                                                 loading="lazy"
@@ -227,11 +273,11 @@ function Gallery() {
                     </div>
 
                     {/* 分页与空状态 */}
-                    {filteredItems.length === 0 ? (
+                    {jewelry.length === 0 ? (
                         <div style={{ textAlign: 'center', padding: 'var(--space-12)', color: 'var(--color-gray-500)' }}>
                             {t('common.noData') || 'No items found'}
                         </div>
-                    ) : totalPages > 1 && (
+                    ) : (currentPage > 1 || nextCursor) && (
                         <div className="pagination">
                             <button
                                 className="pagination-btn"
@@ -241,11 +287,11 @@ function Gallery() {
                                 &lt;
                             </button>
                             <span className="pagination-info">
-                                {currentPage} / {totalPages}
+                                {currentPage}
                             </span>
                             <button
                                 className="pagination-btn"
-                                disabled={currentPage === totalPages}
+                                disabled={!nextCursor}
                                 onClick={() => handlePageChange(currentPage + 1)}
                             >
                                 &gt;
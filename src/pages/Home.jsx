@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
 import { useTranslation } from 'react-i18next'
+import { buildSrcSet } from '../utils/image'
 import '../styles/home.css'
 
 function Home() {
@@ -17,23 +18,13 @@ function Home() {
 
     const loadContent = async () => {
         try {
-            const contentRes = await fetch('/api/pages/home')
-            if (contentRes.ok) {
-                const content = await contentRes.json()
-                setPageContent(content)
-            }
-
-            const jewelryRes = await fetch('/api/jewelry?featured=true&limit=3')
-            if (jewelryRes.ok) {
-                const jewelry = await jewelryRes.json()
-                setFeaturedJewelry(jewelry)
-            }
-
-            // 加载展廊图片
-            const galleryRes = await fetch('/api/gallery')
-            if (galleryRes.ok) {
-                const gallery = await galleryRes.json()
-                setGalleryImages(gallery)
+            // 页面内容、精选饰品和展廊图片一次请求获取
+            const res = await fetch('/api/bundle/home')
+            if (res.ok) {
+                const bundle = await res.json()
+                setPageContent(bundle.page)
+                setFeaturedJewelry(bundle.featured)
+                setGalleryImages(bundle.gallery)
             }
         } catch (error) {
             console.log('使用默认内容')
@@ -137,6 +128,8 @@ function Home() {
                                 {item.images && item.images[0] ? (
                                     <img
                                         src={item.images[0].path}
+                                        srcSet={buildSrcSet(item.images[0])}
+                                        sizes="(max-width: 768px) 100vw, 33vw"
                                         alt={isEn ? (item.name_en || item.name) : item.name}
                                         className="curated-image"
                                         loading="lazy"
@@ -174,6 +167,8 @@ function Home() {
                                 {img.path ? (
                                     <img
                                         src={img.path}
+                                        srcSet={buildSrcSet(img)}
+                                        sizes="(max-width: 768px) 100vw, 50vw"
                                         alt={isEn ? (img.title_en || img.alt) : (img.title || img.alt)}
                                         className="gallery-image"
                                         style={{ objectFit: 'cover' }}
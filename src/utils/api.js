@@ -84,8 +84,10 @@ export const api = {
     },
 
     // 图片
-    async getImages() {
-        const res = await request('/images')
+    // params.cursor 存在时（第一页为空字符串）返回 { items, next_cursor }
+    async getImages(params = {}) {
+        const query = new URLSearchParams(params).toString()
+        const res = await request(`/images${query ? '?' + query : ''}`)
         return res.json()
     },
 
@@ -123,6 +125,18 @@ export const api = {
         return res.json()
     },
 
+    // 按 JSON Patch 只提交修改的字段
+    async patchPageContent(pageKey, operations) {
+        const res = await request(`/pages/${pageKey}`, {
+            method: 'PATCH',
+            body: JSON.stringify(operations)
+        })
+        if (!res.ok) {
+            throw new Error('保存失败')
+        }
+        return res.json()
+    },
+
     // 统计
     async getStats() {
         const res = await request('/admin/stats')
@@ -170,10 +184,12 @@ export const api = {
     },
 
     // 图片上传
-    async uploadImages(files, jewelryId = null) {
+    // wait 为 true 时服务端处理完成后才返回，得到最终的图片路径
+    async uploadImages(files, jewelryId = null, { wait = false } = {}) {
         const formData = new FormData()
         files.forEach(file => formData.append('images', file))
         if (jewelryId) formData.append('jewelry_id', jewelryId)
+        if (wait) formData.append('wait', 'true')
 
         const token = localStorage.getItem('adminToken')
         // 上传单独处理，因为Content-Type由FormData控制
@@ -192,6 +208,44 @@ export const api = {
         return res.json()
     },
 
+    // 分片上传（断线后从服务端已确认的位置继续）
+    async uploadChunked(file, params = {}, retries = 5) {
+        const token = localStorage.getItem('adminToken')
+        const authHeader = { 'Authorization': `Bearer ${token}` }
+
+        const initRes = await request('/uploads', {
+            method: 'POST',
+            body: JSON.stringify({ filename: file.name, size: file.size, ...params })
+        })
+        const session = await initRes.json()
+        if (!initRes.ok) return session
+
+        let offset = session.offset
+        let failures = 0
+        while (offset < file.size) {
+            try {
+                const res = await fetch(`${API_BASE}/uploads/${session.id}?offset=${offset}`, {
+                    method: 'PUT',
+                    headers: { ...authHeader, 'Content-Type': 'application/octet-stream' },
+                    body: file.slice(offset, offset + session.chunk_size)
+                })
+                const status = await res.json()
+                if (!res.ok && res.status !== 409) throw new Error(status.message)
+                offset = status.offset
+                failures = 0
+            } catch (error) {
+                if (++failures > retries) throw error
+                // 查询服务端已接收的位置后重试
+                await new Promise(resolve => setTimeout(resolve, 1000 * failures))
+                const res = await request(`/uploads/${session.id}`)
+                offset = (await res.json()).offset
+            }
+        }
+
+        const res = await request(`/uploads/${session.id}/complete`, { method: 'POST' })
+        return res.json()
+    },
+
     // 首页展廊图片
     async getGalleryImages(visibleOnly = true) {
         const res = await fetch(`${API_BASE}/gallery?visible=${visibleOnly}`)
@@ -241,10 +295,30 @@ export const api = {
         return res.json()
     },
 
-    async reorderGalleryImages(orderList) {
-        const res = await request('/gallery/reorder', {
+    // 调整顺序（type: gallery / jewelry / images，ids 按新顺序排列，images 需要 jewelryId）
+    async reorder(type, ids, jewelryId) {
+        const res = await request('/admin/reorder', {
+            method: 'POST',
+            body: JSON.stringify({ type, ids, jewelry_id: jewelryId })
+        })
+        if (!res.ok) throw new Error('排序失败')
+        return res.json()
+    },
+
+    // 批量增删改（同一事务，失败时返回每个操作的校验结果）
+    // operations: [{ op: 'create' | 'update' | 'delete', id, data }]
+    async batchJewelry(operations) {
+        const res = await request('/jewelry/batch', {
+            method: 'POST',
+            body: JSON.stringify({ operations })
+        })
+        return res.json()
+    },
+
+    async batchImages(operations) {
+        const res = await request('/images/batch', {
             method: 'POST',
-            body: JSON.stringify({ order: orderList })
+            body: JSON.stringify({ operations })
         })
         return res.json()
     },
@@ -256,6 +330,16 @@ export const api = {
             body: JSON.stringify({ text })
         })
         return res.json()
+    },
+
+    // 批量翻译（返回与 texts 对应的译文，失败的位置为 null）
+    async translateBatch(texts) {
+        const res = await request('/utils/translate/batch', {
+            method: 'POST',
+            body: JSON.stringify({ texts })
+        })
+        if (!res.ok) throw new Error('翻译失败')
+        return res.json()
     }
 }
 
@@ -0,0 +1,5 @@
+// 根据图片的多宽度版本生成 srcset
+export const buildSrcSet = (image) => {
+    if (!image || !image.variants || image.variants.length === 0) return undefined
+    return image.variants.map(v => `${v.path} ${v.width}w`).join(', ')
+}